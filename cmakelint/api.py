@@ -0,0 +1,184 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Linting as a library: IterLint yields what was found in each file as soon as
+that file is done, for programs that want to act on the results while the
+rest are still being linted, and Parse gives the commands of a file as
+--dump-ast writes them. Nothing is printed and the state used by main() is
+left alone.
+"""
+import io
+
+import cmakelint.jobs
+import cmakelint.main
+
+
+class LintResult(object):
+    """
+    What linting one file found. errors is a list of (linenumber, category,
+    message). skipped is why the file was not linted, one of the reasons of
+    _SKIP_REASONS or 'ignored' for a file that is not a CMake file, and error
+    the message of a failure that stopped the file being linted at all; both
+    are None for a file that was linted. A file that can not be read or
+    decoded has a syntax/io error instead.
+    """
+
+    def __init__(self, filename, errors=None, skipped=None, error=None):
+        self.filename = filename
+        self.errors = errors or []
+        self.skipped = skipped
+        self.error = error
+
+    def __repr__(self):
+        return 'LintResult(%r, %d errors)' % (self.filename, len(self.errors))
+
+
+def _Results(filename, files, error):
+    """
+    The LintResult of each file in what jobs.LintFile returned for filename
+    """
+    results = []
+    for name, records in files:
+        result = LintResult(name)
+        if not (cmakelint.main.IsValidFile(name) or
+                cmakelint.main.IsArchive(name)):
+            result.skipped = 'ignored'
+        for record in records:
+            if record[0] == 'error':
+                result.errors.append(record[2:])
+            elif record[0] == 'skip':
+                result.skipped = record[1]
+        results.append(result)
+    if error is not None:
+        results.append(LintResult(filename, error=error))
+    return results
+
+
+def _State(config):
+    """
+    A fresh state with the settings of the config file at path config, or
+    the defaults when it is None
+    """
+    state = cmakelint.main._CMakeLintState()
+    if config is None:
+        return state
+    saved = cmakelint.main._lint_state
+    cmakelint.main._lint_state = state
+    try:
+        with cmakelint.main.OpenTextFile(config) as f:
+            cmakelint.main.ParseOptionFile(f.readlines(), False)
+    finally:
+        cmakelint.main._lint_state = saved
+    return state
+
+
+def _LintHere(filename, state):
+    """
+    jobs.LintFile with state in place of the state of main() while it runs
+    """
+    saved = (cmakelint.main._lint_state, cmakelint.main._package_state)
+    cmakelint.main._lint_state = state
+    try:
+        return cmakelint.jobs.LintFile(filename, cmakelint.main.ReadSource)
+    finally:
+        state.stdout = None
+        state.report = None
+        cmakelint.main._lint_state, cmakelint.main._package_state = saved
+
+
+def IterLint(paths, config=None, ordered=False, jobs=1):
+    """
+    Lint paths and yield a LintResult for each file as soon as it is done;
+    an archive gives one for each CMake file in it. config is the path of a
+    .cmakelintrc style file to take the settings from. With jobs above 1 the
+    files are linted on that many processes and, unless ordered is true, the
+    results come in the order the files finish.
+
+    paths may be any iterable, and is only read as far as needed: no more
+    than 2 * jobs files are in hand that the caller has not taken the
+    results of yet. Closing the iterator, or leaving a loop over it early,
+    cancels the files that have not been started.
+    """
+    state = _State(config)
+    if jobs <= 1:
+        for filename in paths:
+            for result in _Results(filename, *_LintHere(filename, state)):
+                yield result
+        return
+    for result in _IterParallel(paths, state, ordered, jobs):
+        yield result
+
+
+def _IterParallel(paths, state, ordered, jobs):
+    import concurrent.futures
+    settings = dict((name, getattr(state, name))
+                    for name in cmakelint.jobs._WORKER_SETTINGS)
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=cmakelint.jobs._Initialize,
+        initargs=(settings, False))
+    window = 2 * jobs
+    paths = iter(paths)
+    end = object()
+    pending = {}
+    done = {}
+    submitted = 0
+    next_index = 0
+    try:
+        while True:
+            # in order, the results that may be held back are limited too
+            while submitted - next_index < window:
+                filename = next(paths, end)
+                if filename is end:
+                    break
+                future = executor.submit(cmakelint.jobs._LintPath, filename)
+                pending[future] = (submitted, filename)
+                submitted += 1
+            if not pending and not done:
+                break
+            if pending:
+                finished, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    index, filename = pending.pop(future)
+                    done[index] = _Results(filename, *future.result())
+            if ordered:
+                ready = []
+                while next_index in done:
+                    ready.append(done.pop(next_index))
+                    next_index += 1
+            else:
+                ready = list(done.values())
+                next_index += len(ready)
+                done = {}
+            for results in ready:
+                for result in results:
+                    yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def Parse(filename, text=None):
+    """
+    The commands, comments and lint_cmake pragmas of filename as a dict laid
+    out as cmakelint.tree.SCHEMA describes, read from text instead of the
+    file when it is given
+    """
+    import cmakelint.tree
+    if text is None:
+        with open(filename, 'rb') as f:
+            lines = cmakelint.main.DecodeLines(f.read())
+    else:
+        lines = io.StringIO(text, newline=None).readlines()
+    return cmakelint.tree.Tree(filename, cmakelint.main.ParseLines(lines))
@@ -0,0 +1,64 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Lint the CMake files in tar and zip archives without extracting them. Tar
+archives are read as a stream, compressed or not, and only one member is held
+in memory at a time.
+"""
+import posixpath
+import tarfile
+import zipfile
+
+import cmakelint.main
+
+
+def _TarMembers(filename):
+    with tarfile.open(filename, 'r|*') as archive:
+        for member in archive:
+            if member.isfile():
+                yield (member.name, member.size,
+                       lambda: archive.extractfile(member).read())
+
+
+def _ZipMembers(filename):
+    with zipfile.ZipFile(filename) as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield (info.filename, info.file_size,
+                       lambda: archive.read(info))
+
+
+def Members(filename):
+    """
+    Yield (filename, _Source) for each CMake file in the archive filename,
+    named archive/member and chosen by its name before it is read. If the
+    archive can not be read, the last is a _Source with the error for the
+    archive itself.
+    """
+    if filename.lower().endswith('.zip'):
+        members = _ZipMembers(filename)
+    else:
+        members = _TarMembers(filename)
+    try:
+        for name, size, read in members:
+            path = '%s/%s' % (filename, posixpath.normpath(name).lstrip('/'))
+            if not cmakelint.main.IsValidFile(path):
+                continue
+            max_file_size = cmakelint.main._lint_state.max_file_size
+            if max_file_size and size > max_file_size:
+                yield path, cmakelint.main._Source(skipped='size')
+                continue
+            yield path, cmakelint.main.SourceFromData(path, read())
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as ex:
+        yield filename, cmakelint.main._Source(
+            error='Can not read archive: %s' % ex)
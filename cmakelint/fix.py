@@ -0,0 +1,202 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The fixes applied by --fix. Each one is only made where it can not change
+what CMake reads: nothing inside quoted or bracket arguments is touched and
+a fix that can not be sure of that leaves the line alone, so that the error
+is still reported.
+"""
+import io
+import os
+import re
+import tempfile
+
+import cmakelint.main
+
+# The categories that have a fix, in the order their fixes are made to a line
+FIXABLE = ('readability/wonkycase', 'readability/mixedcase', 'whitespace/extra',
+           'readability/logic', 'whitespace/mismatch', 'whitespace/tabs',
+           'whitespace/eol')
+
+_RE_COMMAND_NAME = re.compile(r'^(\s*)(\w+)(\s*)\(')
+_RE_LOGIC = re.compile(r'^(\s*)(%s)\s*\([^()"#\[]*\)' %
+                       '|'.join(cmakelint.main._logic_commands), re.IGNORECASE)
+_RE_BRACKET_OPEN = re.compile(r'\[=*\[')
+_RE_BRACKET_CLOSE = re.compile(r'\]=*\]')
+
+
+def _FixCase(line, upper):
+    # commands are not case sensitive, so use the case of the rest of the file
+    match = _RE_COMMAND_NAME.match(line)
+    if match is None:
+        return line
+    command = match.group(2)
+    command = command.upper() if upper else command.lower()
+    return line[:match.start(2)] + command + line[match.end(2):]
+
+
+def _FixExtra(line, unused_upper):
+    match = _RE_COMMAND_NAME.match(line)
+    if match is None:
+        return line
+    return line[:match.start(3)] + line[match.end(3):]
+
+
+def _FixLogic(line, unused_upper):
+    match = _RE_LOGIC.match(line)
+    if match is None:
+        return line
+    return '%s%s()%s' % (match.group(1), match.group(2), line[match.end():])
+
+
+def _FixMismatch(line, unused_upper):
+    # only a command that is whole on this line and has nothing in it that
+    # the checks see differently from the raw text
+    if (line.count('(') != 1 or line.count(')') != 1 or
+            any(char in line for char in '"#[')):
+        return line
+    open_end = line.index('(') + 1
+    spaces = len(line[open_end:]) - len(line[open_end:].lstrip())
+    close = line.index(')')
+    start = len(line[:close].rstrip())
+    if start < open_end:
+        return line
+    return line[:start] + ' ' * spaces + line[close:]
+
+
+def _FixTabs(line, unused_upper):
+    indent = len(line) - len(line.lstrip(' \t'))
+    spaces = ' ' * cmakelint.main._lint_state.spaces
+    return line[:indent].replace('\t', spaces) + line[indent:]
+
+
+def _FixEol(line, unused_upper):
+    return line.rstrip()
+
+
+_FIXES = {
+    'readability/wonkycase': _FixCase,
+    'readability/mixedcase': _FixCase,
+    'whitespace/extra': _FixExtra,
+    'readability/logic': _FixLogic,
+    'whitespace/mismatch': _FixMismatch,
+    'whitespace/tabs': _FixTabs,
+    'whitespace/eol': _FixEol,
+}
+
+
+def _Ending(line):
+    for ending in ('\r\n', '\n', '\r'):
+        if line.endswith(ending):
+            return ending
+    return ''
+
+
+def _Safe(lines):
+    """
+    For each line, whether it starts outside any quoted or bracket argument
+    and whether it ends outside one, so that its indentation and trailing
+    whitespace are not part of an argument. Also whether the commands of the
+    file are upper case, going by the first that is not in mixed case as
+    CheckUpperLowerCase does.
+    """
+    safe = []
+    upper = None
+    quote = False
+    bracket = False
+    for line in lines:
+        text = line.rstrip('\r\n')
+        starts = not quote and not bracket
+        cleaned, quote = cmakelint.main.CleanComments(text, quote)
+        if upper is None and starts:
+            command = cmakelint.main.GetCommand(cleaned)
+            if command and not cmakelint.main.IsCommandMixedCase(command):
+                upper = cmakelint.main.IsCommandUpperCase(command)
+        closes = _RE_BRACKET_CLOSE.search(text) is not None
+        if bracket:
+            bracket = not closes
+        elif _RE_BRACKET_OPEN.search(cleaned):
+            bracket = not closes
+        # a line that opens or closes a bracket argument is never safe
+        plain = not closes and _RE_BRACKET_OPEN.search(text) is None
+        safe.append((starts and plain, not quote and not bracket and plain))
+    return safe, bool(upper)
+
+
+def FixLines(lines, diagnostics):
+    """
+    lines with the fixes for diagnostics, the (linenumber, category, message)
+    found for them, made where it is safe. Fixes never add or remove lines.
+    """
+    categories = {}
+    for linenumber, category, _ in diagnostics:
+        if category in _FIXES and 0 < linenumber <= len(lines):
+            categories.setdefault(linenumber - 1, set()).add(category)
+    if not categories:
+        return lines
+    safe, upper = _Safe(lines)
+    fixed = list(lines)
+    for index, found in categories.items():
+        starts, ends = safe[index]
+        line = lines[index]
+        ending = _Ending(line)
+        text = line[:len(line) - len(ending)]
+        for category in FIXABLE:
+            if category not in found:
+                continue
+            if category == 'whitespace/eol':
+                if not ends:
+                    continue
+            elif not starts:
+                continue
+            text = _FIXES[category](text, upper)
+        fixed[index] = text + ending
+    return fixed
+
+
+def WriteLines(filename, lines):
+    """
+    Replace the contents of filename with lines atomically: the new contents
+    are written to a temporary file next to it that is then renamed over it,
+    so that the file is never seen half written. A symbolic link is followed
+    and the file it points to is replaced. The encoding, byte order mark and
+    the line ending of each line are kept. Returns False, writing nothing,
+    if the file no longer has as many lines as lines.
+    """
+    path = os.path.realpath(filename)
+    with open(path, 'rb') as f:
+        data = f.read()
+    bom = b''
+    for prefix, _ in cmakelint.main._BOMS:
+        if data.startswith(prefix):
+            bom = prefix
+            break
+    text, encoding = cmakelint.main.DecodeText(data)
+    # lines have been decoded with their line endings turned into \n
+    original = io.StringIO(text, newline='').readlines()
+    if len(original) != len(lines):
+        return False
+    text = ''.join(line[:len(line) - len(_Ending(line))] + _Ending(old)
+                   for line, old in zip(lines, original))
+    handle, temporary = tempfile.mkstemp(
+        prefix='.%s.' % os.path.basename(path), suffix='.tmp',
+        dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(bom + text.encode(encoding))
+        os.chmod(temporary, os.stat(path).st_mode & 0o7777)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return True
@@ -0,0 +1,168 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Read the files to lint from the git index or a revision instead of the working
+tree. Every blob is read through one long-lived git cat-file --batch process,
+so linting many files costs no more processes or temporary files than one.
+"""
+import os
+import subprocess
+import threading
+
+import cmakelint.main
+
+
+class GitError(cmakelint.main._FatalError):
+    """
+    Raised when git can not be run or fails
+    """
+
+
+def _Run(args):
+    """
+    The exit status, output and error output of git args
+    """
+    try:
+        process = subprocess.Popen(['git'] + args, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except OSError as ex:
+        raise GitError('can not run git: %s' % ex)
+    stdout, stderr = process.communicate()
+    return process.returncode, stdout, stderr.decode('utf-8', 'replace').strip()
+
+
+def _Git(args):
+    status, stdout, stderr = _Run(args)
+    if status != 0:
+        raise GitError(stderr or 'git %s failed' % args[0])
+    return stdout
+
+
+def _CheckWorkTree(rev):
+    """
+    Raise GitError with one line saying what is wrong unless the current
+    directory is in the work tree of a git repository and rev, when it is not
+    None, names a tree there. Outside a repository most git commands print
+    their whole usage, so this is checked first, by the same git rev-parse
+    that checks rev.
+    """
+    args = ['rev-parse', '--is-inside-work-tree']
+    if rev is not None:
+        args += ['--verify', '--quiet', '%s^{tree}' % rev]
+    status, stdout, _ = _Run(args)
+    if not stdout.startswith(b'true\n'):
+        raise GitError('not a git repository: %s' % os.getcwd())
+    if status != 0:
+        raise GitError('%s is not a revision' % rev)
+
+
+def _ObjectName(rev, filename):
+    """
+    The name cat-file knows filename by in rev, or in the index when rev is
+    None. Paths starting with ./ or ../ are relative to the current directory.
+    """
+    path = os.path.relpath(filename).replace(os.sep, '/')
+    if not path.startswith('../'):
+        path = './' + path
+    return '%s:%s' % (rev or '', path)
+
+
+class BlobReader(object):
+    """
+    Reads files from the index, when rev is None, or from the revision rev.
+    Read may be called from the --prefetch threads; the requests to the
+    cat-file process are made one at a time.
+    """
+
+    def __init__(self, rev=None):
+        self.rev = rev
+        self.process = None
+        self._lock = threading.Lock()
+
+    def Files(self, filenames):
+        """
+        filenames, or when there are none the CMake files staged for commit or
+        in rev, below the current directory
+        """
+        _CheckWorkTree(self.rev)
+        if filenames:
+            return filenames
+        if self.rev is None:
+            args = ['diff', '--cached', '--name-only', '--diff-filter=ACMR',
+                    '--relative', '-z']
+        else:
+            args = ['ls-tree', '-r', '--name-only', '-z', self.rev]
+        names = os.fsdecode(_Git(args)).split('\0')
+        return [name for name in names
+                if name and cmakelint.main.IsValidFile(name)]
+
+    def _Start(self):
+        try:
+            self.process = subprocess.Popen(
+                ['git', 'cat-file', '--batch'], stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as ex:
+            raise GitError('can not run git: %s' % ex)
+
+    def ReadBlob(self, filename):
+        """
+        The contents of filename as bytes, or None if it is not in the index
+        or in rev or is not a file
+        """
+        name = _ObjectName(self.rev, filename)
+        if '\n' in name:
+            return None
+        with self._lock:
+            if self.process is None:
+                self._Start()
+            try:
+                self.process.stdin.write(os.fsencode(name) + b'\n')
+                self.process.stdin.flush()
+            except OSError:
+                pass
+            header = self.process.stdout.readline()
+            if not header:
+                self.process.wait()
+                raise GitError(self.process.stderr.read().decode(
+                    'utf-8', 'replace').strip() or 'git cat-file failed')
+            if header.endswith((b' missing\n', b' ambiguous\n')):
+                return None
+            _, kind, size = header.split()
+            data = self.process.stdout.read(int(size))
+            self.process.stdout.read(1)
+        if kind != b'blob':
+            return None
+        return data
+
+    def Read(self, filename):
+        """
+        ReadSource for the blob of filename
+        """
+        if not cmakelint.main.IsValidFile(filename):
+            return cmakelint.main._Source()
+        data = self.ReadBlob(filename)
+        if data is None:
+            return cmakelint.main._Source(skipped='missing')
+        return cmakelint.main.SourceFromData(filename, data)
+
+    def Close(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                # git has already exited, as it does outside a repository
+                pass
+            self.process.stdout.close()
+            self.process.wait()
+            self.process.stderr.close()
+            self.process = None
@@ -0,0 +1,258 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Lint files on several processes for --jobs. The largest files are handed out
+first so that one big file given last does not hold up the end of the run,
+and small files are batched into chunks so that each task is worth sending to
+a worker. Workers collect their output instead of printing it, and the parent
+prints it in the order the files were given.
+"""
+import os
+import time
+
+import cmakelint.main
+import cmakelint.metrics
+
+# files at least this big get a chunk of their own; smaller files are batched
+# until a chunk holds this many bytes or _CHUNK_FILES files
+_CHUNK_BYTES = 64 * 1024
+_CHUNK_FILES = 32
+
+# the options that change what a worker reports
+_WORKER_SETTINGS = ('filters', 'spaces', 'linelength', 'allowed_categories',
+                    'max_file_errors', 'max_file_size', 'max_file_time',
+                    'generated', 'engine', 'overrides', 'fix',
+                    'fallback_encoding', 'dump_ast', 'cache_dir')
+
+# set in the workers of LintFiles once --max-errors is reached, so that they
+# skip the rest of the chunk they are on
+_stop = None
+
+
+class _Collector(object):
+    """
+    Stands in for stdout in a worker and records what one file printed and
+    reported, in order
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, text):
+        self.records.append(('output', text))
+
+    def flush(self):
+        pass
+
+    def Report(self, filename, linenumber, category, message):
+        self.records.append(('error', filename, linenumber, category, message))
+
+    def Skip(self, reason):
+        self.records.append(('skip', reason))
+
+    def Tree(self, text):
+        self.records.append(('tree', text))
+
+    def Truncated(self):
+        # the error over --max-file-errors is left out in the worker
+        self.records.append(('truncated',))
+
+    def Fixed(self, count):
+        # counted before the errors that remain, like when linting here
+        self.records.insert(0, ('fixed', count))
+
+
+def Size(filename):
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def Schedule(filenames, sizes):
+    """
+    Chunks of (index, filename) to hand out in order: the largest files first,
+    and small files batched together
+    """
+    order = sorted(range(len(filenames)), key=lambda i: (-sizes[i], i))
+    chunks = []
+    chunk = []
+    chunk_bytes = 0
+    for index in order:
+        if sizes[index] >= _CHUNK_BYTES:
+            chunks.append([(index, filenames[index])])
+            continue
+        chunk.append((index, filenames[index]))
+        chunk_bytes += sizes[index]
+        if chunk_bytes >= _CHUNK_BYTES or len(chunk) >= _CHUNK_FILES:
+            chunks.append(chunk)
+            chunk = []
+            chunk_bytes = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _Initialize(settings, metrics, stop=None):
+    global _stop
+    state = cmakelint.main._CMakeLintState()
+    state.__dict__.update(settings)
+    if metrics:
+        state.metrics = cmakelint.metrics.Metrics()
+    cmakelint.main._lint_state = state
+    _stop = stop
+
+
+def LintFile(filename, read):
+    """
+    Lint filename with the current state, collecting what is printed and
+    reported instead of letting it through. Returns (files, error): the
+    (name, records) of each file linted, more than one for an archive, and
+    the message of a _FatalError or None.
+    """
+    state = cmakelint.main._lint_state
+    files = []
+    try:
+        source = cmakelint.main.ReadIsolated(read, filename)
+        for name, source in cmakelint.main.Sources(filename, source):
+            collector = _Collector()
+            files.append((name, collector.records))
+            state.stdout = collector
+            state.report = collector.Report
+            if state.dump_ast is not None:
+                state.dump = collector.Tree
+            if source.error is not None:
+                cmakelint.main.ReportUnreadable(name, source)
+                continue
+            if source.skipped:
+                collector.Skip(source.skipped)
+                continue
+            timed_out = state.skipped.get('time', 0)
+            fixed = state.fixed
+            truncated = state.truncated_files
+            cmakelint.main.ProcessFile(name, source.lines, source.cheap,
+                                       source.clean_lines)
+            if state.skipped.get('time', 0) > timed_out:
+                collector.Skip('time')
+            if state.truncated_files > truncated:
+                collector.Truncated()
+            if state.fixed > fixed:
+                collector.Fixed(state.fixed - fixed)
+    except cmakelint.main._FatalError as ex:
+        return files, str(ex)
+    return files, None
+
+
+def _LintChunk(chunk):
+    """
+    Lint the files of a chunk in a worker. Returns (index, files, error) for
+    each, as LintFile returns them, the time the chunk took and what was
+    measured for --metrics-file. The files left when the parent has reached
+    --max-errors are not linted, as their results would not be used.
+    """
+    start = time.perf_counter()
+    state = cmakelint.main._lint_state
+    read = cmakelint.main.ReadSource
+    if state.metrics is not None:
+        read = state.metrics.Timed('read', read)
+    results = []
+    for index, filename in chunk:
+        if _stop is not None and _stop.is_set():
+            break
+        files, error = LintFile(filename, read)
+        results.append((index, files, error))
+    metrics = state.metrics.Take() if state.metrics is not None else None
+    return results, time.perf_counter() - start, metrics
+
+
+def _LintPath(filename):
+    """
+    LintFile in a worker of cmakelint.api.IterLint
+    """
+    return LintFile(filename, cmakelint.main.ReadSource)
+
+
+def _Replay(files, error):
+    """
+    Print and count what a worker recorded for one of the files given, the
+    same way linting it here would have
+    """
+    state = cmakelint.main._lint_state
+    for _, records in files:
+        state.file_errors = 0
+        try:
+            for record in records:
+                if record[0] == 'output':
+                    state.Stdout().write(record[1])
+                elif record[0] == 'skip':
+                    state.Skip(record[1])
+                elif record[0] == 'fixed':
+                    state.fixed += record[1]
+                elif record[0] == 'truncated':
+                    state.truncated_files += 1
+                elif record[0] == 'tree':
+                    state.dump(record[1])
+                else:
+                    cmakelint.main._Report(*record[1:])
+        except cmakelint.main._ErrorLimitReached as ex:
+            if not ex.per_file:
+                raise
+    if error is not None:
+        raise cmakelint.main._FatalError(error)
+
+
+def LintFiles(filenames, jobs):
+    """
+    Lint filenames on jobs worker processes and print the results in order.
+    Returns a summary of how busy the workers were. Reaching --max-errors
+    cancels the chunks that have not started and stops the others after the
+    file they are on.
+    """
+    import concurrent.futures
+    import multiprocessing
+    start = time.perf_counter()
+    chunks = Schedule(filenames, [Size(filename) for filename in filenames])
+    state = cmakelint.main._lint_state
+    settings = dict((name, getattr(state, name)) for name in _WORKER_SETTINGS)
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context, initializer=_Initialize,
+        initargs=(settings, state.metrics is not None, stop))
+    futures = []
+    done = {}
+    next_index = 0
+    busy = 0.0
+    try:
+        futures = [executor.submit(_LintChunk, chunk) for chunk in chunks]
+        for future in concurrent.futures.as_completed(futures):
+            results, elapsed, metrics = future.result()
+            busy += elapsed
+            if metrics is not None:
+                # errors are counted as they are replayed here
+                state.metrics.Merge(metrics, skip=('cmakelint_diagnostics',))
+            for index, files, error in results:
+                done[index] = (files, error)
+            while next_index in done:
+                _Replay(*done.pop(next_index))
+                next_index += 1
+    except cmakelint.main._ErrorLimitReached:
+        stop.set()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+    utilization = busy / (jobs * elapsed) if elapsed else 0.0
+    return 'Jobs: %d workers, %d chunks, %d%% busy\n' % (
+        jobs, len(chunks), round(100 * min(utilization, 1.0)))
@@ -0,0 +1,68 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The original implementations of the per-line primitives that cmakelint.main
+has since made faster, used with --engine=legacy. They are kept as the
+reference that the fast engine has to agree with: the regexes backtrack
+badly on some long lines, so do not use them for anything else.
+"""
+import re
+
+_RE_COMMAND_END_SPACES = re.compile(r'(\s*)\)')
+_RE_LOGIC_CHECK = re.compile(r'(\w+)\s*\(\s*\S+[^)]+\)')
+
+
+def CleanComments(line, quote=False):
+    """
+    quote means 'was in a quote starting this line' so that
+    quoted lines can be eaten/removed.
+    """
+    if line.find('#') == -1 and line.find('"') == -1:
+        if quote:
+            return '', quote
+        else:
+            return line, quote
+    # else have to check for comment
+    prior = []
+    prev = ''
+    for char in line:
+        try:
+            if char == '"':
+                if prev != '\\':
+                    quote = not quote
+                    prior.append(char)
+                continue
+            elif char == '#' and not quote:
+                break
+            if not quote:
+                prior.append(char)
+        finally:
+            prev = char
+
+    # rstrip removes trailing space between end of command and the comment # start
+
+    return ''.join(prior).rstrip(), quote
+
+
+def GetSpacesBeforeEnd(line):
+    match = _RE_COMMAND_END_SPACES.search(line)
+    if match:
+        return len(match.group(1))
+    return -1
+
+
+def GetRepeatedLogic(line):
+    match = _RE_LOGIC_CHECK.search(line)
+    if match:
+        return match.group(1)
+    return None
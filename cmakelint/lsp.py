@@ -0,0 +1,493 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Language Server Protocol front end for cmakelint, spoken over stdio.
+
+Open documents are kept in memory together with a per-line index of cleaned
+lines, quote state and command spans, so that an incremental edit re-lints
+only the commands that overlap it instead of the whole buffer.
+"""
+import json
+import sys
+import threading
+import time
+
+import cmakelint.main
+
+_DEFAULT_DEBOUNCE = 0.25
+
+# LSP DiagnosticSeverity.Warning
+_SEVERITY_WARNING = 2
+
+
+def _FromUtf16(line, character):
+    """
+    Convert an LSP character offset (UTF-16 code units) into an index of line
+    """
+    if line.isascii():
+        return min(character, len(line))
+    units = 0
+    for index, char in enumerate(line):
+        if units >= character:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+
+def _FindCommandEnd(lines, start):
+    """
+    Index of the line holding the closing parenthesis of the command that
+    starts on lines[start], scanning forward like CheckCommandSpaces does
+    """
+    linenumber = start
+    while linenumber < len(lines):
+        if ')' in lines[linenumber]:
+            return linenumber
+        linenumber += 1
+    return len(lines) - 1
+
+
+class Document(object):
+    """
+    An open text document and its lint index.
+
+    Internal line indexes match the ones used by ProcessFileData: index 0 and
+    the last index are the sentinel lines, so LSP line N is index N + 1.
+    The attributes raw_lines, lines and have_seen_uppercase and the
+    BlockIndex method let a Document be passed to ProcessLine and the whole
+    file checks in place of a CleansedLines instance. Line endings are
+    normalised the same way reading a file in text mode does.
+
+    Block structure, performance, variable and command checks depend on the
+    whole file, so their diagnostics are recomputed after every edit from a
+    fresh block index; building it is a single pass over the already cleaned
+    lines.
+    """
+
+    def __init__(self, uri, filename, text, base_filters):
+        self.uri = uri
+        self.filename = filename
+        self.base_filters = list(base_filters)
+        self.text_lines = []
+        self.raw_lines = []
+        self.lines = []
+        self.quote_in = []
+        self.command_length = []
+        self.diagnostics = []
+        self.file_diagnostics = []
+        self.block_diagnostics = []
+        self.block_index = None
+        self.pragmas = []
+        self.have_seen_uppercase = None
+        self.version = None
+        self.SetText(text)
+
+    def SetText(self, text):
+        self.text_lines = text.split('\n')
+        self.FullLint()
+
+    def _FirstCommandCase(self):
+        for linenumber in range(1, len(self.lines)):
+            if self.command_length[linenumber] < 0:
+                continue
+            command = cmakelint.main.GetCommand(self.lines[linenumber])
+            if not cmakelint.main.IsCommandMixedCase(command):
+                return cmakelint.main.IsCommandUpperCase(command)
+        return None
+
+    def _Collector(self, file_level):
+        def Collect(unused_filename, linenumber, category, message):
+            if not cmakelint.main.ShouldPrintError(category):
+                return
+            if file_level or linenumber == 0:
+                self.file_diagnostics.append((linenumber, category, message))
+            else:
+                self.diagnostics[linenumber].append((category, message))
+        return Collect
+
+    def _ApplyPragmas(self, before):
+        """
+        Recreate the filters that ProcessFileData would have in effect when
+        reaching line index before
+        """
+        lint_state = cmakelint.main._lint_state
+        lint_state.filters = list(self.base_filters)
+        for linenumber in self.pragmas:
+            cmakelint.main.CheckLintPragma(
+                self.filename, linenumber, self.raw_lines[linenumber])
+        for linenumber in self.pragmas:
+            if linenumber >= before:
+                break
+            cmakelint.main.CheckLintPragma(
+                self.filename, linenumber, self.raw_lines[linenumber])
+
+    def BlockIndex(self):
+        if self.block_index is None:
+            self.block_index = cmakelint.main.BlockIndex(self.lines)
+        return self.block_index
+
+    def _CheckWholeFile(self):
+        """
+        Run the checks that use the block index of the whole file; the
+        filters must be the ones in effect at the end of the file
+        """
+        self.block_index = None
+        self.block_diagnostics = []
+
+        def Collect(unused_filename, linenumber, category, message):
+            if cmakelint.main.ShouldPrintError(category):
+                self.block_diagnostics.append((linenumber, category, message))
+        cmakelint.main.CheckBlocks(self.filename, self, Collect)
+        cmakelint.main.CheckPerformance(self.filename, self, Collect)
+        cmakelint.main.CheckVariables(self.filename, self, Collect)
+        cmakelint.main.CheckCommands(self.filename, self, Collect)
+
+    def _Lint(self, first, last):
+        collect = self._Collector(False)
+        for linenumber in range(first, last + 1):
+            self.diagnostics[linenumber] = []
+            cmakelint.main.ProcessLine(self.filename, linenumber, self, collect)
+
+    def FullLint(self):
+        """
+        Rebuild the whole index and lint every line, mirroring ProcessFileData
+        """
+        lint_state = cmakelint.main._lint_state
+        original_filters = lint_state.filters
+        metrics = lint_state.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        try:
+            self.raw_lines = ['# Lines start at 1']
+            self.raw_lines.extend(line.rstrip('\r') for line in self.text_lines)
+            self.raw_lines.append('# Lines end here')
+            self.pragmas = [i for i, line in enumerate(self.raw_lines)
+                            if line.startswith(cmakelint.main._LINT_PRAGMA)]
+            self.lines = []
+            self.quote_in = []
+            quote = False
+            for line in self.raw_lines:
+                self.quote_in.append(quote)
+                cleaned, quote = cmakelint.main.CleanComments(line, quote)
+                self.lines.append(cleaned)
+            if metrics is not None:
+                checking = time.perf_counter()
+                metrics.Observe('clean', checking - start)
+                metrics.Add('cmakelint_files_linted')
+                metrics.Add('cmakelint_lines', len(self.lines) - 2)
+            self.command_length = [-1] * len(self.lines)
+            for linenumber, line in enumerate(self.lines):
+                if cmakelint.main.ContainsCommand(line):
+                    end = _FindCommandEnd(self.lines, linenumber)
+                    self.command_length[linenumber] = end - linenumber
+            self.diagnostics = [[] for _ in self.lines]
+            self.file_diagnostics = []
+            self.have_seen_uppercase = None
+
+            self._ApplyPragmas(0)
+            cmakelint.main._package_state = cmakelint.main._CMakePackageState()
+            collect_file = self._Collector(True)
+            cmakelint.main.CheckFileName(self.filename, collect_file)
+            self._Lint(0, len(self.lines) - 1)
+            self._CheckWholeFile()
+            cmakelint.main._package_state.Done(self.filename, collect_file)
+            if metrics is not None:
+                metrics.Observe('check', time.perf_counter() - checking)
+        finally:
+            lint_state.filters = original_filters
+
+    def ApplyChange(self, change):
+        """
+        Apply one TextDocumentContentChangeEvent and re-lint what it touched
+        """
+        metrics = cmakelint.main._lint_state.metrics
+        if metrics is not None:
+            metrics.Add('cmakelint_read_bytes', len(change['text'].encode('utf-8')))
+        if 'range' not in change:
+            self.SetText(change['text'])
+            return
+        start = change['range']['start']
+        end = change['range']['end']
+        first, last = start['line'], end['line']
+        if last >= len(self.text_lines):
+            last = len(self.text_lines) - 1
+            end = {'line': last, 'character': len(self.text_lines[last])}
+        head = self.text_lines[first][:_FromUtf16(self.text_lines[first],
+                                                  start['character'])]
+        tail = self.text_lines[last][_FromUtf16(self.text_lines[last],
+                                                end['character']):]
+        new_lines = (head + change['text'] + tail).split('\n')
+        old_count = last - first + 1
+        index = first + 1
+        touches_pragma = any(
+            line.startswith(cmakelint.main._LINT_PRAGMA)
+            for line in self.raw_lines[index:index + old_count] + new_lines)
+        self.text_lines[first:last + 1] = new_lines
+        if touches_pragma or cmakelint.main.IsFindPackage(self.filename):
+            # These change file level state, so the cheap path does not apply
+            self.FullLint()
+            return
+        if metrics is None:
+            self._Splice(index, old_count,
+                         [line.rstrip('\r') for line in new_lines])
+            return
+        start = time.perf_counter()
+        self._Splice(index, old_count, [line.rstrip('\r') for line in new_lines])
+        metrics.Observe('check', time.perf_counter() - start)
+
+    def _Splice(self, index, old_count, new_lines):
+        count = len(new_lines)
+        delta = count - old_count
+        self.raw_lines[index:index + old_count] = new_lines
+        self.lines[index:index + old_count] = [''] * count
+        self.quote_in[index:index + old_count] = (
+            [self.quote_in[index]] + [False] * (count - 1))
+        self.command_length[index:index + old_count] = [-1] * count
+        self.diagnostics[index:index + old_count] = [[] for _ in new_lines]
+        self.pragmas = [p if p < index else p + delta for p in self.pragmas]
+
+        # Re-clean until the quote state entering a line matches what it
+        # was before the edit; everything after that is unchanged.
+        linenumber = index
+        quote = self.quote_in[index]
+        while linenumber < len(self.lines):
+            self.quote_in[linenumber] = quote
+            cleaned, quote = cmakelint.main.CleanComments(
+                self.raw_lines[linenumber], quote)
+            self.lines[linenumber] = cleaned
+            linenumber += 1
+            if (linenumber >= index + count and
+                    linenumber < len(self.lines) and
+                    self.quote_in[linenumber] == quote):
+                break
+        changed_last = linenumber - 1
+
+        # Commands that start earlier but have not closed by the edit
+        first = index
+        linenumber = index - 1
+        while linenumber > 0 and ')' not in self.lines[linenumber]:
+            if self.command_length[linenumber] >= 0:
+                first = linenumber
+            linenumber -= 1
+
+        # Commands starting in the changed region may now extend past it
+        last = changed_last
+        linenumber = first
+        while linenumber <= last:
+            if cmakelint.main.ContainsCommand(self.lines[linenumber]):
+                end = _FindCommandEnd(self.lines, linenumber)
+                self.command_length[linenumber] = end - linenumber
+                last = max(last, end)
+            else:
+                self.command_length[linenumber] = -1
+            linenumber += 1
+
+        if self._FirstCommandCase() != self.have_seen_uppercase:
+            # readability/mixedcase depends on the first command in the file
+            self.FullLint()
+            return
+
+        lint_state = cmakelint.main._lint_state
+        original_filters = lint_state.filters
+        try:
+            self._ApplyPragmas(first)
+            self._Lint(first, last)
+            self._ApplyPragmas(len(self.lines))
+            self._CheckWholeFile()
+        finally:
+            lint_state.filters = original_filters
+
+    def Diagnostics(self):
+        """
+        All current diagnostics as (linenumber, category, message) tuples
+        """
+        result = self.file_diagnostics + self.block_diagnostics
+        for linenumber, diagnostics in enumerate(self.diagnostics):
+            for category, message in diagnostics:
+                result.append((linenumber, category, message))
+        return result
+
+
+def _UriToFilename(uri):
+    if uri.startswith('file://'):
+        try:
+            from urllib.parse import unquote
+        except ImportError:
+            from urllib import unquote
+        return unquote(uri[len('file://'):])
+    return uri
+
+
+class Server(object):
+    """
+    A minimal JSON-RPC 2.0 server handling the text synchronisation part of
+    LSP and publishing diagnostics after a quiet period of debounce seconds
+    """
+
+    def __init__(self, instream, outstream, debounce=_DEFAULT_DEBOUNCE):
+        self.instream = instream
+        self.outstream = outstream
+        self.debounce = debounce
+        self.documents = {}
+        self.base_filters = list(cmakelint.main._lint_state.filters)
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.timers = {}
+        self.shutdown = False
+
+    def ReadMessage(self):
+        length = None
+        while True:
+            header = self.instream.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode('ascii').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value.strip())
+        if length is None:
+            return None
+        return json.loads(self.instream.read(length).decode('utf-8'))
+
+    def WriteMessage(self, message):
+        body = json.dumps(message).encode('utf-8')
+        with self.write_lock:
+            self.outstream.write(
+                ('Content-Length: %d\r\n\r\n' % len(body)).encode('ascii'))
+            self.outstream.write(body)
+            self.outstream.flush()
+
+    def Publish(self, uri):
+        with self.lock:
+            self.timers.pop(uri, None)
+            document = self.documents.get(uri)
+            diagnostics = []
+            metrics = cmakelint.main._lint_state.metrics
+            if document is not None:
+                for linenumber, category, message in document.Diagnostics():
+                    if metrics is not None:
+                        metrics.Add('cmakelint_diagnostics', label=category)
+                    line = max(linenumber - 1, 0)
+                    diagnostics.append({
+                        'range': {'start': {'line': line, 'character': 0},
+                                  'end': {'line': line, 'character': 0}},
+                        'severity': _SEVERITY_WARNING,
+                        'code': category,
+                        'source': 'cmakelint',
+                        'message': message})
+        params = {'uri': uri, 'diagnostics': diagnostics}
+        if document is not None and document.version is not None:
+            params['version'] = document.version
+        self.WriteMessage({'jsonrpc': '2.0',
+                           'method': 'textDocument/publishDiagnostics',
+                           'params': params})
+
+    def SchedulePublish(self, uri):
+        with self.lock:
+            timer = self.timers.pop(uri, None)
+            if timer is not None:
+                timer.cancel()
+            if self.debounce <= 0:
+                self.Publish(uri)
+                return
+            timer = threading.Timer(self.debounce, self.Publish, [uri])
+            timer.daemon = True
+            self.timers[uri] = timer
+            timer.start()
+
+    def DidOpen(self, params):
+        item = params['textDocument']
+        with self.lock:
+            metrics = cmakelint.main._lint_state.metrics
+            if metrics is not None:
+                metrics.Add('cmakelint_read_bytes',
+                            len(item['text'].encode('utf-8')))
+            document = Document(item['uri'], _UriToFilename(item['uri']),
+                                item['text'], self.base_filters)
+            document.version = item.get('version')
+            self.documents[item['uri']] = document
+        self.SchedulePublish(item['uri'])
+
+    def DidChange(self, params):
+        uri = params['textDocument']['uri']
+        with self.lock:
+            document = self.documents.get(uri)
+            if document is None:
+                return
+            document.version = params['textDocument'].get('version')
+            for change in params['contentChanges']:
+                document.ApplyChange(change)
+        self.SchedulePublish(uri)
+
+    def DidClose(self, params):
+        uri = params['textDocument']['uri']
+        with self.lock:
+            timer = self.timers.pop(uri, None)
+            if timer is not None:
+                timer.cancel()
+            self.documents.pop(uri, None)
+        self.Publish(uri)
+
+    def Handle(self, message):
+        method = message.get('method')
+        params = message.get('params') or {}
+        if 'id' in message and method is not None:
+            result = None
+            if method == 'initialize':
+                result = {
+                    'capabilities': {
+                        'textDocumentSync': {'openClose': True, 'change': 2}},
+                    'serverInfo': {
+                        'name': 'cmakelint',
+                        'version': cmakelint.__version__.VERSION}}
+            elif method == 'shutdown':
+                self.shutdown = True
+            else:
+                self.WriteMessage({
+                    'jsonrpc': '2.0', 'id': message['id'],
+                    'error': {'code': -32601,
+                              'message': 'Method not found: %s' % method}})
+                return
+            self.WriteMessage({'jsonrpc': '2.0', 'id': message['id'],
+                               'result': result})
+        elif method == 'textDocument/didOpen':
+            self.DidOpen(params)
+        elif method == 'textDocument/didChange':
+            self.DidChange(params)
+        elif method == 'textDocument/didClose':
+            self.DidClose(params)
+
+    def Run(self):
+        """
+        Serve until exit is requested; returns the process exit status
+        """
+        while True:
+            message = self.ReadMessage()
+            if message is None or message.get('method') == 'exit':
+                break
+            self.Handle(message)
+        with self.lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+        return 0 if self.shutdown else 1
+
+
+def Serve(instream=None, outstream=None, debounce=_DEFAULT_DEBOUNCE):
+    if instream is None:
+        instream = sys.stdin.buffer
+    if outstream is None:
+        outstream = sys.stdout.buffer
+    return Server(instream, outstream, debounce).Run()
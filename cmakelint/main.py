@@ -13,17 +13,46 @@ the License.
 """
 from __future__ import print_function
 import sys
-import re
 import os
-import getopt
+import time
 import cmakelint.__version__
 
 
-_RE_COMMAND = re.compile(r'^\s*(\w+)(\s*)\(', re.VERBOSE)
-_RE_COMMAND_START_SPACES = re.compile(r'^\s*\w+\s*\((\s*)', re.VERBOSE)
-_RE_COMMAND_END_SPACES = re.compile(r'(\s*)\)', re.VERBOSE)
-_RE_LOGIC_CHECK = re.compile(r'(\w+)\s*\(\s*\S+[^)]+\)', re.VERBOSE)
-_RE_COMMAND_ARG = re.compile(r'(\w+)', re.VERBOSE)
+class _LazyRegex(object):
+    """
+    A regular expression that is compiled, and the re module imported, the
+    first time it is used. Afterwards the compiled pattern's methods are
+    bound directly on the instance so there is no per-call overhead.
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def IsCompiled(self):
+        return 'match' in self.__dict__
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        import re
+        compiled = re.compile(self.pattern)
+        for method in ('match', 'search', 'finditer', 'findall', 'sub'):
+            setattr(self, method, getattr(compiled, method))
+        return getattr(compiled, name)
+
+
+_RE_COMMAND = _LazyRegex(r'^\s*(\w+)(\s*)\(')
+_RE_COMMAND_START_SPACES = _LazyRegex(r'^\s*\w+\s*\((\s*)')
+_RE_COMMENT_OR_QUOTE = _LazyRegex(r'[#"]')
+_RE_GENERATED = _LazyRegex(
+    r'(?i)generated by|do not edit|@generated|auto-?generated|'
+    r'automatically generated')
+_RE_COMMAND_ARG = _LazyRegex(r'(\w+)')
+_RE_FIND_MODULE = _LazyRegex(r'^Find(.*)\.cmake')
+_RE_VARIABLE_REFERENCE = _LazyRegex(r'\$\{(\w+)\}')
+_RE_WORD = _LazyRegex(r'\w+')
+# the variables CMake sets for the arguments of a function() or macro()
+_RE_ARGUMENT_VARIABLE = _LazyRegex(r'ARG(?:C|N|V\d*)$')
+_RE_GLOB_FROM_ROOT = _LazyRegex(r'\$\{(?:CMAKE|PROJECT)_SOURCE_DIR\}/\*')
 _logic_commands = """
 else
 endforeach
@@ -32,10 +61,28 @@ endif
 endmacro
 endwhile
 """.split()
+_RE_LOGIC_COMMANDS = [(cmd, _LazyRegex(r'\b%s\b' % cmd)) for cmd in _logic_commands]
 _USAGE = """
 Syntax: cmakelint.py [--version] [--config=file] [--filter=-x,+y] [--spaces=N]
-                     [--quiet] [--linelength=digits]
+                     [--quiet] [--linelength=digits] [--prefetch=K]
+                     [--max-errors=N] [--max-file-errors=N] [--fail-fast]
+                     [--max-file-size=bytes] [--max-file-time=seconds]
+                     [--generated=lint|cheap|skip] [--jobs=N]
+                     [--engine=fast|legacy] [--statistics|--count]
+                     [--metrics-file=file] [--fix]
+                     [--fallback-encoding=name] [--dump-ast=file]
+                     [--cache-dir=dir]
         <file> [file] ...
+        cmakelint.py --project=dir [options]
+        cmakelint.py --staged|--rev=REF [options] [file] ...
+        cmakelint.py --lsp [--config=file] [--filter=-x,+y] [--spaces=N]
+                           [--metrics-port=N]
+
+    Files ending in .tar, .tar.gz, .tgz, .tar.bz2, .tbz2, .tar.xz, .txz or
+    .zip are read as archives: the CMake files in them are linted one at a
+    time straight from the archive, without extracting it, and reported as
+    archive/member.
+
     filter=-x,+y,...
       Specify a comma separated list of filters to apply
 
@@ -46,8 +93,10 @@ Syntax: cmakelint.py [--version] [--config=file] [--filter=-x,+y] [--spaces=N]
       Use the given file for configuration. By default the file
       $PWD/.cmakelintrc, ~/.config/cmakelintrc, $XDG_CONFIG_DIR/cmakelintrc or
       ~/.cmakelintrc is used if it exists. Use the value "None" to use no
-      configuration file (./None for a file called literally None) Only the
-      option "filter=" is currently supported in this file.
+      configuration file (./None for a file called literally None) The file
+      may set filter=, spaces=, linelength= and quiet, and a [pattern]
+      section sets filter=, spaces= and linelength= only for the files that
+      match pattern.
 
     quiet makes output quiet unless errors occurs
       Mainly used by automation tools when parsing huge amount of files.
@@ -65,6 +114,117 @@ Syntax: cmakelint.py [--version] [--config=file] [--filter=-x,+y] [--spaces=N]
       Examples:
         --linelength=120
 
+    max-errors=N
+      Stop linting once N errors have been reported. The Total Errors line
+      notes that the output was truncated. 0, the default, means no limit.
+
+    max-file-errors=N
+      Stop linting a file once N errors have been reported for it and move on
+      to the next file. 0, the default, means no limit.
+
+    fail-fast
+      Stop at the first error; the same as --max-errors=1.
+
+    max-file-size=bytes
+      Skip files larger than this many bytes without reading them.
+
+    max-file-time=seconds
+      Stop linting a file after this many seconds and move on to the next.
+
+    generated=lint|cheap|skip
+      What to do with generated files, recognised by a marker such as
+      "Generated by" or "DO NOT EDIT" in their first few hundred bytes: lint
+      them as usual (the default), only run the checks that need no parsing
+      (line length, tabs and trailing whitespace) or skip them.
+
+      Skipped files are counted in the summary after Total Errors.
+
+    jobs=N
+      Lint files on N processes; 0 means one for each CPU. The largest files
+      are started first and small files are handed out in batches. Output is
+      still in the order the files were given, and a summary of how busy the
+      workers were follows Total Errors. The default is 1.
+
+    fallback-encoding=name
+      Files are read as UTF-8, or as UTF-16 or UTF-32 when they start with a
+      byte order mark. Files that are not valid UTF-8 are read with this
+      encoding instead; the default is latin-1, which reads any file. A file
+      that can not be read or decoded is reported as a syntax/io error and
+      linting goes on with the next file.
+
+    statistics
+      Print how many errors there are in each category, most first, and the
+      files with the most errors instead of the errors themselves.
+
+    count
+      Print only the number of errors.
+
+    fix
+      Fix trailing whitespace, tabs in indentation, spaces between a command
+      and its (, mismatched spaces inside (), expressions repeated in else(),
+      endif() and the like and the case of commands where it is safe to, in
+      the same pass that finds them. Files are rewritten atomically, only the
+      errors that remain are reported and the number fixed follows Total
+      Errors. Generated files linted with --generated=cheap are not fixed.
+
+    cache-dir=dir
+      Keep the work of reading a file that does not depend on the options,
+      its decoded and cleaned lines, where its commands are and its
+      lint_cmake pragmas, in dir, keyed on a hash of its contents and the
+      version of cmakelint. A file whose contents have been seen before is
+      then only checked, however --filter, --spaces and --linelength have
+      changed. The directory is made if it does not exist and old entries
+      may be deleted at any time.
+
+    dump-ast=file
+      Write the commands of each file linted, with their arguments and the
+      lines they span, and its comments and lint_cmake pragmas to file as
+      JSON, one object per line, from the same parse that the checks use.
+      The layout is cmakelint.tree.SCHEMA and "version" changes with it.
+
+    metrics-file=file
+      Write counts of files, lines, bytes, errors by category and cache hits
+      and histograms of the time taken to find, read, clean and check files
+      to file in the OpenMetrics text format when linting ends.
+
+    metrics-port=N
+      With --lsp, serve the same metrics at http://127.0.0.1:N/metrics while
+      the server runs; 0 picks a free port, which is written to stderr.
+
+    engine=fast|legacy
+      Clean comments and match command parentheses with the original, slower
+      code instead of the faster code that has replaced it, to check that
+      the two report the same errors. The default is fast.
+
+    prefetch=K
+      Read up to K files ahead on background threads while the current file
+      is being linted, which hides read latency on network filesystems.
+      Results are still reported in the order the files were given. The
+      default is 4; use 0 to read each file only when it is linted.
+
+    project=dir
+      Lint the project whose top level CMakeLists.txt is in dir: every file
+      reached from it through add_subdirectory(), include() and
+      find_package() is read and parsed once and linted, and then the
+      project/ checks look for missing files, CMakeLists.txt files that are
+      never added and Find modules that are never used. Files can not also
+      be given on the command line.
+
+    staged
+      Lint the contents of files in the git index instead of the working
+      tree: the files given, or every CMake file staged for commit. Errors
+      are reported against the original paths.
+
+    rev=REF
+      Lint the contents of files at the git revision REF instead of the
+      working tree: the files given, or every CMake file in REF below the
+      current directory. All contents are read through a single git process.
+
+    lsp
+      Run as a Language Server Protocol server on stdin/stdout. Open
+      documents are linted in memory and diagnostics are published shortly
+      after the last edit. Only the commands touched by an edit are re-linted.
+
     version
       Show the version number and end
 """
@@ -73,10 +233,27 @@ _ERROR_CATEGORIES = """\
         linelength
         package/consistency
         package/stdargs
+        performance/findpackage
+        performance/glob
+        performance/loop
+        performance/variables
+        project/missing
+        project/unreached
+        project/unusedmodule
+        readability/functionsize
         readability/logic
         readability/mixedcase
+        readability/nesting
+        readability/unusedvar
+        readability/usebeforeset
         readability/wonkycase
         syntax
+        syntax/blocks
+        syntax/internal
+        syntax/io
+        syntax/keyword
+        syntax/unknowncommand
+        whitespace/blockindent
         whitespace/eol
         whitespace/extra
         whitespace/indent
@@ -84,7 +261,56 @@ _ERROR_CATEGORIES = """\
         whitespace/newline
         whitespace/tabs
 """
+# categories that are only reported when a filter turns them on
+_DEFAULT_OFF_CATEGORIES = frozenset([
+    'readability/functionsize',
+    'readability/nesting',
+    'readability/unusedvar',
+    'readability/usebeforeset',
+    'syntax/keyword',
+    'syntax/unknowncommand',
+    'whitespace/blockindent',
+])
 _DEFAULT_FILENAME = 'CMakeLists.txt'
+_BLOCK_ENDS = {
+    'block': 'endblock',
+    'foreach': 'endforeach',
+    'function': 'endfunction',
+    'if': 'endif',
+    'macro': 'endmacro',
+    'while': 'endwhile',
+}
+_BLOCK_STARTS = dict((end, start) for start, end in _BLOCK_ENDS.items())
+# list() sub-commands that modify the list named by their first argument,
+# and those that store a result in the variable named by their last one
+_LIST_MODIFIERS = frozenset([
+    'APPEND', 'FILTER', 'INSERT', 'POP_BACK', 'POP_FRONT', 'PREPEND',
+    'REMOVE_AT', 'REMOVE_DUPLICATES', 'REMOVE_ITEM', 'REVERSE', 'SORT',
+    'TRANSFORM',
+])
+_LIST_QUERIES = frozenset(['FIND', 'GET', 'JOIN', 'LENGTH', 'SUBLIST'])
+# shorter names are too easily one typo away from something unrelated
+_MIN_SUGGESTION_LENGTH = 4
+_MAX_BLOCK_DEPTH = 5
+_MAX_FUNCTION_LINES = 200
+_GENERATED_SNIFF_BYTES = 512
+_LINT_PRAGMA = '# lint_cmake: '
+# byte order marks and the encodings they stand for; the UTF-32 ones start
+# with the UTF-16 ones so have to come first
+_BOMS = ((b'\xef\xbb\xbf', 'utf-8'), (b'\xff\xfe\x00\x00', 'utf-32-le'),
+         (b'\x00\x00\xfe\xff', 'utf-32-be'), (b'\xff\xfe', 'utf-16-le'),
+         (b'\xfe\xff', 'utf-16-be'))
+_ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz',
+                     '.txz', '.zip')
+_GENERATED_MODES = ('lint', 'cheap', 'skip')
+_ENGINES = ('fast', 'legacy')
+_STATISTICS_FILES = 10
+_SKIP_REASONS = [
+    ('size', 'over --max-file-size'),
+    ('generated', 'generated'),
+    ('time', 'over --max-file-time'),
+    ('missing', 'not found in git'),
+]
 
 def DefaultRC():
     """
@@ -101,17 +327,86 @@ def DefaultRC():
         return xdgfile
     return os.path.join(os.path.expanduser('~'), '.cmakelintrc')
 
-_DEFAULT_CMAKELINTRC = DefaultRC()
+def _NonNegative(value):
+    value = int(value)
+    if value < 0:
+        raise ValueError('%d is negative' % value)
+    return value
+
+class _ErrorLimitReached(Exception):
+    """
+    Raised by Error for an error that comes after --max-errors or
+    --max-file-errors has been reached, which is left out; per_file tells
+    whether only the current file should stop
+    """
+    def __init__(self, per_file):
+        Exception.__init__(self)
+        self.per_file = per_file
+
+class _FileTimeExceeded(Exception):
+    """
+    Raised by ProcessFileData when a file runs over --max-file-time
+    """
+
+class _FatalError(Exception):
+    """
+    Raised when linting can not go on, such as when git fails; the message is
+    reported as a FATAL ERROR
+    """
 
 class _CMakeLintState(object):
     def __init__(self):
         self.filters = []
         self.config = 0
+        self.overrides = None
         self.errors = 0
         self.spaces = 2
         self.linelength = 80
         self.allowed_categories = _ERROR_CATEGORIES.split()
         self.quiet = False
+        self.lsp = False
+        self.project = None
+        self.staged = False
+        self.rev = None
+        self.jobs = 1
+        self.engine = 'fast'
+        self.statistics = None
+        self.counts = {}
+        self.metrics = None
+        self.metrics_file = None
+        self.metrics_port = None
+        self.report = None
+        self.prefetch = 4
+        self.stdout = None
+        self.stderr = None
+        self.max_errors = 0
+        self.max_file_errors = 0
+        self.file_errors = 0
+        self.truncated = False
+        self.truncated_files = 0
+        self.content_cache = {}
+        self.fix = False
+        self.fixed = 0
+        self.fixes = {}
+        self.dump_ast = None
+        self.dump = None
+        self.max_file_size = 0
+        self.max_file_time = 0
+        self.deadline = None
+        self.generated = 'lint'
+        self.fallback_encoding = 'latin-1'
+        self.cache_dir = None
+        self.skipped = {}
+
+    def Stdout(self):
+        if self.stdout is None:
+            return sys.stdout
+        return self.stdout
+
+    def Stderr(self):
+        if self.stderr is None:
+            return sys.stderr
+        return self.stderr
 
     def SetFilters(self, filters):
         if not filters:
@@ -123,7 +418,10 @@ class _CMakeLintState(object):
             self.filters.extend([f.strip() for f in filters.split(',') if f])
         else:
             raise ValueError('Filters should be a list or a comma separated string')
-        for f in self.filters:
+        self.CheckFilters(self.filters)
+
+    def CheckFilters(self, filters):
+        for f in filters:
             if f.startswith('-') or f.startswith('+'):
                 allowed = False
                 for c in self.allowed_categories:
@@ -143,9 +441,111 @@ class _CMakeLintState(object):
     def SetLineLength(self, linelength):
         self.linelength = int(linelength)
 
+    def SetFallbackEncoding(self, encoding):
+        import codecs
+        try:
+            info = codecs.lookup(encoding)
+            # hex, rot13, zlib and the like are codecs but not text encodings
+            if not getattr(info, '_is_text_encoding', True):
+                raise LookupError(encoding)
+        except LookupError:
+            raise ValueError('Unknown encoding: %s' % encoding)
+        self.fallback_encoding = info.name
+
+    def SetMaxErrors(self, max_errors):
+        self.max_errors = _NonNegative(max_errors)
+
+    def SetMaxFileErrors(self, max_file_errors):
+        self.max_file_errors = _NonNegative(max_file_errors)
+
+    def CheckErrorLimits(self):
+        """
+        Called before an error is reported. The output only counts as
+        truncated once an error is actually left out, not as soon as the
+        limit is reached.
+        """
+        if self.max_errors and self.errors >= self.max_errors:
+            self.truncated = True
+            raise _ErrorLimitReached(False)
+        if self.max_file_errors and self.file_errors >= self.max_file_errors:
+            self.truncated_files += 1
+            raise _ErrorLimitReached(True)
+
+    def TruncationNote(self):
+        if self.truncated:
+            return ' (output truncated after %d errors)' % self.max_errors
+        if self.truncated_files:
+            return (' (output truncated for %d files after %d errors each)' %
+                    (self.truncated_files, self.max_file_errors))
+        return ''
+
+    def SetMaxFileSize(self, max_file_size):
+        self.max_file_size = _NonNegative(max_file_size)
+
+    def SetMaxFileTime(self, max_file_time):
+        max_file_time = float(max_file_time)
+        if max_file_time < 0:
+            raise ValueError('%s is negative' % max_file_time)
+        self.max_file_time = max_file_time
+
+    def SetGenerated(self, generated):
+        if generated not in _GENERATED_MODES:
+            raise ValueError('generated should be one of %s' %
+                             ', '.join(_GENERATED_MODES))
+        self.generated = generated
+
+    def SetStatistics(self, statistics):
+        if self.statistics not in (None, statistics):
+            raise ValueError('--statistics and --count can not be used together')
+        self.statistics = statistics
+
+    def Statistics(self):
+        """
+        What --count or --statistics prints in place of the errors: the number
+        of errors, or the errors in each category and the files with the most
+        """
+        if self.statistics == 'count':
+            return '%d\n' % self.errors
+        categories = {}
+        files = {}
+        for (filename, category), count in self.counts.items():
+            categories[category] = categories.get(category, 0) + count
+            files[filename] = files.get(filename, 0) + count
+        lines = ['%7d %s' % (count, category) for category, count in
+                 sorted(categories.items(), key=lambda item: (-item[1], item[0]))]
+        top = sorted(files.items(), key=lambda item: (-item[1], item[0]))
+        if top:
+            lines.append('Files with the most errors:')
+            lines.extend('%7d %s' % (count, filename)
+                         for filename, count in top[:_STATISTICS_FILES])
+        return ''.join(line + '\n' for line in lines)
+
+    def SetEngine(self, engine):
+        if engine not in _ENGINES:
+            raise ValueError('engine should be one of %s' % ', '.join(_ENGINES))
+        self.engine = engine
+
+    def Skip(self, reason):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def SkipSummary(self):
+        counts = ['%d %s' % (self.skipped[reason], description)
+                  for reason, description in _SKIP_REASONS
+                  if self.skipped.get(reason)]
+        if not counts:
+            return ''
+        return 'Skipped Files: %d (%s)\n' % (
+            sum(self.skipped.values()), ', '.join(counts))
+
+    def SetPrefetch(self, prefetch):
+        self.prefetch = _NonNegative(prefetch)
+
+    def SetJobs(self, jobs):
+        jobs = _NonNegative(jobs)
+        self.jobs = jobs or os.cpu_count() or 1
+
 class _CMakePackageState(object):
     def __init__(self):
-        self.sets = []
         self.have_included_stdargs = False
         self.have_used_stdargs = False
 
@@ -154,7 +554,7 @@ class _CMakePackageState(object):
 
     def _GetExpected(self, filename):
         package = os.path.basename(filename)
-        package = re.sub(r'^Find(.*)\.cmake', lambda m: m.group(1), package)
+        package = _RE_FIND_MODULE.sub(lambda m: m.group(1), package)
         return package.upper()
 
     def Done(self, filename, errors):
@@ -194,58 +594,111 @@ class _CMakePackageState(object):
         if var == 'FindPackageHandleStandardArgs':
             self.have_included_stdargs = True
 
-    def Set(self, var):
-        self.sets.append(var)
-
 _lint_state = _CMakeLintState()
+_fast_engine = sys.modules[__name__]
+
+def _Engine():
+    """
+    The module whose CleanComments, GetSpacesBeforeEnd and GetRepeatedLogic
+    the checks use: this one, or cmakelint.legacy for --engine=legacy
+    """
+    if _lint_state.engine == 'fast':
+        return _fast_engine
+    import cmakelint.legacy
+    return cmakelint.legacy
 _package_state = _CMakePackageState()
 
-def CleanComments(line, quote=False):
+def CleanComments(line, quote=False, keep_quoted=False):
     """
     quote means 'was in a quote starting this line' so that
-    quoted lines can be eaten/removed.
+    quoted lines can be eaten/removed. keep_quoted only removes comments,
+    leaving the text of quoted arguments in place.
     """
     if line.find('#') == -1 and line.find('"') == -1:
-        if quote:
+        if quote and not keep_quoted:
             return '', quote
         else:
             return line, quote
-    # else have to check for comment
+    # else have to check for comment. Jump from one quote or # to the next
+    # rather than looking at each character so that the work stays linear in
+    # the length of the line. Escaped quotes neither start nor end a quote
+    # and are dropped.
     prior = []
-    prev = ''
-    for char in line:
-        try:
-            if char == '"':
-                if prev != '\\':
-                    quote = not quote
-                    prior.append(char)
-                continue
-            elif char == '#' and not quote:
+    pos = 0
+    length = len(line)
+    while pos < length:
+        if quote:
+            end = line.find('"', pos)
+            while end > 0 and line[end - 1] == '\\':
+                end = line.find('"', end + 1)
+            if end == -1:
+                if keep_quoted:
+                    prior.append(line[pos:])
                 break
-            if not quote:
-                prior.append(char)
-        finally:
-            prev = char
+            prior.append(line[pos:end + 1] if keep_quoted else '"')
+            quote = False
+            pos = end + 1
+            continue
+        match = _RE_COMMENT_OR_QUOTE.search(line, pos)
+        if match is None:
+            prior.append(line[pos:])
+            break
+        end = match.start()
+        prior.append(line[pos:end])
+        if line[end] == '#':
+            break
+        pos = end + 1
+        if end > 0 and line[end - 1] == '\\':
+            continue
+        prior.append('"')
+        quote = True
 
     # rstrip removes trailing space between end of command and the comment # start
 
     return ''.join(prior).rstrip(), quote
 
 class CleansedLines(object):
-    def __init__(self, lines):
+    def __init__(self, lines, clean=True):
+        """
+        clean=False skips removing comments and quoted text, leaving lines
+        the same as raw_lines, for when only checks on raw_lines are run
+        """
         self.have_seen_uppercase = None
+        self.have_cr = False
+        self.block_index = None
+        self.commands = None
+        self.pragmas = None
         self.raw_lines = lines
+        if not clean:
+            self.lines = lines
+            return
         self.lines = []
         quote = False
+        clean_comments = _Engine().CleanComments
         for line in lines:
-            cleaned, quote = CleanComments(line, quote)
+            cleaned, quote = clean_comments(line, quote)
             self.lines.append(cleaned)
 
     def LineNumbers(self):
         return range(0, len(self.lines))
 
+    def BlockIndex(self):
+        if self.block_index is None:
+            self.block_index = BlockIndex(self.lines, self.commands)
+        return self.block_index
+
+    def Pragmas(self):
+        """
+        The numbers of the raw lines that are lint_cmake pragmas
+        """
+        if self.pragmas is None:
+            self.pragmas = [linenumber for linenumber, line in
+                            enumerate(self.raw_lines)
+                            if line.startswith(_LINT_PRAGMA)]
+        return self.pragmas
+
 def ShouldPrintError(category):
-    should_print = True
+    should_print = category not in _DEFAULT_OFF_CATEGORIES
     for f in _lint_state.filters:
         if f.startswith('-') and category.startswith(f[1:]):
             should_print = False
@@ -253,10 +706,26 @@ def ShouldPrintError(category):
             should_print = True
     return should_print
 
+def _Report(filename, linenumber, category, message):
+    _lint_state.CheckErrorLimits()
+    _lint_state.errors += 1
+    _lint_state.file_errors += 1
+    if _lint_state.metrics is not None:
+        _lint_state.metrics.Add('cmakelint_diagnostics', label=category)
+    if _lint_state.statistics is not None:
+        # only counted; nothing is formatted or written until the end
+        key = (filename, category)
+        _lint_state.counts[key] = _lint_state.counts.get(key, 0) + 1
+    elif _lint_state.report is not None:
+        # a --jobs worker, whose errors are printed by the parent in order
+        _lint_state.report(filename, linenumber, category, message)
+    else:
+        print('%s:%d: %s [%s]' % (filename, linenumber, message, category),
+              file=_lint_state.Stdout())
+
 def Error(filename, linenumber, category, message):
     if ShouldPrintError(category):
-        _lint_state.errors += 1
-        print('%s:%d: %s [%s]' % (filename, linenumber, message, category))
+        _Report(filename, linenumber, category, message)
 
 def CheckLineLength(filename, linenumber, clean_lines, errors):
     """
@@ -314,10 +783,61 @@ def CheckUpperLowerCase(filename, linenumber, clean_lines, errors):
                         'Do not mix upper and lower case commands')
 
 def GetInitialSpaces(line):
-    initial_spaces = 0
-    while initial_spaces < len(line) and line[initial_spaces] == ' ':
-        initial_spaces += 1
-    return initial_spaces
+    return len(line) - len(line.lstrip(' '))
+
+def GetSpacesBeforeEnd(line):
+    r"""
+    The number of whitespace characters before the first ) in line, or -1 if
+    there is no ). This is what searching for (\s*)\) finds, but without the
+    regex engine retrying every start position along a run of whitespace.
+    """
+    end = line.find(')')
+    if end == -1:
+        return -1
+    return end - len(line[:end].rstrip())
+
+def _IsWordChar(char):
+    return char.isalnum() or char == '_'
+
+def GetRepeatedLogic(line):
+    r"""
+    The command of the first "command( expression )" in line, or None if
+    there is none. The result is the same as searching for
+    (\w+)\s*\(\s*\S+[^)]+\) but the time taken is linear in the length of
+    the line, whereas the regex backtracks badly on long lines without a
+    closing parenthesis.
+    """
+    # \S+[^)]+\) matches after the opening parenthesis and any spaces when
+    # the first character is not a space and some later character before the
+    # last ) is not a ) itself; everything up to it is then part of \S+.
+    last_close = line.rfind(')')
+    length = len(line)
+    pos = 0
+    while pos < length:
+        if not _IsWordChar(line[pos]):
+            pos += 1
+            continue
+        start = pos
+        while pos < length and _IsWordChar(line[pos]):
+            pos += 1
+        command_end = pos
+        # a match can not start later in the same word, so resume at its end
+        paren = pos
+        while paren < length and line[paren].isspace():
+            paren += 1
+        if paren == length or line[paren] != '(':
+            continue
+        expression = paren + 1
+        while expression < length and line[expression].isspace():
+            expression += 1
+        if expression == length:
+            continue
+        following = expression + 1
+        while following < last_close:
+            if line[following] != ')':
+                return line[start:command_end]
+            following += 1
+    return None
 
 def CheckCommandSpaces(filename, linenumber, clean_lines, errors):
     """
@@ -335,17 +855,17 @@ def CheckCommandSpaces(filename, linenumber, clean_lines, errors):
         end = None
         while True:
             line = clean_lines.lines[linenumber]
-            end = _RE_COMMAND_END_SPACES.search(line)
-            if end:
+            end = _Engine().GetSpacesBeforeEnd(line)
+            if end != -1:
                 break
             linenumber += 1
             if linenumber >= len(clean_lines.lines):
                 break
-        if linenumber == len(clean_lines.lines) and not end:
+        if linenumber == len(clean_lines.lines) and end == -1:
             errors(filename, initial_linenumber, 'syntax',
                     'Unable to find the end of this command')
-        if end:
-            spaces_before_end = len(end.group(1))
+        if end != -1:
+            spaces_before_end = end
             initial_spaces = GetInitialSpaces(line)
             if initial_linenumber != linenumber and spaces_before_end >= initial_spaces:
                 spaces_before_end -= initial_spaces
@@ -359,13 +879,14 @@ def CheckRepeatLogic(filename, linenumber, clean_lines, errors):
     Check for logic inside else, endif etc
     """
     line = clean_lines.lines[linenumber]
-    for cmd in _logic_commands:
-        if re.search(r'\b%s\b'%cmd, line.lower()):
-            m = _RE_LOGIC_CHECK.search(line)
-            if m:
+    lower = line.lower()
+    for cmd, cmd_regex in _RE_LOGIC_COMMANDS:
+        if cmd_regex.search(lower):
+            command = _Engine().GetRepeatedLogic(line)
+            if command:
                 errors(filename, linenumber, 'readability/logic',
                         'Expression repeated inside %s; '
-                        'better to use only %s()'%(cmd, m.group(1)))
+                        'better to use only %s()'%(cmd, command))
             break
 
 def CheckIndent(filename, linenumber, clean_lines, errors):
@@ -385,6 +906,13 @@ def CheckStyle(filename, linenumber, clean_lines, errors):
     """
     CheckIndent(filename, linenumber, clean_lines, errors)
     CheckCommandSpaces(filename, linenumber, clean_lines, errors)
+    CheckWhitespace(filename, linenumber, clean_lines, errors)
+    CheckRepeatLogic(filename, linenumber, clean_lines, errors)
+
+def CheckWhitespace(filename, linenumber, clean_lines, errors):
+    """
+    No tabs and no whitespace at the end of lines
+    """
     line = clean_lines.raw_lines[linenumber]
     if line.find('\t') != -1:
         errors(filename, linenumber, 'whitespace/tabs', 'Tab found; please use spaces')
@@ -392,10 +920,8 @@ def CheckStyle(filename, linenumber, clean_lines, errors):
     if line and line[-1].isspace():
         errors(filename, linenumber, 'whitespace/eol', 'Line ends in whitespace')
 
-    CheckRepeatLogic(filename, linenumber, clean_lines, errors)
-
 def CheckFileName(filename, errors):
-    name_match = re.match(r'Find(.*)\.cmake', os.path.basename(filename))
+    name_match = _RE_FIND_MODULE.match(os.path.basename(filename))
     if name_match:
         package = name_match.group(1)
         if not package.isupper():
@@ -423,6 +949,26 @@ def GetCommandArgument(linenumber, clean_lines):
         linenumber += 1
     return ''
 
+def GetCommandArguments(linenumber, clean_lines):
+    """
+    The arguments of the command starting on linenumber, split on whitespace.
+    Quoted arguments are "" as their text has been removed from clean_lines.
+    """
+    line = clean_lines.lines[linenumber]
+    start = line.find('(') + 1
+    arguments = []
+    while True:
+        end = line.find(')', start)
+        if end != -1:
+            arguments.extend(line[start:end].split())
+            return arguments
+        arguments.extend(line[start:].split())
+        linenumber += 1
+        if linenumber >= len(clean_lines.lines):
+            return arguments
+        line = clean_lines.lines[linenumber]
+        start = 0
+
 def CheckFindPackage(filename, linenumber, clean_lines, errors):
     cmd = GetCommand(clean_lines.lines[linenumber])
     if cmd:
@@ -433,6 +979,460 @@ def CheckFindPackage(filename, linenumber, clean_lines, errors):
             var_name = GetCommandArgument(linenumber, clean_lines)
             _package_state.HaveUsedStandardArgs(filename, linenumber, var_name, errors)
 
+class _Block(object):
+    """
+    An if(), foreach(), while(), function(), macro() or block() and its
+    matching end command. end is None if the block is never closed.
+    """
+    def __init__(self, command, start, depth, parent):
+        self.command = command
+        self.start = start
+        self.end = None
+        self.depth = depth
+        self.parent = parent
+        self.branches = []
+
+    def InLoop(self):
+        """
+        True if the block is or is inside a loop that runs it repeatedly;
+        a function or macro body only runs when it is called
+        """
+        block = self
+        while block is not None and block.command not in ('function', 'macro'):
+            if block.command in ('foreach', 'while'):
+                return True
+            block = block.parent
+        return False
+
+    def SameBranch(self, first, second):
+        """
+        True if no else() or elseif() of this block lies between two lines
+        """
+        return not any(first < branch < second for branch in self.branches)
+
+class BlockIndex(object):
+    """
+    The nesting of blocks in a file, built in a single pass over the cleaned
+    lines with a stack of the blocks that are open.
+
+    blocks    every block in the order it was opened
+    commands  maps the line of each command to its lower case name
+    depths    maps the line of each command to its nesting depth; else(),
+              elseif() and end commands have the depth of their block
+    enclosing maps the line of each command to the innermost block it is
+              in, or None at the top level of the file
+    problems  (linenumber, message) for unbalanced or mismatched commands
+
+    commands may be given as (linenumber, lower case name) in line order, such
+    as the parse cache keeps, to save finding them in lines again.
+    """
+    def __init__(self, lines, commands=None):
+        self.blocks = []
+        self.commands = {}
+        self.depths = {}
+        self.enclosing = {}
+        self.problems = []
+        stack = []
+        if commands is None:
+            commands = [(linenumber, GetCommand(line).lower())
+                        for linenumber, line in enumerate(lines)]
+        for linenumber, command in commands:
+            if not command:
+                continue
+            self.commands[linenumber] = command
+            depth = len(stack)
+            if command in _BLOCK_ENDS:
+                parent = stack[-1] if stack else None
+                block = _Block(command, linenumber, depth, parent)
+                self.blocks.append(block)
+                stack.append(block)
+            elif command in _BLOCK_STARTS:
+                start = _BLOCK_STARTS[command]
+                if not any(block.command == start for block in stack):
+                    self.problems.append((linenumber,
+                        '%s() without matching %s()' % (command, start)))
+                else:
+                    while stack[-1].command != start:
+                        block = stack.pop()
+                        self.problems.append((block.start,
+                            '%s() is closed by %s() on line %d; expected %s()' %
+                            (block.command, command, linenumber,
+                             _BLOCK_ENDS[block.command])))
+                    block = stack.pop()
+                    block.end = linenumber
+                    depth = block.depth
+            elif command in ('else', 'elseif'):
+                if stack and stack[-1].command == 'if':
+                    depth = stack[-1].depth
+                    stack[-1].branches.append(linenumber)
+                else:
+                    self.problems.append((linenumber,
+                        '%s() outside of an if() block' % command))
+            self.depths[linenumber] = depth
+            self.enclosing[linenumber] = stack[depth - 1] if depth else None
+        for block in stack:
+            self.problems.append((block.start,
+                '%s() is never closed; expected %s()' %
+                (block.command, _BLOCK_ENDS[block.command])))
+        self.problems.sort()
+
+def CheckBlocks(filename, clean_lines, errors):
+    """
+    Checks that need the block structure of the whole file: balanced block
+    commands, indentation by nesting depth and the size of blocks
+    """
+    index = clean_lines.BlockIndex()
+    for linenumber, message in index.problems:
+        errors(filename, linenumber, 'syntax/blocks', message)
+    for linenumber, depth in sorted(index.depths.items()):
+        expected = depth * _lint_state.spaces
+        if GetInitialSpaces(clean_lines.raw_lines[linenumber]) != expected:
+            errors(filename, linenumber, 'whitespace/blockindent',
+                    'Indent by %d spaces at nesting depth %d' % (expected, depth))
+    for block in index.blocks:
+        if block.depth == _MAX_BLOCK_DEPTH:
+            errors(filename, block.start, 'readability/nesting',
+                    'Blocks nested more than %d deep' % _MAX_BLOCK_DEPTH)
+        if (block.command in ('function', 'macro') and block.end is not None
+                and block.end - block.start > _MAX_FUNCTION_LINES):
+            errors(filename, block.start, 'readability/functionsize',
+                    '%s() is %d lines long; keep it under %d' %
+                    (block.command, block.end - block.start,
+                     _MAX_FUNCTION_LINES))
+
+def _CheckGlob(filename, linenumber, clean_lines, arguments, errors):
+    if not arguments or arguments[0] not in ('GLOB', 'GLOB_RECURSE'):
+        return
+    if 'CONFIGURE_DEPENDS' not in arguments:
+        errors(filename, linenumber, 'performance/glob',
+                'Add CONFIGURE_DEPENDS to file(%s) or list the files '
+                'explicitly' % arguments[0])
+    if arguments[0] == 'GLOB_RECURSE':
+        end = linenumber
+        while end < len(clean_lines.lines) - 1 and ')' not in clean_lines.lines[end]:
+            end += 1
+        for raw_line in clean_lines.raw_lines[linenumber:end + 1]:
+            if _RE_GLOB_FROM_ROOT.search(raw_line):
+                errors(filename, linenumber, 'performance/glob',
+                        'file(GLOB_RECURSE) from the top of the source tree '
+                        'walks every directory; glob a subdirectory instead')
+                break
+
+def CheckPerformance(filename, clean_lines, errors):
+    """
+    Check for commands that slow down the configure step: globbing, finding
+    the same package twice, including files or running processes in loops
+    and listing every variable
+    """
+    index = clean_lines.BlockIndex()
+    found_packages = {}
+    for linenumber, command in index.commands.items():
+        if command == 'file':
+            arguments = GetCommandArguments(linenumber, clean_lines)
+            _CheckGlob(filename, linenumber, clean_lines, arguments, errors)
+        elif command == 'find_package':
+            arguments = GetCommandArguments(linenumber, clean_lines)
+            if not arguments or '$' in arguments[0]:
+                continue
+            package = arguments[0]
+            block = index.enclosing[linenumber]
+            for previous, previous_block in found_packages.get(package, []):
+                if _IsRepeated(previous_block, previous, block, linenumber):
+                    errors(filename, linenumber, 'performance/findpackage',
+                            'find_package(%s) was already called on line %d'
+                            % (package, previous))
+                    break
+            found_packages.setdefault(package, []).append((linenumber, block))
+        elif command in ('include', 'execute_process'):
+            block = index.enclosing[linenumber]
+            if block is not None and block.InLoop():
+                errors(filename, linenumber, 'performance/loop',
+                        '%s() inside a loop runs on every iteration' % command)
+        elif command == 'get_cmake_property':
+            if 'VARIABLES' in GetCommandArguments(linenumber, clean_lines)[1:2]:
+                errors(filename, linenumber, 'performance/variables',
+                        'get_cmake_property(VARIABLES) copies every variable '
+                        'in scope; avoid iterating over all of them')
+
+def _IsRepeated(first_block, first, second_block, second):
+    """
+    True if the command on line second always runs after the one on line
+    first has run: first is in a block that encloses second and no else()
+    separates them
+    """
+    block = second_block
+    while block is not first_block:
+        if block is None:
+            return False
+        block = block.parent
+    return first_block is None or first_block.SameBranch(first, second)
+
+class _Scope(object):
+    """
+    The variables of the file or of one function() or macro() body.
+
+    sets         maps a name to the line of the first set(), option() or
+                 list() that defines it in this scope
+    definitions  how many times each name is defined in this scope
+    local        names set in this scope that are not visible outside it
+    references   maps a name to the line and block of its first ${name}
+    linenumbers  the lines in this scope, for counting plain words later
+    """
+    def __init__(self, block):
+        self.block = block
+        self.parameters = set()
+        self.sets = {}
+        self.definitions = {}
+        self.local = set()
+        self.references = {}
+        self.linenumbers = []
+
+    def Define(self, name, linenumber, local):
+        if '$' in name or '"' in name:
+            return
+        self.sets.setdefault(name, linenumber)
+        self.definitions[name] = self.definitions.get(name, 0) + 1
+        if local:
+            self.local.add(name)
+
+    def IsParameter(self, name):
+        if self.block is None:
+            return False
+        return (name in self.parameters or
+                _RE_ARGUMENT_VARIABLE.match(name) is not None)
+
+    def Words(self, lines, names):
+        """
+        The first line on which each of names appears as a plain word, for
+        example as an if() condition, and how many times it appears
+        """
+        first = {}
+        counts = {}
+        for linenumber in self.linenumbers:
+            for word in _RE_WORD.findall(lines[linenumber]):
+                if word in names:
+                    first.setdefault(word, linenumber)
+                    counts[word] = counts.get(word, 0) + 1
+        return first, counts
+
+class SymbolTable(object):
+    """
+    Variables set and referenced in a file, built in one pass over its lines.
+    Each function() and macro() body has its own scope; scopes maps their
+    block, or None for the file itself, to a _Scope.
+    """
+    def __init__(self, clean_lines):
+        index = clean_lines.BlockIndex()
+        opened = dict((block.start, block) for block in index.blocks)
+        self.scopes = {None: _Scope(None)}
+        scope = self.scopes[None]
+        current = None
+        quote = False
+        for linenumber, line in enumerate(clean_lines.raw_lines):
+            code, quote = CleanComments(line, quote, keep_quoted=True)
+            block = current
+            command = index.commands.get(linenumber)
+            if command is not None:
+                block = index.enclosing[linenumber]
+                scope = self.scopes[_FunctionOf(block)]
+                if command in _BLOCK_ENDS:
+                    current = opened[linenumber]
+                elif command not in ('else', 'elseif'):
+                    current = block
+                if command in ('function', 'macro'):
+                    scope = self.scopes[current] = _Scope(current)
+                    scope.parameters.update(
+                        GetCommandArguments(linenumber, clean_lines)[1:])
+                    continue
+                self._Define(scope, command, linenumber, clean_lines)
+            scope.linenumbers.append(linenumber)
+            if '${' not in code:
+                continue
+            for name in _RE_VARIABLE_REFERENCE.findall(code):
+                if name not in scope.references:
+                    scope.references[name] = (linenumber, block)
+
+    def _Define(self, scope, command, linenumber, clean_lines):
+        if command not in ('set', 'option', 'list'):
+            return
+        arguments = GetCommandArguments(linenumber, clean_lines)
+        if command == 'set':
+            if len(arguments) > 1:
+                scope.Define(arguments[0], linenumber,
+                             'PARENT_SCOPE' not in arguments and
+                             'CACHE' not in arguments)
+        elif command == 'option':
+            if arguments:
+                scope.Define(arguments[0], linenumber, False)
+        elif len(arguments) > 1:
+            if arguments[0] in _LIST_MODIFIERS:
+                scope.Define(arguments[1], linenumber, True)
+            elif arguments[0] in _LIST_QUERIES and len(arguments) > 2:
+                scope.Define(arguments[-1], linenumber, True)
+
+def _FunctionOf(block):
+    """
+    The innermost function() or macro() block enclosing block, if any
+    """
+    while block is not None and block.command not in ('function', 'macro'):
+        block = block.parent
+    return block
+
+def _InLoopUntil(block, linenumber):
+    """
+    True if block is inside a loop that has not ended by linenumber, so code
+    before linenumber can run again after it
+    """
+    while block is not None and block.command not in ('function', 'macro'):
+        if block.command in ('foreach', 'while') and (
+                block.end is None or block.end >= linenumber):
+            return True
+        block = block.parent
+    return False
+
+def CheckVariables(filename, clean_lines, errors):
+    """
+    Report variables that are referenced before they are first set in the
+    same scope, and variables that are set inside a function() but never used
+    there. Variables set at the top of a file are often read by other files,
+    so they are never reported as unused.
+    """
+    if not (ShouldPrintError('readability/usebeforeset') or
+            ShouldPrintError('readability/unusedvar')):
+        return
+    symbols = SymbolTable(clean_lines)
+    problems = []
+    for scope in symbols.scopes.values():
+        early = {}
+        for name, (linenumber, block) in scope.references.items():
+            first_set = scope.sets.get(name)
+            if (first_set is not None and linenumber < first_set and
+                    not scope.IsParameter(name) and
+                    not _InLoopUntil(block, first_set)):
+                early[name] = linenumber
+        unused = set()
+        if scope.block is not None and scope.block.command == 'function':
+            unused = scope.local.difference(scope.references)
+        if not early and not unused:
+            continue
+        first, counts = scope.Words(clean_lines.lines,
+                                    unused.union(early))
+        for name, linenumber in early.items():
+            # a plain mention first, as in if(NOT name), may well set it
+            if first.get(name, linenumber) >= linenumber:
+                problems.append((linenumber, 'readability/usebeforeset',
+                                 '%s is used before it is set on line %d' %
+                                 (name, scope.sets[name])))
+        for name in unused:
+            if counts.get(name, 0) <= scope.definitions[name]:
+                problems.append((scope.sets[name], 'readability/unusedvar',
+                                 '%s is set but never used' % name))
+    for linenumber, category, message in sorted(problems):
+        errors(filename, linenumber, category, message)
+
+class _Signatures(object):
+    """
+    The built-in commands and their keywords from cmakelint.signatures, with
+    indexes of the words one deletion away from each name so that a near
+    miss can be found with a few dictionary lookups
+    """
+    def __init__(self):
+        import cmakelint.signatures
+        self.commands = cmakelint.signatures.COMMANDS
+        self.command_deletions = _DeletionIndex(self.commands)
+        self.keyword_deletions = {}
+
+    def SuggestCommand(self, command):
+        return _NearMiss(command, self.commands, self.command_deletions)
+
+    def SuggestKeyword(self, command, word):
+        keywords = self.commands[command]
+        deletions = self.keyword_deletions.get(command)
+        if deletions is None:
+            deletions = self.keyword_deletions[command] = _DeletionIndex(keywords)
+        return _NearMiss(word, keywords, deletions)
+
+_signatures = None
+
+def GetSignatures():
+    """
+    The signature database, loaded the first time it is needed
+    """
+    global _signatures
+    if _signatures is None:
+        _signatures = _Signatures()
+    return _signatures
+
+def _Deletions(word):
+    return [word[:i] + word[i + 1:] for i in range(len(word))]
+
+def _DeletionIndex(words):
+    index = {}
+    for word in sorted(words):
+        if len(word) >= _MIN_SUGGESTION_LENGTH:
+            for deletion in _Deletions(word):
+                index.setdefault(deletion, word)
+    return index
+
+def _NearMiss(word, words, deletions):
+    """
+    A member of words one insertion, deletion, substitution or transposition
+    away from word, or None
+    """
+    if len(word) < _MIN_SUGGESTION_LENGTH:
+        return None
+    if word in deletions:
+        return deletions[word]
+    for deletion in _Deletions(word):
+        if deletion in words and len(deletion) >= _MIN_SUGGESTION_LENGTH:
+            return deletion
+        if deletion in deletions:
+            return deletions[deletion]
+    return None
+
+def _IsKeywordLike(word):
+    return word[0].isalpha() and word.isupper() and word.replace('_', '').isalnum()
+
+def CheckCommands(filename, clean_lines, errors):
+    """
+    Check commands against the built-in ones and their keywords: commands
+    that are neither built in nor defined in the file, and upper case
+    arguments one typo away from a keyword of the command. The first
+    argument, usually a name chosen by the user, is not checked.
+    """
+    check_commands = ShouldPrintError('syntax/unknowncommand')
+    check_keywords = ShouldPrintError('syntax/keyword')
+    if not (check_commands or check_keywords):
+        return
+    signatures = GetSignatures()
+    index = clean_lines.BlockIndex()
+    defined = set()
+    for block in index.blocks:
+        if block.command in ('function', 'macro'):
+            arguments = GetCommandArguments(block.start, clean_lines)
+            if arguments:
+                defined.add(arguments[0].lower())
+    for linenumber, command in index.commands.items():
+        keywords = signatures.commands.get(command)
+        if keywords is None:
+            if check_commands and command not in defined:
+                suggestion = signatures.SuggestCommand(command)
+                message = 'Unknown command %s()' % command
+                if suggestion:
+                    message += '; did you mean %s()?' % suggestion
+                errors(filename, linenumber, 'syntax/unknowncommand', message)
+            continue
+        if not check_keywords or not keywords:
+            continue
+        for word in GetCommandArguments(linenumber, clean_lines)[1:]:
+            if word in keywords or not _IsKeywordLike(word):
+                continue
+            suggestion = signatures.SuggestKeyword(command, word)
+            if suggestion:
+                errors(filename, linenumber, 'syntax/keyword',
+                        'Unknown keyword %s for %s(); did you mean %s?' %
+                        (word, command, suggestion))
+
 def ProcessLine(filename, linenumber, clean_lines, errors):
     """
     Arguments:
@@ -451,75 +1451,469 @@ def ProcessLine(filename, linenumber, clean_lines, errors):
 def IsValidFile(filename):
     return filename.endswith('.cmake') or os.path.basename(filename).lower() == 'cmakelists.txt'
 
-def ProcessFile(filename):
+def IsArchive(filename):
+    return filename.lower().endswith(_ARCHIVE_SUFFIXES)
+
+def ProcessFile(filename, lines=None, cheap=False, clean_lines=None):
     # Store and then restore the filters to prevent pragmas in the file from persisting.
     original_filters = list(_lint_state.filters)
+    original_spaces = _lint_state.spaces
+    original_linelength = _lint_state.linelength
+    _lint_state.file_errors = 0
+    if _lint_state.max_file_time:
+        _lint_state.deadline = time.perf_counter() + _lint_state.max_file_time
     try:
-        return _ProcessFile(filename)
+        if _lint_state.overrides is not None:
+            ApplyOverrides(filename)
+        return _ProcessFile(filename, lines, cheap, clean_lines)
+    except _ErrorLimitReached as ex:
+        if not ex.per_file:
+            raise
+    except _FileTimeExceeded:
+        _lint_state.Skip('time')
     finally:
         _lint_state.filters = original_filters
+        _lint_state.spaces = original_spaces
+        _lint_state.linelength = original_linelength
+        _lint_state.deadline = None
+
+def ApplyOverrides(filename):
+    """
+    Apply the settings of the config file sections whose pattern matches
+    filename on top of the global ones, until ProcessFile restores them
+    """
+    for override in _lint_state.overrides.Resolve(filename):
+        _lint_state.filters.extend(override.filters)
+        if override.spaces is not None:
+            _lint_state.spaces = override.spaces
+        if override.linelength is not None:
+            _lint_state.linelength = override.linelength
+
+def ReadFile(filename):
+    """
+    Read the lines of filename, or return None for files that are not linted
+    """
+    if not IsValidFile(filename):
+        return None
+    with open(filename, 'rb') as f:
+        return DecodeLines(f.read())
+
+class _Source(object):
+    """
+    What ReadSource found: the lines to lint, or the reason the file is
+    skipped, and whether only the cheap checks should be run. For an archive,
+    members yields (filename, _Source) for each CMake file in it instead.
+    error is why a file could not be read or decoded. clean_lines is the
+    result of ParseLines(lines) when the parse cache already had it.
+    """
+    def __init__(self, lines=None, skipped=None, cheap=False, members=None,
+                 error=None, clean_lines=None):
+        self.lines = lines
+        self.clean_lines = clean_lines
+        self.skipped = skipped
+        self.cheap = cheap
+        self.members = members
+        self.error = error
+
+def IsGenerated(head):
+    """
+    Check the first bytes of a file for a generated file marker such as
+    "Generated by" or "DO NOT EDIT"
+    """
+    return _RE_GENERATED.search(head.decode('latin-1')) is not None
+
+def _SniffSource(head):
+    """
+    A _Source without lines that tells from the first bytes of a file whether
+    it is skipped or only gets the cheap checks as a generated file
+    """
+    if IsGenerated(head):
+        if _lint_state.generated == 'skip':
+            return _Source(skipped='generated')
+        return _Source(cheap=True)
+    return _Source()
+
+def ReadSource(filename):
+    """
+    Use the size and the first few hundred bytes of filename to decide
+    whether and how it is linted before reading all of it, then read its
+    bytes once and decode them
+    """
+    if IsArchive(filename):
+        import cmakelint.archive
+        return _Source(members=cmakelint.archive.Members(filename))
+    if not IsValidFile(filename):
+        return _Source()
+    try:
+        if (_lint_state.max_file_size and
+                os.path.getsize(filename) > _lint_state.max_file_size):
+            return _Source(skipped='size')
+        with open(filename, 'rb') as f:
+            data = f.read(_GENERATED_SNIFF_BYTES)
+            if _lint_state.generated == 'skip' and IsGenerated(data):
+                return _Source(skipped='generated')
+            data += f.read()
+    except EnvironmentError as ex:
+        return _Source(error='Can not read file: %s' % (ex.strerror or ex))
+    return SourceFromData(filename, data)
+
+def Sources(filename, source):
+    """
+    (filename, source) for what ReadSource returned, or for each CMake file in
+    it when it is an archive
+    """
+    if source.members is not None:
+        return source.members
+    return [(filename, source)]
+
+def DecodeText(data):
+    """
+    Decode the file contents data and return (text, encoding): by the byte
+    order mark if there is one, which is not part of text, else as UTF-8, which nearly every file is,
+    else with --fallback-encoding. Raises UnicodeError if that fails too.
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return data[len(bom):].decode(encoding), encoding
+    try:
+        return data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        encoding = _lint_state.fallback_encoding
+        return data.decode(encoding), encoding
+
+def DecodeLines(data):
+    """
+    The lines of the file contents data, with \r\n and \r line endings
+    turned into \n
+    """
+    import io
+    text = DecodeText(data)[0]
+    return io.StringIO(text, newline=None).readlines()
+
+def SourceFromData(filename, data):
+    """
+    ReadSource for the contents of filename that are already in memory, such
+    as a blob read from git
+    """
+    if not IsValidFile(filename):
+        return _Source()
+    if _lint_state.max_file_size and len(data) > _lint_state.max_file_size:
+        return _Source(skipped='size')
+    if _lint_state.metrics is not None:
+        _lint_state.metrics.Add('cmakelint_read_bytes', len(data))
+    source = _Source()
+    if _lint_state.generated != 'lint':
+        source = _SniffSource(data[:_GENERATED_SNIFF_BYTES])
+        if source.skipped:
+            return source
+    entry = None
+    if _lint_state.cache_dir is not None and not source.cheap:
+        import cmakelint.parsecache
+        entry = cmakelint.parsecache.EntryPath(_lint_state.cache_dir, data)
+        source.lines, source.clean_lines = cmakelint.parsecache.Get(entry)
+        if source.lines is not None:
+            return source
+    try:
+        source.lines = DecodeLines(data)
+    except (UnicodeError, LookupError) as ex:
+        return _Source(error='Can not decode file: %s' % ex)
+    if entry is not None:
+        source.clean_lines = ParseLines(source.lines)
+        cmakelint.parsecache.Put(entry, source.lines, source.clean_lines)
+    return source
+
+def ReportUnreadable(filename, source):
+    """
+    Report why filename could not be read as an error of the file, so that
+    linting goes on with the next one
+    """
+    _lint_state.file_errors = 0
+    try:
+        Error(filename, 0, 'syntax/io', source.error)
+    except _ErrorLimitReached as ex:
+        if not ex.per_file:
+            raise
+
+def ReadIsolated(read, filename):
+    """
+    read(filename), with anything but a fatal error turned into a _Source
+    with an error so that a failure reading one file does not stop the run
+    """
+    try:
+        return read(filename)
+    except _FatalError:
+        raise
+    except Exception as ex:
+        return _Source(error='Can not read file: %s: %s' %
+                       (type(ex).__name__, ex))
+
+def ReadAhead(items, read, depth):
+    """
+    Yield (item, read(item)) for each of items, strictly in order, while up to
+    depth further items are being read on background threads. A depth of 0
+    reads each item only when it is needed. Exceptions raised by read are
+    raised again when their item is reached.
+    """
+    if depth <= 0:
+        for item in items:
+            yield item, read(item)
+        return
+    import collections
+    import concurrent.futures
+    pending = collections.deque()
+    items = iter(items)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=depth)
+    try:
+        for item in items:
+            pending.append((item, executor.submit(read, item)))
+            if len(pending) > depth:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
 
 def CheckLintPragma(filename, linenumber, line, errors=None):
     # Check this line to see if it is a lint_cmake pragma
-    linter_pragma_start = '# lint_cmake: '
-    if line.startswith(linter_pragma_start):
+    if line.startswith(_LINT_PRAGMA):
         try:
-            _lint_state.SetFilters(line[len(linter_pragma_start):])
+            _lint_state.SetFilters(line[len(_LINT_PRAGMA):])
         except ValueError as ex:
             if errors:
                 errors(filename, linenumber, 'syntax', str(ex))
         except Exception:
             print("Exception occurred while processing '{0}:{1}':"
-                  .format(filename, linenumber))
+                  .format(filename, linenumber), file=_lint_state.Stdout())
 
-def _ProcessFile(filename):
-    lines = ['# Lines start at 1']
-    have_cr = False
+def _ProcessFile(filename, lines=None, cheap=False, clean_lines=None):
     if not IsValidFile(filename):
-        print('Ignoring file: ' + filename)
+        print('Ignoring file: ' + filename, file=_lint_state.Stdout())
         return
-    global _package_state
-    _package_state = _CMakePackageState()
-    for line in open(filename).readlines():
+    if lines is None:
+        lines = ReadFile(filename)
+    if _lint_state.dump is not None:
+        clean_lines = _DumpTree(filename, lines, cheap, clean_lines)
+    metrics = _lint_state.metrics
+    if metrics is not None:
+        metrics.Add('cmakelint_files_linted')
+    key = _ContentKey(filename, lines, cheap)
+    diagnostics = _lint_state.content_cache.get(key)
+    if metrics is not None:
+        metrics.Add('cmakelint_cache_misses' if diagnostics is None else
+                    'cmakelint_cache_hits', label='content')
+    if diagnostics is not None:
+        # A copy of a file that has already been linted
+        if key in _lint_state.fixes:
+            _WriteFixes(filename, *_lint_state.fixes[key])
+        for linenumber, category, message in diagnostics:
+            _Report(filename, linenumber, category, message)
+        return
+    diagnostics = []
+
+    def RecordError(filename, linenumber, category, message):
+        if ShouldPrintError(category):
+            diagnostics.append((linenumber, category, message))
+            _Report(filename, linenumber, category, message)
+    complete = True
+    try:
+        if _lint_state.fix and not cheap and os.path.isfile(filename):
+            for linenumber, category, message in _Fix(filename, lines,
+                                                      clean_lines, key):
+                diagnostics.append((linenumber, category, message))
+                _Report(filename, linenumber, category, message)
+        else:
+            ProcessFileData(filename, lines, RecordError, cheap, clean_lines)
+    except _FileTimeExceeded:
+        # what was found depends on how fast this run was, so copies of the
+        # file are linted again rather than given the errors found so far
+        complete = False
+        raise
+    except (_ErrorLimitReached, _FatalError):
+        raise
+    except Exception as ex:
+        # a bug in a check: keep what was found and go on with the next file
+        RecordError(filename, 0, 'syntax/internal',
+                    'Linting stopped by an internal error: %s: %s' %
+                    (type(ex).__name__, ex))
+    finally:
+        if complete:
+            _lint_state.content_cache[key] = diagnostics
+
+def _DumpTree(filename, lines, cheap, clean_lines):
+    """
+    Pass the command tree of lines to --dump-ast and return the clean_lines to
+    lint them with, so that a file that is linted in full is parsed only once
+    """
+    import cmakelint.tree
+    parsed = clean_lines
+    if parsed is None or cheap:
+        # the cheap checks do not clean the lines, but the tree needs them
+        parsed = ParseLines(lines)
+    _lint_state.dump(cmakelint.tree.Dump(filename, parsed))
+    return clean_lines if cheap else parsed
+
+def _Diagnostics(filename, lines, clean_lines=None):
+    """
+    The (linenumber, category, message) of the errors in lines that would be
+    printed, without reporting them
+    """
+    found = []
+
+    def Collect(filename, linenumber, category, message):
+        if ShouldPrintError(category):
+            found.append((linenumber, category, message))
+    filters = list(_lint_state.filters)
+    try:
+        ProcessFileData(filename, lines, Collect, False, clean_lines)
+    finally:
+        _lint_state.filters = filters
+    return found
+
+def _Fix(filename, lines, clean_lines, key):
+    """
+    Lint lines, rewrite filename with the fixes for what was found and return
+    the errors that remain, which are all that --fix reports
+    """
+    import cmakelint.fix
+    found = _Diagnostics(filename, lines, clean_lines)
+    fixed = cmakelint.fix.FixLines(lines, found)
+    if fixed == lines:
+        return found
+    remaining = _Diagnostics(filename, fixed)
+    left = set(remaining)
+    count = len([diagnostic for diagnostic in found if diagnostic not in left])
+    _lint_state.fixes[key] = (fixed, count)
+    _WriteFixes(filename, fixed, count)
+    return remaining
+
+def _WriteFixes(filename, fixed, count):
+    import cmakelint.fix
+    # not written when the file has changed since it was read
+    if cmakelint.fix.WriteLines(filename, fixed):
+        _lint_state.fixed += count
+
+def _ContentKey(filename, lines, cheap):
+    """
+    Key identifying everything that the diagnostics for a file depend on: its
+    contents, the options in effect and the parts of its name that
+    CheckFileName, IsFindPackage and _CMakePackageState._GetExpected look at
+    """
+    import hashlib
+    digest = hashlib.sha1(
+        ''.join(lines).encode('utf-8', 'surrogateescape')).digest()
+    basename = os.path.basename(filename)
+    return (digest, basename, basename == filename, cheap,
+            tuple(_lint_state.filters), _lint_state.spaces, _lint_state.linelength)
+
+def ParseLines(lines, clean=True):
+    """
+    The CleansedLines for the contents of a file, with the sentinel lines that
+    ProcessFileData expects at either end. have_cr on the result tells whether
+    any of the lines ended in a carriage return.
+    """
+    raw_lines = ['# Lines start at 1']
+    have_cr = False
+    for line in lines:
         line = line.rstrip('\n')
         if line.endswith('\r'):
             have_cr = True
             line = line.rstrip('\r')
-        lines.append(line)
-        CheckLintPragma(filename, len(lines) - 1, line)
-    lines.append('# Lines end here')
+        raw_lines.append(line)
+    raw_lines.append('# Lines end here')
+    clean_lines = CleansedLines(raw_lines, clean)
+    clean_lines.have_cr = have_cr
+    return clean_lines
+
+def ProcessFileData(filename, lines, errors, cheap=False, clean_lines=None):
+    """
+    Arguments:
+      filename    the name of the file, used for reporting and naming checks
+      lines       the contents of the file as a list of lines
+      errors      the error handling function
+      cheap       only run the checks that do not need the file to be parsed
+      clean_lines the result of ParseLines(lines) if the caller already has
+                  it, so that the file is not parsed a second time
+    """
+    metrics = _lint_state.metrics
+    if metrics is not None:
+        start = time.perf_counter()
+    if clean_lines is None:
+        clean_lines = ParseLines(lines, clean=not cheap)
+    else:
+        clean_lines.have_seen_uppercase = None
+    if metrics is None:
+        _CheckFileData(filename, clean_lines, errors, cheap)
+        return
+    checking = time.perf_counter()
+    metrics.Observe('clean', checking - start)
+    metrics.Add('cmakelint_lines', len(clean_lines.raw_lines) - 2)
+    try:
+        _CheckFileData(filename, clean_lines, errors, cheap)
+    finally:
+        metrics.Observe('check', time.perf_counter() - checking)
+
+def _CheckFileData(filename, clean_lines, errors, cheap):
+    raw_lines = clean_lines.raw_lines
+    global _package_state
+    _package_state = _CMakePackageState()
+    for linenumber in clean_lines.Pragmas():
+        CheckLintPragma(filename, linenumber, raw_lines[linenumber])
     # Check file name after reading lines incase of a # lint_cmake: pragma
-    CheckFileName(filename, Error)
-    if have_cr and os.linesep != '\r\n':
-        Error(filename, 0, 'whitespace/newline', 'Unexpected carriage return found; '
+    CheckFileName(filename, errors)
+    if clean_lines.have_cr and os.linesep != '\r\n':
+        errors(filename, 0, 'whitespace/newline', 'Unexpected carriage return found; '
                 'better to use only \\n')
-    clean_lines = CleansedLines(lines)
+    if cheap:
+        for line in clean_lines.LineNumbers():
+            CheckLintPragma(filename, line, raw_lines[line], errors)
+            CheckLineLength(filename, line, clean_lines, errors)
+            CheckWhitespace(filename, line, clean_lines, errors)
+        return
+    deadline = _lint_state.deadline
     for line in clean_lines.LineNumbers():
-        ProcessLine(filename, line, clean_lines, Error)
-    _package_state.Done(filename, Error)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise _FileTimeExceeded()
+        ProcessLine(filename, line, clean_lines, errors)
+    CheckBlocks(filename, clean_lines, errors)
+    CheckPerformance(filename, clean_lines, errors)
+    CheckVariables(filename, clean_lines, errors)
+    CheckCommands(filename, clean_lines, errors)
+    _package_state.Done(filename, errors)
 
 def PrintVersion():
-    sys.stderr.write("cmakelint %s\n" % cmakelint.__version__.VERSION)
+    _lint_state.Stderr().write("cmakelint %s\n" % cmakelint.__version__.VERSION)
     sys.exit(0)
 
 def PrintUsage(message):
-    sys.stderr.write(_USAGE)
+    _lint_state.Stderr().write(_USAGE)
     if message:
-        sys.stderr.write('FATAL ERROR: %s\n' % message)
+        _lint_state.Stderr().write('FATAL ERROR: %s\n' % message)
     sys.exit(32)
 
 def PrintCategories():
-    sys.stderr.write(_ERROR_CATEGORIES)
+    _lint_state.Stderr().write(_ERROR_CATEGORIES)
     sys.exit(0)
 
 def ParseOptionFile(contents, ignore_space):
     filters = None
     spaces = None
     linelength = None
+    overrides = []
     for line in contents:
         line = line.strip()
         if not line or line.startswith('#'):
             continue
+        if line.startswith('[') and line.endswith(']'):
+            import cmakelint.overrides
+            overrides.append(cmakelint.overrides.Override(line[1:-1]))
+            continue
+        if overrides:
+            _ParseOverride(overrides[-1], line, ignore_space)
+            continue
         if line.startswith('filter='):
             filters = line.replace('filter=', '')
         if line.startswith('spaces='):
@@ -533,6 +1927,25 @@ def ParseOptionFile(contents, ignore_space):
         _lint_state.SetSpaces(spaces)
     if linelength is not None:
         _lint_state.SetLineLength(linelength)
+    _lint_state.overrides = None
+    if overrides:
+        _lint_state.overrides = cmakelint.overrides.PathMatcher(overrides)
+
+def _ParseOverride(override, line, ignore_space):
+    """
+    Parse a line of the [pattern] section for override
+    """
+    if line.startswith('filter='):
+        filters = [f.strip() for f in line.replace('filter=', '').split(',') if f]
+        _lint_state.CheckFilters(filters)
+        override.filters.extend(filters)
+    if line.startswith('spaces=') and not ignore_space:
+        override.spaces = int(line.replace('spaces=', '').strip())
+    if line.startswith('linelength='):
+        override.linelength = int(line.replace('linelength=', ''))
+    if line == 'quiet':
+        raise ValueError('quiet can not be used in the [%s] section'
+                         % override.pattern)
 
 
 # See https://stackoverflow.com/a/30299145 - fixes deprecation warning in py 3.4+
@@ -544,14 +1957,20 @@ else:
         return open(filename, 'r', newline=None)
 
 def ParseArgs(argv):
+    import getopt
     try:
         (opts, filenames) = getopt.getopt(argv, '',
                 ['help', 'filter=', 'config=', 'spaces=', 'linelength=',
-                 'quiet', 'version'])
+                 'quiet', 'version', 'lsp', 'prefetch=', 'max-errors=',
+                 'max-file-errors=', 'fail-fast', 'max-file-size=',
+                 'max-file-time=', 'generated=', 'project=', 'staged',
+                 'rev=', 'jobs=', 'engine=', 'statistics', 'count',
+                 'metrics-file=', 'metrics-port=', 'fix',
+                 'fallback-encoding=', 'dump-ast=', 'cache-dir='])
     except getopt.GetoptError:
         PrintUsage('Invalid Arguments')
     filters = ""
-    _lint_state.config = _DEFAULT_CMAKELINTRC
+    have_config = False
     ignore_space = False
     for (opt, val) in opts:
         if opt == '--version':
@@ -563,6 +1982,7 @@ def ParseArgs(argv):
             if not filters:
                 PrintCategories()
         elif opt == '--config':
+            have_config = True
             _lint_state.config = val
             if _lint_state.config == 'None':
                 _lint_state.config = None
@@ -574,11 +1994,96 @@ def ParseArgs(argv):
                 PrintUsage('spaces expects an integer value')
         elif opt == '--quiet':
             _lint_state.quiet = True
+        elif opt == '--lsp':
+            _lint_state.lsp = True
+        elif opt == '--project':
+            if not os.path.isfile(os.path.join(val, _DEFAULT_FILENAME)):
+                PrintUsage('project expects a directory with a %s' %
+                           _DEFAULT_FILENAME)
+            _lint_state.project = val
+        elif opt == '--staged':
+            _lint_state.staged = True
+        elif opt == '--rev':
+            if not val:
+                PrintUsage('rev expects a revision')
+            _lint_state.rev = val
+        elif opt == '--max-errors':
+            try:
+                _lint_state.SetMaxErrors(val)
+            except ValueError:
+                PrintUsage('max-errors expects a non-negative integer value')
+        elif opt == '--max-file-errors':
+            try:
+                _lint_state.SetMaxFileErrors(val)
+            except ValueError:
+                PrintUsage('max-file-errors expects a non-negative integer value')
+        elif opt == '--fail-fast':
+            _lint_state.SetMaxErrors(1)
+        elif opt == '--max-file-size':
+            try:
+                _lint_state.SetMaxFileSize(val)
+            except ValueError:
+                PrintUsage('max-file-size expects a non-negative integer value')
+        elif opt == '--max-file-time':
+            try:
+                _lint_state.SetMaxFileTime(val)
+            except ValueError:
+                PrintUsage('max-file-time expects a non-negative number of seconds')
+        elif opt == '--generated':
+            try:
+                _lint_state.SetGenerated(val)
+            except ValueError as ex:
+                PrintUsage(str(ex))
+        elif opt == '--metrics-file':
+            _lint_state.metrics_file = val
+        elif opt == '--metrics-port':
+            try:
+                _lint_state.metrics_port = _NonNegative(val)
+            except ValueError:
+                PrintUsage('metrics-port expects a non-negative integer value')
+        elif opt == '--fix':
+            _lint_state.fix = True
+        elif opt == '--cache-dir':
+            if not val:
+                PrintUsage('cache-dir expects a directory')
+            _lint_state.cache_dir = val
+        elif opt == '--dump-ast':
+            if not val:
+                PrintUsage('dump-ast expects a file name')
+            _lint_state.dump_ast = val
+        elif opt == '--fallback-encoding':
+            try:
+                _lint_state.SetFallbackEncoding(val)
+            except ValueError as ex:
+                PrintUsage(str(ex))
+        elif opt in ('--statistics', '--count'):
+            try:
+                _lint_state.SetStatistics(opt[2:])
+            except ValueError as ex:
+                PrintUsage(str(ex))
+        elif opt == '--engine':
+            try:
+                _lint_state.SetEngine(val)
+            except ValueError as ex:
+                PrintUsage(str(ex))
+        elif opt == '--jobs':
+            try:
+                _lint_state.SetJobs(val)
+            except ValueError:
+                PrintUsage('jobs expects a non-negative integer value')
+        elif opt == '--prefetch':
+            try:
+                _lint_state.SetPrefetch(val)
+            except ValueError:
+                PrintUsage('prefetch expects a non-negative integer value')
         elif opt == '--linelength':
             try:
                 _lint_state.SetLineLength(val)
             except Exception:
                 PrintUsage('line length expects an integer value')
+    if not have_config:
+        # Looked up only now so that --version and --help skip the probing
+        _lint_state.config = DefaultRC()
     try:
         if _lint_state.config:
             try:
@@ -589,6 +2094,34 @@ def ParseArgs(argv):
     except ValueError as ex:
         PrintUsage(str(ex))
 
+    if _lint_state.metrics_port is not None and not _lint_state.lsp:
+        PrintUsage('metrics-port can only be used with --lsp')
+    if _lint_state.metrics_file or _lint_state.metrics_port is not None:
+        import cmakelint.metrics
+        _lint_state.metrics = cmakelint.metrics.Metrics()
+    if _lint_state.lsp:
+        if _lint_state.fix:
+            PrintUsage('--fix can not be used with --lsp')
+        if _lint_state.dump_ast is not None:
+            PrintUsage('--dump-ast can not be used with --lsp')
+        return filenames
+    if _lint_state.staged and _lint_state.rev is not None:
+        PrintUsage('--staged and --rev can not be used together')
+    if _lint_state.fix and (_lint_state.staged or _lint_state.rev is not None):
+        PrintUsage('--fix only fixes files in the working tree, not in git')
+    if _lint_state.jobs > 1 and (_lint_state.staged or
+                                 _lint_state.rev is not None or
+                                 _lint_state.project is not None):
+        PrintUsage('--jobs can not be used with --project, --staged or --rev')
+    if _lint_state.project is not None:
+        if filenames:
+            PrintUsage('Files can not be given with --project')
+        if _lint_state.staged or _lint_state.rev is not None:
+            PrintUsage('--project reads the working tree, not git')
+        return filenames
+    if _lint_state.staged or _lint_state.rev is not None:
+        # the files are listed from git when none are given
+        return filenames
     if not filenames:
         if os.path.isfile(_DEFAULT_FILENAME):
             filenames = [_DEFAULT_FILENAME]
@@ -596,13 +2129,108 @@ def ParseArgs(argv):
             PrintUsage('No files were specified!')
     return filenames
 
-def main():
-    files = ParseArgs(sys.argv[1:])
-
-    for filename in files:
-        ProcessFile(filename)
+def main(argv=None, stdout=None, stderr=None):
+    """
+    Run cmakelint on the command line arguments argv, sys.argv[1:] by default,
+    and return the exit status. Every call starts from a fresh state, so this
+    can be called repeatedly in one process. Output goes to stdout and stderr,
+    or to sys.stdout and sys.stderr when they are not given.
+    """
+    global _lint_state, _package_state
+    _lint_state = _CMakeLintState()
+    _package_state = _CMakePackageState()
+    _lint_state.stdout = stdout
+    _lint_state.stderr = stderr
+    if argv is None:
+        argv = sys.argv[1:]
+    try:
+        return _Run(argv)
+    except SystemExit as ex:
+        # the Print* functions exit straight away after writing their output
+        if ex.code is None:
+            return 0
+        return ex.code
+    finally:
+        if _lint_state.metrics is not None and _lint_state.metrics_file:
+            _lint_state.metrics.Write(_lint_state.metrics_file)
+
+def _Run(argv):
+    start = time.perf_counter()
+    files = ParseArgs(argv)
+    metrics = _lint_state.metrics
+    if _lint_state.lsp:
+        import cmakelint.lsp
+        if _lint_state.metrics_port is not None:
+            server = cmakelint.metrics.StartServer(metrics,
+                                                   _lint_state.metrics_port)
+            _lint_state.Stderr().write(
+                'cmakelint: metrics at http://127.0.0.1:%d/metrics\n' %
+                server.server_address[1])
+        return cmakelint.lsp.Serve()
+
+    read = ReadSource
+    blobs = None
+    if _lint_state.staged or _lint_state.rev is not None:
+        import cmakelint.git
+        blobs = cmakelint.git.BlobReader(_lint_state.rev)
+        read = blobs.Read
+    reader = None
+    dump = None
+    jobs_summary = ''
+    try:
+        if _lint_state.dump_ast is not None:
+            try:
+                dump = open(_lint_state.dump_ast, 'w', encoding='utf-8')
+            except EnvironmentError as ex:
+                raise _FatalError('Can not write %s: %s' %
+                                  (_lint_state.dump_ast, ex.strerror))
+            _lint_state.dump = lambda text: dump.write(text + '\n')
+        if blobs is not None:
+            files = blobs.Files(files)
+        if metrics is not None:
+            metrics.Observe('discovery', time.perf_counter() - start)
+            read = metrics.Timed('read', read)
+        if _lint_state.project is not None:
+            import cmakelint.project
+            cmakelint.project.LintProject(_lint_state.project)
+        if _lint_state.jobs > 1 and len(files) > 1:
+            import cmakelint.jobs
+            jobs_summary = cmakelint.jobs.LintFiles(files, _lint_state.jobs)
+        else:
+            reader = ReadAhead(files, lambda f: ReadIsolated(read, f),
+                               _lint_state.prefetch)
+            for filename, source in reader:
+                for filename, source in Sources(filename, source):
+                    if source.error is not None:
+                        ReportUnreadable(filename, source)
+                        continue
+                    if source.skipped:
+                        _lint_state.Skip(source.skipped)
+                        continue
+                    ProcessFile(filename, source.lines, source.cheap,
+                                source.clean_lines)
+    except _ErrorLimitReached:
+        pass
+    except _FatalError as ex:
+        _lint_state.Stderr().write('FATAL ERROR: %s\n' % ex)
+        return 32
+    finally:
+        # cancels any reads still queued
+        if reader is not None:
+            reader.close()
+        if blobs is not None:
+            blobs.Close()
+        if dump is not None:
+            dump.close()
+    if _lint_state.statistics is not None:
+        _lint_state.Stdout().write(_lint_state.Statistics())
     if _lint_state.errors > 0 or not _lint_state.quiet:
-        sys.stderr.write("Total Errors: %d\n" % _lint_state.errors)
+        _lint_state.Stderr().write("Total Errors: %d%s\n" % (
+            _lint_state.errors, _lint_state.TruncationNote()))
+        if _lint_state.fix:
+            _lint_state.Stderr().write('Fixed Errors: %d\n' % _lint_state.fixed)
+        _lint_state.Stderr().write(_lint_state.SkipSummary())
+        _lint_state.Stderr().write(jobs_summary)
     if _lint_state.errors > 0:
         return 1
     else:
@@ -0,0 +1,167 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Counters and latency histograms for --metrics-file and --metrics-port, in the
+OpenMetrics text format. Nothing here is imported or measured unless one of
+those options is given.
+"""
+import threading
+import time
+
+# name, help and the name of its label, if any
+COUNTERS = [
+    ('cmakelint_files_linted', 'Files linted', None),
+    ('cmakelint_lines', 'Lines linted', None),
+    ('cmakelint_read_bytes', 'Bytes of CMake source read', None),
+    ('cmakelint_diagnostics', 'Errors reported', 'category'),
+    ('cmakelint_cache_hits', 'Lookups answered from a cache', 'cache'),
+    ('cmakelint_cache_misses', 'Lookups not answered from a cache', 'cache'),
+]
+PHASES = ('discovery', 'read', 'clean', 'check')
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _Escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics(object):
+    """
+    counters maps (name, label value) to a count, the label value being None
+    for counters without a label. histograms maps each phase to its bucket
+    counts followed by the number and the sum of the observations. Updates
+    may come from the --prefetch threads and the metrics server reads them,
+    so all access takes the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def Add(self, name, value=1, label=None):
+        key = (name, label)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def Observe(self, phase, seconds):
+        with self._lock:
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                histogram = self.histograms[phase] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    def Timed(self, phase, function):
+        """
+        function, observing how long each call takes as phase
+        """
+        def Call(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.Observe(phase, time.perf_counter() - start)
+        return Call
+
+    def Take(self):
+        """
+        Return the counters and histograms and start again from nothing, for
+        a --jobs worker to hand what it measured to the parent
+        """
+        with self._lock:
+            taken = (self.counters, self.histograms)
+            self.counters = {}
+            self.histograms = {}
+        return taken
+
+    def Merge(self, taken, skip=()):
+        counters, histograms = taken
+        with self._lock:
+            for key, value in counters.items():
+                if key[0] not in skip:
+                    self.counters[key] = self.counters.get(key, 0) + value
+            for phase, values in histograms.items():
+                histogram = self.histograms.setdefault(
+                    phase, [0] * (len(BUCKETS) + 2))
+                for i, value in enumerate(values):
+                    histogram[i] += value
+
+    def Render(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict((phase, list(values))
+                              for phase, values in self.histograms.items())
+        lines = []
+        for name, description, label in COUNTERS:
+            lines.append('# TYPE %s counter' % name)
+            lines.append('# HELP %s %s.' % (name, description))
+            if label is None:
+                lines.append('%s_total %d' % (name, counters.get((name, None), 0)))
+                continue
+            for (counter, value), count in sorted(counters.items()):
+                if counter == name:
+                    lines.append('%s_total{%s="%s"} %d' %
+                                 (name, label, _Escape(value), count))
+        name = 'cmakelint_phase_seconds'
+        lines.append('# TYPE %s histogram' % name)
+        lines.append('# HELP %s Time taken by each phase of linting a file.'
+                     % name)
+        for phase in PHASES:
+            histogram = histograms.get(phase, [0] * (len(BUCKETS) + 2))
+            for bound, count in zip(BUCKETS, histogram):
+                lines.append('%s_bucket{phase="%s",le="%s"} %d' %
+                             (name, phase, bound, count))
+            lines.append('%s_bucket{phase="%s",le="+Inf"} %d' %
+                         (name, phase, histogram[-2]))
+            lines.append('%s_count{phase="%s"} %d' % (name, phase, histogram[-2]))
+            lines.append('%s_sum{phase="%s"} %r' % (name, phase, histogram[-1]))
+        lines.append('# EOF')
+        return ''.join(line + '\n' for line in lines)
+
+    def Write(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.Render())
+
+
+def StartServer(metrics, port):
+    """
+    Serve metrics at http://127.0.0.1:port/metrics on a background thread and
+    return the server; port 0 picks a free port
+    """
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.Render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
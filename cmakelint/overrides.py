@@ -0,0 +1,173 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The [pattern] sections of a .cmakelintrc, compiled once into a PathMatcher.
+The literal directories that a pattern starts with are a path in a trie and
+only the rest of the pattern is a regex, so finding the sections for a file
+walks down the trie one directory at a time and only tries the patterns
+hanging off the directories that the file is actually in.
+"""
+import os
+import re
+
+_GLOB_CHARS = ('*', '?', '[')
+
+
+class Override(object):
+    """
+    The settings of one [pattern] section; None for spaces and linelength
+    that the section does not set
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.filters = []
+        self.spaces = None
+        self.linelength = None
+
+
+class _Node(object):
+    """
+    A directory of the trie: children by name, and the (index, regex,
+    override) of the patterns whose literal part ends here, regex being None
+    for a pattern that is a plain path
+    """
+
+    def __init__(self):
+        self.children = {}
+        self.patterns = []
+
+
+def _IsGlob(segment):
+    return any(char in segment for char in _GLOB_CHARS)
+
+
+def _TranslateSegment(segment):
+    """
+    The regex for one path segment: * and ? do not match a slash and [...]
+    is a character class, [!...] a negated one
+    """
+    parts = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        i += 1
+        if char == '*':
+            while i < len(segment) and segment[i] == '*':
+                i += 1
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = segment.find(']', i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+                continue
+            chars = segment[i:end]
+            i = end + 1
+            if chars.startswith('!'):
+                chars = '^' + chars[1:]
+            parts.append('[%s]' % chars.replace('\\', '\\\\'))
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+def _Translate(segments):
+    """
+    The compiled regex for what is left of a path below the literal part of
+    a pattern; ** matches any number of directories
+    """
+    parts = []
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == '**':
+            parts.append('.*' if last else '(?:[^/]*/)*')
+            continue
+        parts.append(_TranslateSegment(segment))
+        if not last:
+            parts.append('/')
+    return re.compile(''.join(parts) + r'\Z')
+
+
+def _Segments(pattern):
+    """
+    The segments of a pattern. Like in .gitignore, a pattern without a slash
+    matches a file name in any directory and one ending in a slash matches
+    everything below a directory.
+    """
+    pattern = pattern.strip()
+    if not pattern:
+        raise ValueError('Empty section in the config file')
+    if pattern.startswith('./'):
+        pattern = pattern[2:]
+    if '/' not in pattern:
+        pattern = '**/' + pattern
+    pattern = pattern.lstrip('/')
+    if pattern.endswith('/'):
+        pattern += '**'
+    return [segment for segment in pattern.split('/') if segment]
+
+
+def RelativePath(filename):
+    """
+    filename as the patterns see it: relative to the current directory and
+    with forward slashes
+    """
+    path = os.path.normpath(filename)
+    if os.path.isabs(path):
+        path = os.path.relpath(path)
+    if os.sep != '/':
+        path = path.replace(os.sep, '/')
+    return path
+
+
+class PathMatcher(object):
+    """
+    Finds the sections that apply to a file in O(depth of its path) trie
+    steps, however many sections there are
+    """
+
+    def __init__(self, overrides):
+        self.root = _Node()
+        for index, override in enumerate(overrides):
+            segments = _Segments(override.pattern)
+            node = self.root
+            while segments and not _IsGlob(segments[0]):
+                node = node.children.setdefault(segments.pop(0), _Node())
+            regex = _Translate(segments) if segments else None
+            node.patterns.append((index, regex, override))
+
+    def Resolve(self, filename):
+        """
+        The overrides for filename, in the order of their sections, so that
+        settings from later sections win
+        """
+        segments = RelativePath(filename).split('/')
+        found = []
+        node = self.root
+        depth = 0
+        while node is not None:
+            rest = '/'.join(segments[depth:])
+            for index, regex, override in node.patterns:
+                if regex is None:
+                    if not rest:
+                        found.append((index, override))
+                elif rest and regex.match(rest):
+                    found.append((index, override))
+            if depth == len(segments):
+                break
+            node = node.children.get(segments[depth])
+            depth += 1
+        found.sort(key=lambda item: item[0])
+        return [override for _, override in found]
@@ -0,0 +1,108 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The parse cache of --cache-dir. It keeps what reading a file produces before
+any check runs, which is the same whatever the filters, indentation and line
+length: the decoded lines, the cleaned lines, the commands BlockIndex finds
+and the lines with lint_cmake pragmas. Entries are keyed on the bytes of the
+file and the version of cmakelint, so they never need invalidating, and are
+stored with marshal and zlib, one file each.
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+import zlib
+
+import cmakelint.__version__
+import cmakelint.main
+
+# changes whenever what is stored does
+_FORMAT = b'cmakelint parse cache 1\n'
+
+
+def EntryPath(directory, data):
+    """
+    The file in directory of the entry for the file contents data. The
+    engine and the fallback encoding change how the contents are read, so
+    they are part of the key too.
+    """
+    state = cmakelint.main._lint_state
+    digest = hashlib.sha1(_FORMAT)
+    digest.update(('%s\0%s\0%s\0' % (cmakelint.__version__.VERSION,
+                                     state.engine,
+                                     state.fallback_encoding)).encode('ascii'))
+    digest.update(data)
+    return os.path.join(directory, digest.hexdigest() + '.parse')
+
+
+def _Count(hit):
+    metrics = cmakelint.main._lint_state.metrics
+    if metrics is not None:
+        metrics.Add('cmakelint_cache_hits' if hit else 'cmakelint_cache_misses',
+                    label='disk')
+
+
+def Get(path):
+    """
+    (lines, clean_lines) as DecodeLines and ParseLines gave them for the
+    contents that path is the EntryPath of, or (None, None) if they are not
+    in the cache
+    """
+    try:
+        with open(path, 'rb') as f:
+            stored = f.read()
+        if not stored.startswith(_FORMAT):
+            raise ValueError('not a parse cache entry')
+        lines, cleaned, commands, pragmas = marshal.loads(
+            zlib.decompress(stored[len(_FORMAT):]))
+    except (EnvironmentError, ValueError, EOFError, TypeError, zlib.error):
+        # missing, from another version of Python or damaged: parse again
+        _Count(False)
+        return None, None
+    _Count(True)
+    clean_lines = cmakelint.main.ParseLines(lines, clean=False)
+    raw_lines = clean_lines.raw_lines
+    # lines that cleaning left alone are not stored twice
+    clean_lines.lines = [raw if clean is None else clean
+                         for raw, clean in zip(raw_lines, cleaned)]
+    clean_lines.commands = commands
+    clean_lines.pragmas = pragmas
+    return lines, clean_lines
+
+
+def Put(path, lines, clean_lines):
+    """
+    Store lines, decoded contents, and clean_lines, their CleansedLines, as
+    the entry at path. The entry is written to a temporary file that is renamed
+    into place, so that another run never reads it half written; a cache that
+    can not be written is no worse than none.
+    """
+    raw_lines = clean_lines.raw_lines
+    cleaned = [None if clean == raw else clean
+               for raw, clean in zip(raw_lines, clean_lines.lines)]
+    commands = sorted(clean_lines.BlockIndex().commands.items())
+    stored = _FORMAT + zlib.compress(marshal.dumps(
+        (lines, cleaned, commands, clean_lines.Pragmas())))
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    except EnvironmentError:
+        return
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(stored)
+        os.replace(temporary, path)
+    except EnvironmentError:
+        os.unlink(temporary)
@@ -0,0 +1,370 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Project mode: follow add_subdirectory(), include() and find_package() from a
+root CMakeLists.txt the way CMake would, parsing each file once however many
+times it is reached, and run checks that need more than one file.
+"""
+import os
+
+import cmakelint.main
+
+_PROJECT_FILENAME = 'CMakeLists.txt'
+
+
+class ParsedFile(object):
+    """
+    A file of the project, read and cleaned once. code holds the raw lines
+    without comments but with quoted text, for reading arguments.
+    """
+
+    def __init__(self, filename, source):
+        self.filename = filename
+        self.lines = source.lines
+        self.cheap = source.cheap
+        self.clean_lines = (source.clean_lines or
+                            cmakelint.main.ParseLines(source.lines))
+        code_lines = []
+        quote = False
+        for line in self.clean_lines.raw_lines:
+            code, quote = cmakelint.main.CleanComments(line, quote,
+                                                       keep_quoted=True)
+            code_lines.append(code)
+        self.code = cmakelint.main.CleansedLines(code_lines, clean=False)
+
+    def Arguments(self, linenumber):
+        """
+        The arguments of the command starting on linenumber, with the quotes
+        around quoted arguments removed
+        """
+        return [argument.strip('"') for argument in
+                cmakelint.main.GetCommandArguments(linenumber, self.code)]
+
+
+class ParseCache(object):
+    """
+    Parsed files by real path, so that a module included from many places is
+    read and cleaned only once. reads counts the files actually parsed.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.reads = 0
+
+    def Get(self, filename):
+        """
+        The ParsedFile for filename, or None if it is not a CMake file or was
+        skipped by --max-file-size or --generated=skip
+        """
+        key = os.path.realpath(filename)
+        metrics = cmakelint.main._lint_state.metrics
+        if metrics is not None:
+            metrics.Add('cmakelint_cache_hits' if key in self.files else
+                        'cmakelint_cache_misses', label='parse')
+        if key not in self.files:
+            source = cmakelint.main.ReadSource(filename)
+            if source.error is not None:
+                cmakelint.main.ReportUnreadable(filename, source)
+                self.files[key] = None
+            elif source.skipped:
+                cmakelint.main._lint_state.Skip(source.skipped)
+                self.files[key] = None
+            elif source.lines is None:
+                self.files[key] = None
+            else:
+                self.reads += 1
+                self.files[key] = ParsedFile(filename, source)
+        return self.files[key]
+
+
+class Project(object):
+    """
+    The graph of files reached from root/CMakeLists.txt.
+
+    files        the files reached, in the order CMake would first read them
+    edges        (filename, linenumber, command, target) for each file reached
+                 by add_subdirectory(), include() or find_package()
+    missing      (filename, linenumber, command, target) for targets that do
+                 not exist
+    find_modules maps each Find<Package>.cmake found in the module path to
+                 whether any find_package() used it
+    """
+
+    def __init__(self, root, cache=None):
+        self.root = os.path.normpath(root)
+        self.cache = cache if cache is not None else ParseCache()
+        self.files = []
+        self.edges = []
+        self.missing = []
+        self.module_path = []
+        self.find_modules = {}
+        self._seen = set()
+        self._active = set()
+
+    def Build(self):
+        self._Visit(self.TopLevel(), self.root)
+        return self
+
+    def TopLevel(self):
+        return os.path.normpath(os.path.join(self.root, _PROJECT_FILENAME))
+
+    def _Resolve(self, argument, filename, source_dir):
+        """
+        argument with the variables that name project directories replaced,
+        or None if it still depends on other variables
+        """
+        for name, value in (('CMAKE_CURRENT_SOURCE_DIR', source_dir),
+                            ('CMAKE_CURRENT_LIST_DIR', os.path.dirname(filename)),
+                            ('CMAKE_SOURCE_DIR', self.root),
+                            ('PROJECT_SOURCE_DIR', self.root)):
+            variable = '${%s}' % name
+            if argument.startswith(variable):
+                # the directories are relative to where cmakelint runs, not
+                # to source_dir, when the root was given as a relative path
+                return self._Resolve(value + argument[len(variable):],
+                                     filename, '')
+        if '${' in argument or '$ENV{' in argument:
+            return None
+        return os.path.normpath(os.path.join(source_dir, argument))
+
+    def _Visit(self, filename, source_dir):
+        key = (os.path.realpath(filename), os.path.realpath(source_dir))
+        if key in self._active:
+            # an include cycle; CMake would recurse until it gave up
+            return
+        parsed = self.cache.Get(filename)
+        if parsed is None:
+            return
+        if key[0] not in self._seen:
+            self._seen.add(key[0])
+            self.files.append(parsed)
+        self._active.add(key)
+        try:
+            index = parsed.clean_lines.BlockIndex()
+            for linenumber, command in index.commands.items():
+                if command == 'add_subdirectory':
+                    self._AddSubdirectory(parsed, linenumber, source_dir)
+                elif command == 'include':
+                    self._Include(parsed, linenumber, source_dir)
+                elif command == 'find_package':
+                    self._FindPackage(parsed, linenumber, source_dir)
+                elif command in ('set', 'list'):
+                    self._SetModulePath(parsed, linenumber, command, source_dir)
+        finally:
+            self._active.discard(key)
+
+    def _Follow(self, parsed, linenumber, command, target, source_dir):
+        self.edges.append((parsed.filename, linenumber, command, target))
+        self._Visit(target, source_dir)
+
+    def _AddSubdirectory(self, parsed, linenumber, source_dir):
+        arguments = parsed.Arguments(linenumber)
+        if not arguments:
+            return
+        directory = self._Resolve(arguments[0], parsed.filename, source_dir)
+        if directory is None:
+            return
+        target = os.path.join(directory, _PROJECT_FILENAME)
+        if not os.path.isfile(target):
+            self.missing.append((parsed.filename, linenumber,
+                                 'add_subdirectory', arguments[0]))
+            return
+        self._Follow(parsed, linenumber, 'add_subdirectory', target, directory)
+
+    def _Include(self, parsed, linenumber, source_dir):
+        arguments = parsed.Arguments(linenumber)
+        if not arguments:
+            return
+        name = arguments[0]
+        if '/' not in name and not name.endswith('.cmake'):
+            # a module, looked for in CMAKE_MODULE_PATH and then in the
+            # modules that come with CMake, which are not linted
+            for directory in self.module_path:
+                target = os.path.join(directory, name + '.cmake')
+                if os.path.isfile(target):
+                    self._Follow(parsed, linenumber, 'include', target,
+                                 source_dir)
+                    return
+            return
+        target = self._Resolve(name, parsed.filename, source_dir)
+        if target is None:
+            return
+        if not os.path.isfile(target):
+            if 'OPTIONAL' not in arguments:
+                self.missing.append((parsed.filename, linenumber, 'include',
+                                     name))
+            return
+        self._Follow(parsed, linenumber, 'include', target, source_dir)
+
+    def _FindPackage(self, parsed, linenumber, source_dir):
+        arguments = parsed.Arguments(linenumber)
+        if not arguments or '${' in arguments[0]:
+            return
+        for directory in self.module_path:
+            target = os.path.join(directory, 'Find%s.cmake' % arguments[0])
+            if os.path.isfile(target):
+                self.find_modules[os.path.normpath(target)] = True
+                self._Follow(parsed, linenumber, 'find_package', target,
+                             source_dir)
+                return
+
+    def _SetModulePath(self, parsed, linenumber, command, source_dir):
+        arguments = parsed.Arguments(linenumber)
+        if command == 'set':
+            if not arguments or arguments[0] != 'CMAKE_MODULE_PATH':
+                return
+            values = arguments[1:]
+            # set(CMAKE_MODULE_PATH "${CMAKE_MODULE_PATH};dir") appends too
+            if not any('${CMAKE_MODULE_PATH}' in value for value in values):
+                self.module_path = []
+        else:
+            if (len(arguments) < 2 or arguments[1] != 'CMAKE_MODULE_PATH' or
+                    arguments[0] not in ('APPEND', 'PREPEND', 'INSERT')):
+                return
+            values = arguments[2:]
+            if arguments[0] == 'INSERT':
+                # the first value is the index to insert at
+                index = _Index(values[0]) if values else None
+                values = values[1:]
+        # a quoted argument may hold a whole ; separated list
+        values = [item for value in values for item in value.split(';') if item]
+        directories = []
+        for value in values:
+            if value in ('${CMAKE_MODULE_PATH}', 'PARENT_SCOPE', 'CACHE'):
+                continue
+            directory = self._Resolve(value, parsed.filename, source_dir)
+            if directory is not None and directory not in self.module_path:
+                directories.append(directory)
+                if _IsWithin(directory, self.root):
+                    for filename in _FindModules(directory):
+                        self.find_modules.setdefault(filename, False)
+        if arguments[0] == 'PREPEND':
+            self.module_path[:0] = directories
+        elif arguments[0] == 'INSERT' and index is not None:
+            self.module_path[index:index] = directories
+        else:
+            self.module_path.extend(directories)
+
+    def Unreached(self):
+        """
+        CMakeLists.txt files below the root that nothing adds, skipping
+        hidden directories and build trees
+        """
+        reached = set(os.path.realpath(parsed.filename) for parsed in self.files)
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if 'CMakeCache.txt' in filenames:
+                dirnames[:] = []
+                continue
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            if _PROJECT_FILENAME in filenames:
+                filename = os.path.normpath(
+                    os.path.join(dirpath, _PROJECT_FILENAME))
+                if os.path.realpath(filename) not in reached:
+                    found.append(filename)
+        return found
+
+
+def _Index(value):
+    """
+    The list index value, or None when it is not a literal integer; like in
+    CMake, a negative index counts from the end
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _IsWithin(path, directory):
+    path = os.path.realpath(path)
+    directory = os.path.realpath(directory)
+    return path == directory or path.startswith(directory + os.sep)
+
+
+def _FindModules(directory):
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [os.path.normpath(os.path.join(directory, name)) for name in names
+            if name.startswith('Find') and name.endswith('.cmake')]
+
+
+def CheckProject(project, errors):
+    """
+    Checks that need the whole project: missing and unreached files and Find
+    modules that no find_package() uses
+    """
+    for filename, linenumber, command, target in project.missing:
+        if command == 'add_subdirectory':
+            message = ('add_subdirectory(%s) names a directory without a %s'
+                       % (target, _PROJECT_FILENAME))
+        else:
+            message = 'include(%s) names a file that does not exist' % target
+        errors(filename, linenumber, 'project/missing', message)
+    for filename in project.Unreached():
+        errors(filename, 0, 'project/unreached',
+               'Not added by add_subdirectory() from %s' % project.TopLevel())
+    for filename, used in sorted(project.find_modules.items()):
+        if not used:
+            package = os.path.basename(filename)[len('Find'):-len('.cmake')]
+            errors(filename, 0, 'project/unusedmodule',
+                   'Find module is never used; no find_package(%s)' % package)
+
+
+def LintProject(root):
+    """
+    Lint every file reached from root/CMakeLists.txt once, using the parse
+    from building the graph, then run the checks that need the whole project
+    """
+    project = Project(root).Build()
+    state = cmakelint.main._lint_state
+    counts = {}
+    full = set()
+    for parsed in project.files:
+        truncated = state.truncated_files
+        cmakelint.main.ProcessFile(parsed.filename, parsed.lines, parsed.cheap,
+                                   parsed.clean_lines)
+        key = os.path.normpath(parsed.filename)
+        counts[key] = state.file_errors
+        if state.truncated_files > truncated:
+            full.add(key)
+    CheckProject(project, _ProjectErrors(counts, full))
+    return project
+
+
+def _ProjectErrors(counts, full):
+    """
+    The error function for CheckProject. Its errors come after all the files
+    have been linted, so --max-file-errors is counted for the file each one
+    is about, going on from the errors found when it was linted, instead of
+    for the file linted last. counts holds those errors by file and full
+    the files that have already had an error left out; a file that reaches
+    the limit only stops the errors for that file.
+    """
+    state = cmakelint.main._lint_state
+
+    def ProjectError(filename, linenumber, category, message):
+        key = os.path.normpath(filename)
+        if key in full:
+            return
+        state.file_errors = counts.get(key, 0)
+        try:
+            cmakelint.main.Error(filename, linenumber, category, message)
+        except cmakelint.main._ErrorLimitReached as ex:
+            if not ex.per_file:
+                raise
+            full.add(key)
+        counts[key] = state.file_errors
+    return ProjectError
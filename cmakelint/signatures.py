@@ -0,0 +1,247 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The built-in commands of CMake 3.25.1 and their keywords, made by
+tools/generate_signatures.py. Each line of _DATA is a command followed by its
+keywords. It is only imported when a check that needs it is enabled.
+"""
+VERSION = '3.25.1'
+
+_DATA = """
+add_compile_definitions
+add_compile_options
+add_custom_command APPEND ARGS BYPRODUCTS COMMAND COMMAND_EXPAND_LISTS COMMENT \
+    DEPENDS DEPFILE IMPLICIT_DEPENDS JOB_POOL MAIN_DEPENDENCY OUTPUT \
+    POST_BUILD PRE_BUILD PRE_LINK TARGET USES_TERMINAL VERBATIM \
+    WORKING_DIRECTORY
+add_custom_target ALL BYPRODUCTS COMMAND COMMAND_EXPAND_LISTS COMMENT DEPENDS \
+    JOB_POOL SOURCES USES_TERMINAL VERBATIM WORKING_DIRECTORY
+add_definitions
+add_dependencies
+add_executable ALIAS EXCLUDE_FROM_ALL GLOBAL IMPORTED MACOSX_BUNDLE WIN32
+add_library ALIAS EXCLUDE_FROM_ALL GLOBAL IMPORTED INTERFACE MODULE OBJECT \
+    SHARED STATIC
+add_link_options
+add_subdirectory EXCLUDE_FROM_ALL SYSTEM
+add_test COMMAND COMMAND_EXPAND_LISTS CONFIGURATIONS NAME WORKING_DIRECTORY
+aux_source_directory
+block POLICIES PROPAGATE SCOPE_FOR VARIABLES
+break
+build_command CONFIGURATION PARALLEL_LEVEL PROJECT_NAME TARGET
+build_name
+cmake_host_system_information AVAILABLE_PHYSICAL_MEMORY \
+    AVAILABLE_VIRTUAL_MEMORY BOTH DISTRIB_INFO DISTRIB_PRETTY_NAME DISTRO \
+    ERROR_VARIABLE FQDN HAS_AMD_3DNOW HAS_AMD_3DNOW_PLUS HAS_FPU HAS_IA64 \
+    HAS_MMX HAS_MMX_PLUS HAS_SERIAL_NUMBER HAS_SSE HAS_SSE2 HAS_SSE_FP \
+    HAS_SSE_MMX HOST HOSTNAME IS_64BIT NUMBER_OF_LOGICAL_CORES \
+    NUMBER_OF_PHYSICAL_CORES OS_NAME OS_PLATFORM OS_RELEASE OS_VERSION \
+    PRETTY_NAME PROCESSOR_DESCRIPTION PROCESSOR_NAME PROCESSOR_SERIAL_NUMBER \
+    QUERY RESULT SEPARATOR SUBKEYS TARGET TOTAL_PHYSICAL_MEMORY \
+    TOTAL_VIRTUAL_MEMORY VALUE VALUE_NAMES VIEW WINDOWS_REGISTRY
+cmake_language CALL CANCEL_CALL CODE DEFER DIRECTORY EVAL \
+    FETCHCONTENT_MAKEAVAILABE_SERIAL FETCHCONTENT_MAKEAVAILABLE_SERIAL \
+    FIND_PACKAGE GET_CALL GET_CALL_IDS GET_MESSAGE_LOG_LEVEL \
+    SET_DEPENDENCY_PROVIDER SUPPORTED_METHODS
+cmake_minimum_required FATAL_ERROR VERSION
+cmake_parse_arguments PARSE_ARGV
+cmake_path ABSOLUTE_PATH APPEND APPEND_STRING BASE_DIRECTORY COMPARE CONVERT \
+    EQUAL EXTENSION FILENAME GET HASH HAS_EXTENSION HAS_FILENAME \
+    HAS_PARENT_PATH HAS_RELATIVE_PART HAS_ROOT_DIRECTORY HAS_ROOT_NAME \
+    HAS_ROOT_PATH HAS_STEM IS_ABSOLUTE IS_PREFIX IS_RELATIVE LAST_ONLY \
+    NATIVE_PATH NORMALIZE NORMAL_PATH NOT_EQUAL OUTPUT_VARIABLE PARENT_PATH \
+    RELATIVE_PART RELATIVE_PATH REMOVE_EXTENSION REMOVE_FILENAME \
+    REPLACE_EXTENSION REPLACE_FILENAME ROOT_DIRECTORY ROOT_NAME ROOT_PATH SET \
+    STEM TO_CMAKE_PATH_LIST TO_NATIVE_PATH_LIST
+cmake_policy GET NEW OLD POP PUSH SET VERSION
+configure_file COPYONLY CRLF DOS ESCAPE_QUOTES FILE_PERMISSIONS LF \
+    NEWLINE_STYLE NO_SOURCE_PERMISSIONS ONLY UNIX USE_SOURCE_PERMISSIONS WIN32
+continue
+create_test_sourcelist EXTRA_INCLUDE FUNCTION
+ctest_build APPEND BUILD CAPTURE_CMAKE_ERROR CONFIGURATION FLAGS NUMBER_ERRORS \
+    NUMBER_WARNINGS PARALLEL_LEVEL PROJECT_NAME QUIET RETURN_VALUE TARGET
+ctest_configure APPEND BUILD CAPTURE_CMAKE_ERROR OPTIONS QUIET RETURN_VALUE \
+    SOURCE
+ctest_coverage APPEND BUILD CAPTURE_CMAKE_ERROR LABELS QUIET RETURN_VALUE
+ctest_empty_binary_directory
+ctest_memcheck APPEND BUILD CAPTURE_CMAKE_ERROR DEFECT_COUNT END EXCLUDE \
+    EXCLUDE_FIXTURE EXCLUDE_FIXTURE_CLEANUP EXCLUDE_FIXTURE_SETUP \
+    EXCLUDE_LABEL INCLUDE INCLUDE_LABEL OFF ON OUTPUT_JUNIT PARALLEL_LEVEL \
+    QUIET REPEAT RESOURCE_SPEC_FILE RETURN_VALUE SCHEDULE_RANDOM START \
+    STOP_ON_FAILURE STOP_TIME STRIDE TEST_LOAD
+ctest_read_custom_files
+ctest_run_script NEW_PROCESS RETURN_VALUE
+ctest_sleep
+ctest_start APPEND GROUP QUIET
+ctest_submit BUILD_ID CAPTURE_CMAKE_ERROR CDASH_UPLOAD CDASH_UPLOAD_TYPE FILES \
+    HTTPHEADER PARTS QUIET RETRY_COUNT RETRY_DELAY RETURN_VALUE SUBMIT_URL
+ctest_test APPEND BUILD CAPTURE_CMAKE_ERROR END EXCLUDE EXCLUDE_FIXTURE \
+    EXCLUDE_FIXTURE_CLEANUP EXCLUDE_FIXTURE_SETUP EXCLUDE_LABEL INCLUDE \
+    INCLUDE_LABEL OFF ON OUTPUT_JUNIT PARALLEL_LEVEL QUIET REPEAT \
+    RESOURCE_SPEC_FILE RETURN_VALUE SCHEDULE_RANDOM START STOP_ON_FAILURE \
+    STOP_TIME STRIDE TEST_LOAD
+ctest_update CAPTURE_CMAKE_ERROR QUIET RETURN_VALUE SOURCE
+ctest_upload CAPTURE_CMAKE_ERROR FILES QUIET
+define_property BRIEF_DOCS CACHED_VARIABLE DIRECTORY FULL_DOCS GLOBAL \
+    INHERITED INITIALIZE_FROM_VARIABLE PROPERTY SOURCE TARGET TEST VARIABLE
+else
+elseif
+enable_language OPTIONAL
+enable_testing
+endblock
+endforeach
+endfunction
+endif
+endmacro
+endwhile
+exec_program ARGS OUTPUT_VARIABLE RETURN_VALUE
+execute_process ANY COMMAND COMMAND_ECHO COMMAND_ERROR_IS_FATAL \
+    ECHO_ERROR_VARIABLE ECHO_OUTPUT_VARIABLE ENCODING ERROR_FILE ERROR_QUIET \
+    ERROR_STRIP_TRAILING_WHITESPACE ERROR_VARIABLE INPUT_FILE LAST OUTPUT_FILE \
+    OUTPUT_QUIET OUTPUT_STRIP_TRAILING_WHITESPACE OUTPUT_VARIABLE \
+    RESULTS_VARIABLE RESULT_VARIABLE TIMEOUT WORKING_DIRECTORY
+export ANDROID_MK APPEND CXX_MODULES_DIRECTORY EXPORT \
+    EXPORT_LINK_INTERFACE_LIBRARIES FILE NAMESPACE PACKAGE TARGETS
+export_library_dependencies APPEND
+file APPEND ARCHIVE_CREATE ARCHIVE_EXTRACT BASE_DIRECTORY BUNDLE_EXECUTABLE \
+    CHMOD CHMOD_RECURSE COMPRESSION COMPRESSION_LEVEL CONDITION CONFIGURE \
+    CONFIGURE_DEPENDS CONFLICTING_DEPENDENCIES_PREFIX CONTENT COPY COPY_FILE \
+    COPY_ON_ERROR CREATE_LINK CRLF DESTINATION DIRECTORIES DIRECTORY \
+    DIRECTORY_PERMISSIONS DOS DOWNLOAD ESCAPE_QUOTES EXCLUDE EXECUTABLES \
+    EXPAND_TILDE FILE FILES_MATCHING FILE_PERMISSIONS FOLLOW_SYMLINKS \
+    FOLLOW_SYMLINK_CHAIN FORMAT FUNCTION GENERATE GET_RUNTIME_DEPENDENCIES \
+    GLOB GLOB_RECURSE GUARD HEX INPUT INSTALL LF LIBRARIES LIMIT \
+    LIST_DIRECTORIES LIST_ONLY LOCK MAKE_DIRECTORY MODULES MTIME \
+    NEWLINE_CONSUME NEWLINE_STYLE NO_HEX_CONVERSION NO_REPLACE \
+    NO_SOURCE_PERMISSIONS OFFSET ONLY ONLY_IF_DIFFERENT OUTPUT PATHS PATTERN \
+    PATTERNS PERMISSIONS POST_EXCLUDE_FILES POST_EXCLUDE_REGEXES \
+    POST_INCLUDE_FILES POST_INCLUDE_REGEXES PRE_EXCLUDE_REGEXES \
+    PRE_INCLUDE_REGEXES PROCESS READ READ_SYMLINK REAL_PATH REGEX RELATIVE \
+    RELATIVE_PATH RELEASE REMOVE REMOVE_RECURSE RENAME \
+    RESOLVED_DEPENDENCIES_VAR RESULT RESULT_VARIABLE SIZE STRINGS SYMBOLIC \
+    TARGET TIMEOUT TIMESTAMP TOUCH TOUCH_NOCREATE TO_CMAKE_PATH TO_NATIVE_PATH \
+    UNIX UNRESOLVED_DEPENDENCIES_VAR UPLOAD USE_SOURCE_PERMISSIONS UTC VERBOSE \
+    WIN32 WRITE
+find_file
+find_library
+find_package BOTH BYPASS_PROVIDER COMPONENTS CONFIG CONFIGS EXACT GLOBAL HINTS \
+    HOST MODULE NAMES NO_CMAKE_BUILDS_PATH NO_CMAKE_ENVIRONMENT_PATH \
+    NO_CMAKE_FIND_ROOT_PATH NO_CMAKE_INSTALL_PREFIX NO_CMAKE_PACKAGE_REGISTRY \
+    NO_CMAKE_PATH NO_CMAKE_SYSTEM_PACKAGE_REGISTRY NO_CMAKE_SYSTEM_PATH \
+    NO_DEFAULT_PATH NO_MODULE NO_PACKAGE_ROOT_PATH NO_POLICY_SCOPE \
+    NO_SYSTEM_ENVIRONMENT_PATH ONLY_CMAKE_FIND_ROOT_PATH OPTIONAL_COMPONENTS \
+    PATHS PATH_SUFFIXES QUIET REGISTRY_VIEW REQUIRED TARGET
+find_path
+find_program
+fltk_wrap_ui
+foreach IN ITEMS LISTS RANGE ZIP_LISTS
+function
+get_cmake_property
+get_directory_property DEFINITION DIRECTORY
+get_filename_component BASE_DIR CACHE PROGRAM PROGRAM_ARGS
+get_property BRIEF_DOCS CACHE DEFINED DIRECTORY FULL_DOCS GLOBAL INSTALL \
+    PROPERTY SET SOURCE TARGET TARGET_DIRECTORY TEST VARIABLE
+get_source_file_property DIRECTORY TARGET_DIRECTORY
+get_target_property
+get_test_property VAR
+if
+include NO_POLICY_SCOPE OPTIONAL RESULT_VARIABLE
+include_directories AFTER BEFORE SYSTEM
+include_external_msproject GUID PLATFORM TYPE
+include_guard DIRECTORY GLOBAL
+include_regular_expression
+install ALL_COMPONENTS ARCHIVE BUNDLE CODE COMPONENT CONFIGURATIONS \
+    CXX_MODULES_BMI CXX_MODULES_DIRECTORY DESTINATION DIRECTORIES DIRECTORY \
+    DIRECTORY_PERMISSIONS EXCLUDE EXCLUDE_FROM_ALL EXPORT EXPORT_ANDROID_MK \
+    EXPORT_LINK_INTERFACE_LIBRARIES FILE FILES FILES_MATCHING FILE_PERMISSIONS \
+    FILE_SET FRAMEWORK IMPORTED_RUNTIME_ARTIFACTS INCLUDES LIBRARY \
+    MESSAGE_NEVER NAMELINK_COMPONENT NAMELINK_ONLY NAMELINK_SKIP NAMESPACE \
+    OBJECTS OPTIONAL PATTERN PERMISSIONS POST_EXCLUDE_FILES \
+    POST_EXCLUDE_REGEXES POST_INCLUDE_FILES POST_INCLUDE_REGEXES \
+    PRE_EXCLUDE_REGEXES PRE_INCLUDE_REGEXES PRIVATE_HEADER PROGRAMS \
+    PUBLIC_HEADER REGEX RENAME RESOURCE RUNTIME RUNTIME_DEPENDENCIES \
+    RUNTIME_DEPENDENCY_SET SCRIPT TARGETS TYPE USE_SOURCE_PERMISSIONS
+install_files FILES
+install_programs FILES
+install_targets RUNTIME_DIRECTORY
+link_directories AFTER BEFORE
+link_libraries
+list APPEND AT CASE COMPARE EXCLUDE FILTER FIND FOR GENEX_STRIP GET INCLUDE \
+    INSERT JOIN LENGTH ORDER OUTPUT_VARIABLE POP_BACK POP_FRONT PREPEND REGEX \
+    REMOVE_AT REMOVE_DUPLICATES REMOVE_ITEM REPLACE REVERSE SORT STRIP SUBLIST \
+    TOLOWER TOUPPER TRANSFORM
+load_cache EXCLUDE INCLUDE_INTERNALS READ_WITH_PREFIX
+load_command COMMAND_NAME
+macro
+make_directory
+mark_as_advanced CLEAR FORCE
+math DECIMAL EXPR HEXADECIMAL OUTPUT_FORMAT
+message AUTHOR_WARNING CHECK_FAIL CHECK_PASS CHECK_START DEBUG DEPRECATION \
+    FATAL_ERROR NOTICE SEND_ERROR STATUS TRACE VERBOSE WARNING
+option
+output_required_files
+project DESCRIPTION HOMEPAGE_URL LANGUAGES VERSION
+qt_wrap_cpp
+qt_wrap_ui
+remove VALUE VAR
+remove_definitions
+return PROPAGATE
+separate_arguments NATIVE_COMMAND PROGRAM SEPARATE_ARGS UNIX_COMMAND \
+    WINDOWS_COMMAND
+set BOOL CACHE ENV FILEPATH FORCE INTERNAL PARENT_SCOPE PATH STRING
+set_directory_properties PROPERTIES
+set_property APPEND APPEND_STRING CACHE DIRECTORY GLOBAL INSTALL PROPERTY \
+    SOURCE TARGET TARGET_DIRECTORY TEST
+set_source_files_properties DIRECTORY PROPERTIES TARGET_DIRECTORY
+set_target_properties PROPERTIES
+set_tests_properties PROPERTIES
+site_name
+source_group FILES PREFIX REGULAR_EXPRESSION TREE
+string ALPHABET APPEND ASCII COMPARE CONCAT CONFIGURE EQUAL ERROR_VARIABLE \
+    ESCAPE_QUOTES FIND GENEX_STRIP GET GREATER GREATER_EQUAL HEX JOIN JSON \
+    LENGTH LESS LESS_EQUAL MAKE_C_IDENTIFIER MATCH MATCHALL MD5 MEMBER NAME \
+    NAMESPACE NOTEQUAL ONLY PREPEND RANDOM RANDOM_SEED REGEX REMOVE REPEAT \
+    REPLACE REVERSE SET SHA1 SHA224 SHA256 SHA384 SHA3_224 SHA3_256 SHA3_384 \
+    SHA3_512 SHA512 STRIP SUBSTRING TIMESTAMP TOLOWER TOUPPER TYPE UPPER UTC \
+    UUID
+subdir_depends
+subdirs EXCLUDE_FROM_ALL PREORDER
+target_compile_definitions INTERFACE PRIVATE PUBLIC
+target_compile_features INTERFACE PRIVATE PUBLIC
+target_compile_options BEFORE INTERFACE PRIVATE PUBLIC
+target_include_directories AFTER BEFORE INTERFACE PRIVATE PUBLIC SYSTEM
+target_link_directories BEFORE INTERFACE PRIVATE PUBLIC
+target_link_libraries INTERFACE LINK_INTERFACE_LIBRARIES LINK_PRIVATE \
+    LINK_PUBLIC PRIVATE PUBLIC
+target_link_options BEFORE INTERFACE PRIVATE PUBLIC
+target_precompile_headers INTERFACE PRIVATE PUBLIC REUSE_FROM
+target_sources BASE_DIRS FILES FILE_SET INTERFACE PRIVATE PUBLIC TYPE
+try_compile BINARY_DIR COMPILE_DEFINITIONS COPY_FILE COPY_FILE_ERROR \
+    LINK_LIBRARIES LINK_OPTIONS NO_CACHE OUTPUT_VARIABLE PROJECT SOURCES \
+    SOURCE_DIR SOURCE_FROM_CONTENT SOURCE_FROM_FILE SOURCE_FROM_VAR TARGET
+try_run ARGS COMPILE_DEFINITIONS COMPILE_OUTPUT_VARIABLE COPY_FILE \
+    COPY_FILE_ERROR LINK_LIBRARIES LINK_OPTIONS NO_CACHE OUTPUT_VARIABLE \
+    RUN_OUTPUT_STDERR_VARIABLE RUN_OUTPUT_STDOUT_VARIABLE RUN_OUTPUT_VARIABLE \
+    SOURCES SOURCE_FROM_CONTENT SOURCE_FROM_FILE SOURCE_FROM_VAR \
+    WORKING_DIRECTORY
+unset CACHE ENV PARENT_SCOPE
+use_mangled_mesa OUTPUT_DIRECTORY PATH_TO_MESA
+utility_source
+variable_requires REQUIRED_VARIABLE1 REQUIRED_VARIABLE2 RESULT_VARIABLE \
+    TEST_VARIABLE
+variable_watch
+while
+write_file APPEND
+"""
+
+COMMANDS = dict((line.split()[0], frozenset(line.split()[1:]))
+                for line in _DATA.replace('\\\n', '').splitlines() if line)
@@ -0,0 +1,242 @@
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The commands of a file as plain data, for --dump-ast and cmakelint.api.Parse,
+so that other tools can use what cmakelint has parsed instead of parsing the
+file again. Commands are found where the checks find them, in the cleaned
+lines, and their arguments are then read from the raw lines. The layout is
+described by SCHEMA and only changes together with VERSION.
+"""
+import re
+
+import cmakelint.main
+
+VERSION = 1
+
+_POSITIVE = {'type': 'integer', 'minimum': 1}
+SCHEMA = {
+    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+    'title': 'cmakelint command tree',
+    'type': 'object',
+    'required': ['version', 'file', 'commands', 'comments', 'pragmas'],
+    'additionalProperties': False,
+    'properties': {
+        'version': {'const': VERSION},
+        'file': {'type': 'string'},
+        'commands': {'type': 'array', 'items': {
+            'type': 'object',
+            'required': ['name', 'line', 'end_line', 'depth', 'arguments'],
+            'additionalProperties': False,
+            'properties': {
+                'name': {'type': 'string'},
+                'line': _POSITIVE,
+                # null when the command is never closed
+                'end_line': {'oneOf': [_POSITIVE, {'type': 'null'}]},
+                'depth': {'type': 'integer', 'minimum': 0},
+                'arguments': {'type': 'array', 'items': {
+                    'type': 'object',
+                    'required': ['text', 'kind', 'line'],
+                    'additionalProperties': False,
+                    'properties': {
+                        'text': {'type': 'string'},
+                        'kind': {'enum': ['unquoted', 'quoted', 'bracket']},
+                        'line': _POSITIVE,
+                    },
+                }},
+            },
+        }},
+        'comments': {'type': 'array', 'items': {
+            'type': 'object',
+            'required': ['line', 'text'],
+            'additionalProperties': False,
+            'properties': {'line': _POSITIVE, 'text': {'type': 'string'}},
+        }},
+        'pragmas': {'type': 'array', 'items': {
+            'type': 'object',
+            'required': ['line', 'filters'],
+            'additionalProperties': False,
+            'properties': {
+                'line': _POSITIVE,
+                'filters': {'type': 'array', 'items': {'type': 'string'}},
+            },
+        }},
+    },
+}
+
+_RE_BRACKET_OPEN = re.compile(r'\[(=*)\[')
+_UNQUOTED_END = ' \t()#"'
+
+
+class _Reader(object):
+    """
+    Reads the arguments of a command from the raw lines, from just after its
+    ( to the ) that closes it
+    """
+
+    def __init__(self, raw_lines, linenumber, pos):
+        self.lines = raw_lines
+        # the last line is the sentinel that ParseLines adds
+        self.last = len(raw_lines) - 2
+        self.linenumber = linenumber
+        self.pos = pos
+        self.arguments = []
+
+    def _Add(self, text, kind, linenumber):
+        self.arguments.append({'text': text, 'kind': kind, 'line': linenumber})
+
+    def _Quoted(self):
+        """
+        The text up to the closing quote, which may be on a later line
+        """
+        start = self.linenumber
+        parts = []
+        line = self.lines[self.linenumber]
+        pos = self.pos + 1
+        while True:
+            end = pos
+            while end < len(line) and line[end] != '"':
+                end += 2 if line[end] == '\\' else 1
+            if end < len(line):
+                parts.append(line[pos:end])
+                self.pos = end + 1
+                break
+            parts.append(line[pos:])
+            if self.linenumber == self.last:
+                self.pos = len(line)
+                break
+            self.linenumber += 1
+            line = self.lines[self.linenumber]
+            pos = 0
+        self._Add('\n'.join(parts), 'quoted', start)
+
+    def _Bracket(self, match):
+        start = self.linenumber
+        close = ']%s]' % match.group(1)
+        parts = []
+        line = self.lines[self.linenumber]
+        pos = match.end()
+        while True:
+            end = line.find(close, pos)
+            if end != -1:
+                parts.append(line[pos:end])
+                self.pos = end + len(close)
+                break
+            parts.append(line[pos:])
+            if self.linenumber == self.last:
+                self.pos = len(line)
+                break
+            self.linenumber += 1
+            line = self.lines[self.linenumber]
+            pos = 0
+        self._Add('\n'.join(parts), 'bracket', start)
+
+    def Read(self):
+        """
+        Read the arguments and return the line of the closing ), or None if
+        the file ends first
+        """
+        depth = 1
+        while True:
+            line = self.lines[self.linenumber]
+            if self.pos >= len(line) or line[self.pos] == '#':
+                if self.linenumber == self.last:
+                    return None
+                self.linenumber += 1
+                self.pos = 0
+                continue
+            char = line[self.pos]
+            if char.isspace():
+                self.pos += 1
+            elif char == '"':
+                self._Quoted()
+            elif char == '(':
+                # nested parentheses are arguments of their own, as in if()
+                depth += 1
+                self._Add(char, 'unquoted', self.linenumber)
+                self.pos += 1
+            elif char == ')':
+                depth -= 1
+                self.pos += 1
+                if depth == 0:
+                    return self.linenumber
+                self._Add(char, 'unquoted', self.linenumber)
+            else:
+                match = _RE_BRACKET_OPEN.match(line, self.pos)
+                if match:
+                    self._Bracket(match)
+                    continue
+                end = self.pos
+                while end < len(line) and line[end] not in _UNQUOTED_END:
+                    end += 2 if line[end] == '\\' else 1
+                self._Add(line[self.pos:end], 'unquoted', self.linenumber)
+                self.pos = max(end, self.pos + 1)
+
+
+def _Comment(raw, code):
+    """
+    The comment on a raw line, given the line without it, or None
+    """
+    start = raw.find('#', len(code))
+    if start == -1:
+        return None
+    return raw[start:]
+
+
+def Tree(filename, clean_lines):
+    """
+    The commands, comments and lint_cmake pragmas of a file as a dict laid out
+    as SCHEMA describes, from the CleansedLines the checks use
+    """
+    raw_lines = clean_lines.raw_lines
+    depths = clean_lines.BlockIndex().depths
+    pragma = cmakelint.main._LINT_PRAGMA
+    commands = []
+    comments = []
+    pragmas = []
+    quote = False
+    skip_until = 0
+    for linenumber in range(1, len(raw_lines) - 1):
+        raw = raw_lines[linenumber]
+        code, quote = cmakelint.main.CleanComments(raw, quote, keep_quoted=True)
+        comment = _Comment(raw, code)
+        if comment is not None:
+            comments.append({'line': linenumber, 'text': comment})
+            if raw.startswith(pragma):
+                pragmas.append({'line': linenumber, 'filters': [
+                    f.strip() for f in raw[len(pragma):].split(',') if f.strip()]})
+        if linenumber < skip_until:
+            # a line of the arguments of an earlier command
+            continue
+        match = cmakelint.main.ContainsCommand(clean_lines.lines[linenumber])
+        if not match:
+            continue
+        reader = _Reader(raw_lines, linenumber, match.end())
+        end_line = reader.Read()
+        skip_until = (end_line or len(raw_lines)) + 1
+        commands.append({
+            'name': match.group(1),
+            'line': linenumber,
+            'end_line': end_line,
+            'depth': depths.get(linenumber, 0),
+            'arguments': reader.arguments,
+        })
+    return {'version': VERSION, 'file': filename, 'commands': commands,
+            'comments': comments, 'pragmas': pragmas}
+
+
+def Dump(filename, clean_lines):
+    """
+    Tree as one line of JSON
+    """
+    import json
+    return json.dumps(Tree(filename, clean_lines), separators=(',', ':'))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Adversarial inputs for the per-line matching code. Generated files can have
+single lines with hundreds of thousands of characters, so the work done on a
+line has to stay linear in its length. The time bound is loose enough for
+slow machines but far below what quadratic behaviour costs at this size.
+"""
+import os
+import random
+import time
+import unittest
+
+import cmakelint.legacy
+import cmakelint.main
+
+TIME_BOUND = float(os.environ.get('CMAKELINT_ADVERSARIAL_BOUND', 2.0))
+SIZE = 200000
+
+
+def ErrorSink(unused_filename, unused_linenumber, unused_category, unused_message):
+    pass
+
+
+class EquivalenceTest(unittest.TestCase):
+    ALPHABET = ['a', 'B', '_', '1', ' ', '\t', '(', ')', '"', '\\', '#', '$',
+                '{', '}', 'else', 'endif', 'é', ' ']
+
+    def Lines(self, count):
+        rng = random.Random(2024)
+        for _ in range(count):
+            yield ''.join(rng.choice(self.ALPHABET)
+                          for _ in range(rng.randrange(30)))
+
+    def testGetRepeatedLogic(self):
+        for line in self.Lines(20000):
+            self.assertEqual(cmakelint.legacy.GetRepeatedLogic(line),
+                             cmakelint.main.GetRepeatedLogic(line), repr(line))
+
+    def testGetSpacesBeforeEnd(self):
+        for line in self.Lines(20000):
+            self.assertEqual(cmakelint.legacy.GetSpacesBeforeEnd(line),
+                             cmakelint.main.GetSpacesBeforeEnd(line), repr(line))
+
+    def testCleanComments(self):
+        for line in self.Lines(20000):
+            for quote in (False, True):
+                self.assertEqual(cmakelint.legacy.CleanComments(line, quote),
+                                 cmakelint.main.CleanComments(line, quote),
+                                 repr(line))
+
+
+class LinearTimeTest(unittest.TestCase):
+
+    def setUp(self):
+        cmakelint.main._lint_state.filters = []
+
+    def assertFast(self, code):
+        lines = code.split('\n')
+        start = time.perf_counter()
+        clean_lines = cmakelint.main.CleansedLines(lines)
+        for linenumber in clean_lines.LineNumbers():
+            cmakelint.main.ProcessLine('foo.cmake', linenumber, clean_lines,
+                                       ErrorSink)
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, TIME_BOUND,
+                        'took %.2fs for %r...' % (elapsed, code[:40]))
+
+    def testLogicWithoutClosingParen(self):
+        self.assertFast('else(' + 'a' * SIZE + ' (')
+
+    def testLogicManyWords(self):
+        self.assertFast('endif(' + 'foo (' * (SIZE // 5))
+
+    def testLogicManyParens(self):
+        self.assertFast('else(x' + ')' * SIZE + 'y')
+
+    def testWhitespaceWithoutClosingParen(self):
+        self.assertFast('set(' + ' ' * SIZE)
+        self.assertFast('set(\n' + ' ' * SIZE + 'x\n)')
+
+    def testManyQuotes(self):
+        self.assertFast('set(x ' + '"' * SIZE + ')')
+        self.assertFast('set(x ' + '\\"' * (SIZE // 2) + ' # ")')
+        self.assertFast('set(x ' + '"a#"' * (SIZE // 4) + ')')
+
+    def testLongArgumentList(self):
+        self.assertFast('set(SOURCES ' + ' '.join(
+            'file%d.cpp' % i for i in range(SIZE // 10)) + ')')
+
+
+if __name__ == '__main__':
+    unittest.main()
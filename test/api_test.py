@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+import cmakelint.api
+import cmakelint.main
+
+
+class IterLintTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.files = [self.Write('%d.cmake' % i, 'set(X 1) \n' * (i + 1))
+                      for i in range(6)]
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def Write(self, name, contents):
+        filename = os.path.join(self.root, name)
+        with open(filename, 'w') as f:
+            f.write(contents)
+        return filename
+
+    def Found(self, results):
+        return [(result.filename, result.errors, result.skipped, result.error)
+                for result in results]
+
+    def Expected(self, filenames):
+        return [(filename,
+                 [(line, 'whitespace/eol', 'Line ends in whitespace')
+                  for line in range(1, int(os.path.basename(filename)[0]) + 2)],
+                 None, None) for filename in filenames]
+
+    def testSequential(self):
+        state = cmakelint.main._lint_state
+        results = cmakelint.api.IterLint(self.files)
+        self.assertEqual(self.Expected(self.files), self.Found(results))
+        # neither the state of main() nor its output was touched
+        self.assertIs(state, cmakelint.main._lint_state)
+        self.assertEqual(0, state.errors)
+
+    def testParallel(self):
+        results = cmakelint.api.IterLint(self.files, jobs=2, ordered=True)
+        self.assertEqual(self.Expected(self.files), self.Found(results))
+        results = list(cmakelint.api.IterLint(iter(self.files), jobs=2))
+        self.assertEqual(sorted(self.Expected(self.files)),
+                         sorted(self.Found(results)))
+
+    def testConfig(self):
+        config = self.Write('lintrc', 'filter=-whitespace/eol\n')
+        results = cmakelint.api.IterLint(self.files, config)
+        self.assertEqual([[]] * 6, [result.errors for result in results])
+        results = cmakelint.api.IterLint(self.files, config, jobs=2)
+        self.assertEqual([[]] * 6, [result.errors for result in results])
+
+    def testSkipped(self):
+        archive = os.path.join(self.root, 'a.tar')
+        with tarfile.open(archive, 'w') as f:
+            f.add(self.files[0], 'src/CMakeLists.txt')
+        broken = self.Write('b.zip', 'not a zip')
+        readme = self.Write('README', 'text')
+        results = self.Found(cmakelint.api.IterLint([archive, readme, broken]))
+        self.assertEqual((archive + '/src/CMakeLists.txt',
+                          [(1, 'whitespace/eol', 'Line ends in whitespace')],
+                          None, None), results[0])
+        self.assertEqual((readme, [], 'ignored', None), results[1])
+        self.assertEqual((broken, [(0, 'syntax/io', 'Can not read archive: '
+                                    'File is not a zip file')], None, None),
+                         results[2])
+
+    def testBackpressure(self):
+        taken = []
+
+        def Paths():
+            for filename in self.files:
+                taken.append(filename)
+                yield filename
+        results = cmakelint.api.IterLint(Paths(), jobs=2, ordered=True)
+        next(results)
+        # no more than 2 * jobs files are in hand
+        self.assertLessEqual(len(taken), 5)
+        results.close()
+        self.assertLess(len(taken), len(self.files))
+        del taken[:]
+        next(cmakelint.api.IterLint(Paths()))
+        self.assertEqual(self.files[:1], taken)
+
+    def testDoesNotPrint(self):
+        stdout = io.StringIO()
+        cmakelint.main._lint_state.stdout = stdout
+        try:
+            list(cmakelint.api.IterLint(self.files + [os.path.join(self.root, 'x')]))
+        finally:
+            cmakelint.main._lint_state.stdout = None
+        self.assertEqual('', stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import os
+import tarfile
+import unittest
+import zipfile
+
+import cmakelint.archive
+import cmakelint.main
+from test import cli_test
+
+MEMBERS = [
+    ('src/CMakeLists.txt', 'project(p) \n'),
+    ('src/cmake/util.cmake', 'set(X 1)\n'),
+    ('src/README', 'not cmake \n'),
+    ('src/big.cmake', 'set(X %s)\n' % ('1' * 100)),
+]
+
+
+class ArchiveTest(cli_test.TempDirTest, unittest.TestCase):
+
+    def MakeTar(self, name, mode):
+        filename = os.path.join(self.root, name)
+        with tarfile.open(filename, mode) as archive:
+            directory = tarfile.TarInfo('src')
+            directory.type = tarfile.DIRTYPE
+            archive.addfile(directory)
+            for member, contents in MEMBERS:
+                data = contents.encode('utf-8')
+                info = tarfile.TarInfo(member)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return filename
+
+    def MakeZip(self, name):
+        filename = os.path.join(self.root, name)
+        with zipfile.ZipFile(filename, 'w') as archive:
+            archive.writestr('src/', '')
+            for member, contents in MEMBERS:
+                archive.writestr(member, contents)
+        return filename
+
+    def testMembers(self):
+        for filename in (self.MakeTar('a.tar', 'w'),
+                         self.MakeTar('a.tar.gz', 'w:gz'),
+                         self.MakeTar('a.tar.xz', 'w:xz'),
+                         self.MakeZip('a.zip')):
+            cmakelint.main._lint_state.max_file_size = 0
+            found = [(name, source.lines) for name, source in
+                     cmakelint.archive.Members(filename)]
+            self.assertEqual([
+                (filename + '/src/CMakeLists.txt', ['project(p) \n']),
+                (filename + '/src/cmake/util.cmake', ['set(X 1)\n']),
+                (filename + '/src/big.cmake', [MEMBERS[3][1]]),
+            ], found)
+
+    def testCommandLine(self):
+        filename = self.MakeTar('a.tgz', 'w:gz')
+        status, stdout, stderr = self.Lint('--max-file-size=50', filename)
+        self.assertEqual(1, status)
+        self.assertEqual('%s/src/CMakeLists.txt:1: Line ends in whitespace '
+                         '[whitespace/eol]\n' % filename, stdout)
+        self.assertEqual('Total Errors: 1\n'
+                         'Skipped Files: 1 (1 over --max-file-size)\n', stderr)
+        self.assertEqual(['a.tgz'], os.listdir(self.root))
+
+    def testCorrupt(self):
+        filename = self.Write('bad.tar.gz', b'not an archive')
+        good = self.Write('CMakeLists.txt', 'set(X 1) \n')
+        # reported as an error of the archive, and linting goes on
+        status, stdout, stderr = self.Lint(filename, good)
+        self.assertEqual(1, status)
+        self.assertEqual(
+            '%s:0: Can not read archive: truncated header [syntax/io]\n'
+            '%s:1: Line ends in whitespace [whitespace/eol]\n' % (filename, good),
+            stdout)
+        self.assertEqual('Total Errors: 2\n', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
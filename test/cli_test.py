@@ -1,11 +1,16 @@
 #!/usr/bin/env python
 
+import io
 import os
+import shlex
 import shutil
 import subprocess
 import sys
 import tempfile
 import unittest
+from unittest import mock
+
+import cmakelint.main
 
 BASE_CMD = sys.executable + ' ' + os.path.abspath('./bin/cmakelint ')
 
@@ -32,6 +37,68 @@ def RunShellCommand(cmd, cwd='.'):
     return (proc.returncode, out, err)
 
 
+def RunInProcess(args, cwd='.'):
+    """
+    runs cmakelint.main.main in this interpreter
+    :param args: the command line arguments as a string.
+    :param cwd: from which folder to run.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    oldcwd = os.getcwd()
+    try:
+        os.chdir(cwd)
+        status = cmakelint.main.main(shlex.split(args), stdout, stderr)
+    finally:
+        os.chdir(oldcwd)
+    return (status, stdout.getvalue().encode('utf8'),
+            stderr.getvalue().encode('utf8'))
+
+
+class TempDirTest(object):
+    """
+    Mixed into the tests that lint files they write to a temporary directory,
+    self.root, running cmakelint.main.main in this interpreter. When chdir is
+    set they run in that directory.
+    """
+    chdir = False
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        if self.chdir:
+            self.cwd = os.getcwd()
+            os.chdir(self.root)
+
+    def tearDown(self):
+        if self.chdir:
+            os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    def Write(self, name, contents, newline='\n'):
+        """
+        Write contents, text or bytes, to name below self.root and return its
+        path
+        """
+        filename = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        if isinstance(contents, bytes):
+            with open(filename, 'wb') as f:
+                f.write(contents)
+        else:
+            with open(filename, 'w', newline=newline) as f:
+                f.write(contents)
+        return filename
+
+    def Lint(self, *args):
+        """
+        (status, stdout, stderr) of linting with the command line args
+        """
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = cmakelint.main.main(list(args), stdout, stderr)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+
 class UsageTest(unittest.TestCase):
 
     def testHelp(self):
@@ -40,6 +107,303 @@ class UsageTest(unittest.TestCase):
         self.assertEqual(b'', out)
         self.assertTrue(err.startswith(b'\nSyntax: cmakelint.py'), err)
 
+    def testHelpInProcess(self):
+        (status, out, err) = RunInProcess('--help')
+        self.assertEqual(32, status)
+        self.assertEqual(b'', out)
+        self.assertTrue(err.startswith(b'\nSyntax: cmakelint.py'), err)
+
+    def testVersionInProcess(self):
+        (status, out, err) = RunInProcess('--version')
+        self.assertEqual(0, status)
+        self.assertEqual(b'', out)
+        self.assertTrue(err.startswith(b'cmakelint '), err)
+
+    def testStateIsReset(self):
+        cwd = os.path.join('samples', 'llvm')
+        first = RunInProcess('--filter=-whitespace CMakeLists.txt', cwd)
+        second = RunInProcess('CMakeLists.txt', cwd)
+        self.assertEqual(first, RunInProcess('--filter=-whitespace CMakeLists.txt', cwd))
+        self.assertEqual(second, RunInProcess('CMakeLists.txt', cwd))
+        self.assertNotEqual(first[1], second[1])
+
+
+class ErrorLimitTest(unittest.TestCase):
+    cwd = os.path.join('samples', 'llvm')
+
+    def testMaxErrors(self):
+        (status, out, err) = RunInProcess('--max-errors=3 CMakeLists.txt', self.cwd)
+        self.assertEqual(1, status)
+        self.assertEqual(3, len(out.splitlines()))
+        self.assertEqual(b'Total Errors: 3 (output truncated after 3 errors)\n', err)
+
+    def testFailFast(self):
+        (status, out, err) = RunInProcess(
+            '--fail-fast CMakeLists.txt ../opencv/CMakeLists.txt', self.cwd)
+        self.assertEqual(1, status)
+        self.assertEqual([b"CMakeLists.txt:31: Extra spaces between 'if' and its ()"
+                          b" [whitespace/extra]"], out.splitlines())
+        self.assertEqual(b'Total Errors: 1 (output truncated after 1 errors)\n', err)
+
+    def testMaxFileErrors(self):
+        (status, out, err) = RunInProcess(
+            '--max-file-errors=2 CMakeLists.txt ../opencv/CMakeLists.txt', self.cwd)
+        self.assertEqual(1, status)
+        files = [line.split(b':')[0] for line in out.splitlines()]
+        self.assertEqual([b'CMakeLists.txt'] * 2 + [b'../opencv/CMakeLists.txt'] * 2,
+                         files)
+        self.assertEqual(b'Total Errors: 4 '
+                         b'(output truncated for 2 files after 2 errors each)\n', err)
+
+    def testExactLimit(self):
+        # reaching a limit without leaving anything out is not truncation
+        total = int(RunInProcess('CMakeLists.txt', self.cwd)[2].split()[2])
+        (status, out, err) = RunInProcess(
+            '--max-errors=%d CMakeLists.txt' % total, self.cwd)
+        self.assertEqual(b'Total Errors: %d\n' % total, err)
+        (status, out, err) = RunInProcess(
+            '--max-file-errors=%d CMakeLists.txt' % total, self.cwd)
+        self.assertEqual(b'Total Errors: %d\n' % total, err)
+
+    def testNoLimit(self):
+        (status, out, err) = RunInProcess('--max-errors=0 CMakeLists.txt', self.cwd)
+        self.assertEqual(1, status)
+        self.assertNotIn(b'truncated', err)
+
+
+class StatisticsTest(unittest.TestCase):
+    cwd = os.path.join('samples', 'llvm')
+
+    def testStatistics(self):
+        (status, out, err) = RunInProcess(
+            '--statistics CMakeLists.txt ../opencv/CMakeLists.txt', self.cwd)
+        self.assertEqual(1, status)
+        lines = out.splitlines()
+        self.assertEqual(b'    322 linelength', lines[0])
+        self.assertEqual(b'      1 readability/wonkycase', lines[8])
+        self.assertEqual([b'Files with the most errors:',
+                          b'    502 ../opencv/CMakeLists.txt',
+                          b'    174 CMakeLists.txt'], lines[9:])
+        self.assertEqual(b'Total Errors: 676\n', err)
+        counts = [int(line.split()[0]) for line in lines[:9]]
+        self.assertEqual(sorted(counts, reverse=True), counts)
+        self.assertEqual(676, sum(counts))
+
+    def testCount(self):
+        (status, out, err) = RunInProcess(
+            '--count --max-errors=100 CMakeLists.txt', self.cwd)
+        self.assertEqual(1, status)
+        self.assertEqual(b'100\n', out)
+        self.assertEqual(b'Total Errors: 100 (output truncated after 100 errors)\n',
+                         err)
+        (status, out, err) = RunInProcess('--count --statistics CMakeLists.txt',
+                                          self.cwd)
+        self.assertEqual(32, status)
+
+
+class DuplicateContentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path, text in [('a/CMakeLists.txt', 'project() \n'),
+                           ('b/CMakeLists.txt', 'project() \n'),
+                           ('c/CMakeLists.txt', 'project()\n'),
+                           ('a/FindFoo.cmake', 'set(X )\n'),
+                           ('b/FindFoo.cmake', 'set(X )\n'),
+                           ('b/FindBar.cmake', 'set(X )\n')]:
+            path = os.path.join(self.root, path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testDuplicatesLintedOnce(self):
+        files = ['a/CMakeLists.txt', 'b/CMakeLists.txt', 'c/CMakeLists.txt',
+                 'a/FindFoo.cmake', 'b/FindFoo.cmake', 'b/FindBar.cmake']
+        with mock.patch('cmakelint.main.ProcessFileData',
+                        wraps=cmakelint.main.ProcessFileData) as process:
+            (status, out, err) = RunInProcess(' '.join(files), self.root)
+        # the copies of CMakeLists.txt and FindFoo.cmake are only linted once
+        self.assertEqual(4, process.call_count)
+        self.assertEqual(1, status)
+        self.assertEqual([
+            'a/CMakeLists.txt:1: Line ends in whitespace [whitespace/eol]',
+            'b/CMakeLists.txt:1: Line ends in whitespace [whitespace/eol]',
+            'a/FindFoo.cmake:0: Find modules should use uppercase names; '
+            'consider using FindFOO.cmake [convention/filename]',
+            'a/FindFoo.cmake:1: Mismatching spaces inside () after command '
+            '[whitespace/mismatch]',
+            'a/FindFoo.cmake:0: Package should include '
+            'FindPackageHandleStandardArgs [package/consistency]',
+            'a/FindFoo.cmake:0: Package should use '
+            'FIND_PACKAGE_HANDLE_STANDARD_ARGS [package/consistency]',
+            'b/FindFoo.cmake:0: Find modules should use uppercase names; '
+            'consider using FindFOO.cmake [convention/filename]',
+            'b/FindFoo.cmake:1: Mismatching spaces inside () after command '
+            '[whitespace/mismatch]',
+            'b/FindFoo.cmake:0: Package should include '
+            'FindPackageHandleStandardArgs [package/consistency]',
+            'b/FindFoo.cmake:0: Package should use '
+            'FIND_PACKAGE_HANDLE_STANDARD_ARGS [package/consistency]',
+            'b/FindBar.cmake:0: Find modules should use uppercase names; '
+            'consider using FindBAR.cmake [convention/filename]',
+            'b/FindBar.cmake:1: Mismatching spaces inside () after command '
+            '[whitespace/mismatch]',
+            'b/FindBar.cmake:0: Package should include '
+            'FindPackageHandleStandardArgs [package/consistency]',
+            'b/FindBar.cmake:0: Package should use '
+            'FIND_PACKAGE_HANDLE_STANDARD_ARGS [package/consistency]',
+        ], out.decode('utf8').splitlines())
+        self.assertEqual(b'Total Errors: 14\n', err)
+
+
+class BudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, text in [
+                ('big.cmake', 'set(X  )\n' * 1000),
+                ('gen.cmake', '# Generated by a tool. DO NOT EDIT.\nset(X  ) \n'),
+                ('hand.cmake', 'set(X  ) \n')]:
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testMaxFileSize(self):
+        (status, out, err) = RunInProcess(
+            '--max-file-size=1000 big.cmake hand.cmake', self.root)
+        self.assertEqual(1, status)
+        self.assertNotIn(b'big.cmake', out)
+        self.assertEqual(b'Total Errors: 2\n'
+                         b'Skipped Files: 1 (1 over --max-file-size)\n', err)
+
+    def testGeneratedSkip(self):
+        (status, out, err) = RunInProcess(
+            '--generated=skip gen.cmake hand.cmake', self.root)
+        self.assertNotIn(b'gen.cmake', out)
+        self.assertEqual(b'Total Errors: 2\nSkipped Files: 1 (1 generated)\n', err)
+
+    def testGeneratedCheap(self):
+        (status, out, err) = RunInProcess('--generated=cheap gen.cmake', self.root)
+        self.assertEqual(
+            [b'gen.cmake:2: Line ends in whitespace [whitespace/eol]'],
+            out.splitlines())
+        self.assertEqual(b'Total Errors: 1\n', err)
+
+    def testGeneratedLint(self):
+        (status, out, err) = RunInProcess('gen.cmake', self.root)
+        self.assertEqual(2, len(out.splitlines()))
+
+    def testMaxFileTime(self):
+        (status, out, err) = RunInProcess(
+            '--max-file-time=0.000000001 big.cmake', self.root)
+        self.assertEqual(0, status)
+        self.assertEqual(b'Total Errors: 0\n'
+                         b'Skipped Files: 1 (1 over --max-file-time)\n', err)
+
+    def testMaxFileTimeNotCached(self):
+        for directory in ('a', 'b'):
+            os.mkdir(os.path.join(self.root, directory))
+            shutil.copy(os.path.join(self.root, 'big.cmake'),
+                        os.path.join(self.root, directory, 'big.cmake'))
+        (status, out, err) = RunInProcess(
+            '--max-file-time=0.000000001 a/big.cmake b/big.cmake', self.root)
+        # the copy is linted again, not given what was found before time ran out
+        self.assertEqual(b'Total Errors: 0\n'
+                         b'Skipped Files: 2 (2 over --max-file-time)\n', err)
+
+    def testBadValues(self):
+        for args in ['--generated=maybe', '--max-file-size=x', '--max-file-time=-1']:
+            (status, out, err) = RunInProcess(args + ' hand.cmake', self.root)
+            self.assertEqual(32, status)
+
+
+class DecodingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, data in [
+                ('latin1.cmake', u'set(X "caf\xe9") \n'.encode('latin-1')),
+                ('bom.cmake', b'\xef\xbb\xbfSet(X 1)\n'),
+                ('utf16.cmake', u'Set(X 1)\r\n'.encode('utf-16')),
+                ('hand.cmake', b'set(X 1) \n')]:
+            with open(os.path.join(self.root, name), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testEncodings(self):
+        (status, out, err) = RunInProcess(
+            'latin1.cmake bom.cmake utf16.cmake', self.root)
+        self.assertEqual([
+            b'latin1.cmake:1: Line ends in whitespace [whitespace/eol]',
+            b'bom.cmake:1: Do not use mixed case commands [readability/wonkycase]',
+            b'utf16.cmake:1: Do not use mixed case commands [readability/wonkycase]',
+        ], out.splitlines())
+
+    def testUnreadable(self):
+        # each file that can not be read or decoded is an error of its own
+        (status, out, err) = RunInProcess(
+            '--fallback-encoding=ascii latin1.cmake missing.cmake hand.cmake',
+            self.root)
+        self.assertEqual(1, status)
+        lines = out.splitlines()
+        self.assertRegex(lines[0], b'^latin1.cmake:0: Can not decode file: '
+                         b".*can't decode byte 0xe9.* \\[syntax/io\\]$")
+        self.assertEqual([
+            b'missing.cmake:0: Can not read file: No such file or directory '
+            b'[syntax/io]',
+            b'hand.cmake:1: Line ends in whitespace [whitespace/eol]',
+        ], lines[1:])
+        self.assertEqual(b'Total Errors: 3\n', err)
+        (status, out, err) = RunInProcess(
+            '--fallback-encoding=bogus hand.cmake', self.root)
+        self.assertEqual(32, status)
+        self.assertIn(b'Unknown encoding: bogus', err)
+        for codec in ('hex', 'rot13', 'zlib'):
+            (status, out, err) = RunInProcess(
+                '--fallback-encoding=%s hand.cmake' % codec, self.root)
+            self.assertEqual(32, status)
+            self.assertIn(b'Unknown encoding: ' + codec.encode('ascii'), err)
+
+    def testReadFailure(self):
+        # a failure that is not an I/O error is still only an error of its file
+        read = cmakelint.main.ReadSource
+
+        def Read(filename):
+            if filename == 'latin1.cmake':
+                raise TypeError('boom')
+            return read(filename)
+        for jobs in ('1', '2'):
+            with mock.patch('cmakelint.main.ReadSource', side_effect=Read):
+                (status, out, err) = RunInProcess(
+                    '--jobs=%s latin1.cmake hand.cmake' % jobs, self.root)
+            self.assertEqual([
+                b'latin1.cmake:0: Can not read file: TypeError: boom [syntax/io]',
+                b'hand.cmake:1: Line ends in whitespace [whitespace/eol]',
+            ], out.splitlines())
+
+    def testInternalError(self):
+        with mock.patch('cmakelint.main.CheckPerformance',
+                        side_effect=RuntimeError('boom')):
+            (status, out, err) = RunInProcess('hand.cmake latin1.cmake',
+                                              self.root)
+        # what was found before the failure is kept
+        self.assertEqual([
+            b'hand.cmake:1: Line ends in whitespace [whitespace/eol]',
+            b'hand.cmake:0: Linting stopped by an internal error: '
+            b'RuntimeError: boom [syntax/internal]',
+            b'latin1.cmake:1: Line ends in whitespace [whitespace/eol]',
+            b'latin1.cmake:0: Linting stopped by an internal error: '
+            b'RuntimeError: boom [syntax/internal]',
+        ], out.splitlines())
+
 
 class TemporaryFolderClassSetup(object):
     """
@@ -105,7 +469,7 @@ class TemporaryFolderClassSetup(object):
         cwd = os.path.join(self._root, rel_cwd)
         # command to reproduce
         print("\ncd " + cwd + " && " + cmd + " 2> <filename>")
-        (status, out, err) = RunShellCommand(cmd, cwd)
+        (status, out, err) = RunInProcess(args, cwd)
         try:
             # print(out.decode('utf8'))
             # print(err.decode('utf8'))
@@ -15,6 +15,7 @@ the License.
 import contextlib
 import os
 import sys
+import threading
 import unittest
 
 import cmakelint.__version__
@@ -86,6 +87,30 @@ class CMakeLintTestBase(unittest.TestCase):
         cmakelint.main._package_state.Done(filename, errors)
         self.assertEqual(expected_message, errors.Results())
 
+    def doTestCheckBlocks(self, code, expected_message):
+        errors = ErrorCollector()
+        clean_lines = cmakelint.main.CleansedLines(code.split('\n'))
+        cmakelint.main.CheckBlocks('foo.cmake', clean_lines, errors)
+        self.assertEqual(expected_message, errors.Results())
+
+    def doTestCheckPerformance(self, code, expected_message):
+        errors = ErrorCollector()
+        clean_lines = cmakelint.main.CleansedLines(code.split('\n'))
+        cmakelint.main.CheckPerformance('foo.cmake', clean_lines, errors)
+        self.assertEqual(expected_message, errors.Results())
+
+    def doTestCheckVariables(self, code, expected_message):
+        errors = ErrorCollector()
+        clean_lines = cmakelint.main.CleansedLines(code.split('\n'))
+        cmakelint.main.CheckVariables('foo.cmake', clean_lines, errors)
+        self.assertEqual(expected_message, errors.Results())
+
+    def doTestCheckCommands(self, code, expected_message):
+        errors = ErrorCollector()
+        clean_lines = cmakelint.main.CleansedLines(code.split('\n'))
+        cmakelint.main.CheckCommands('foo.cmake', clean_lines, errors)
+        self.assertEqual(expected_message, errors.Results())
+
     def doTestGetArgument(self, expected_arg, code):
         clean_lines = cmakelint.main.CleansedLines(code.split('\n'))
         self.assertEqual(
@@ -334,6 +359,253 @@ class CMakeLintTest(CMakeLintTestBase):
         finally:
             cmakelint.main._lint_state.spaces = 2
 
+    def testBlockIndex(self):
+        index = cmakelint.main.BlockIndex((
+            'function(foo)\n'
+            '  if(A)\n'
+            '    foreach(x ${L})\n'
+            '      message(${x})\n'
+            '    endforeach()\n'
+            '  ELSEIF(B)\n'
+            '  else()\n'
+            '    set(X\n'
+            '        y)\n'
+            '  endif()\n'
+            'endfunction()').split('\n'))
+        self.assertEqual([], index.problems)
+        self.assertEqual([('function', 0, 10, 0), ('if', 1, 9, 1),
+                          ('foreach', 2, 4, 2)],
+                         [(b.command, b.start, b.end, b.depth)
+                          for b in index.blocks])
+        self.assertEqual({0: 0, 1: 1, 2: 2, 3: 3, 4: 2, 5: 1, 6: 1, 7: 2,
+                          9: 1, 10: 0}, index.depths)
+        self.assertIs(index.blocks[0], index.blocks[1].parent)
+
+    def testUnbalancedBlocks(self):
+        self.doTestCheckBlocks('if(A)\nendif()', '')
+        self.doTestCheckBlocks('endif()', 'endif() without matching if()')
+        self.doTestCheckBlocks('else()', 'else() outside of an if() block')
+        self.doTestCheckBlocks('while(A)\n',
+                               'while() is never closed; expected endwhile()')
+        self.doTestCheckBlocks(
+            'if(A)\nforeach(x a)\nendif()',
+            'foreach() is closed by endif() on line 2; expected endforeach()')
+        self.doTestCheckBlocks(
+            'foreach(x a)\nelse()\nendforeach()',
+            'else() outside of an if() block')
+        self.doTestCheckBlocks('set(X "\nendif()\n")', '')
+
+    def testBlockIndent(self):
+        code = ('if(A)\n'
+                'set(X 1)\n'
+                '  else()\n'
+                '  set(X 2)\n'
+                'endif()')
+        self.doTestCheckBlocks(code, '')
+        cmakelint.main._lint_state.SetFilters('+whitespace/blockindent')
+        self.doTestCheckBlocks(code, [
+            'Indent by 2 spaces at nesting depth 1',
+            'Indent by 0 spaces at nesting depth 0'])
+
+    def testBlockMetrics(self):
+        cmakelint.main._lint_state.SetFilters('+readability')
+        depth = cmakelint.main._MAX_BLOCK_DEPTH
+        self.doTestCheckBlocks(
+            'if(A)\n' * depth + 'endif()\n' * depth, '')
+        self.doTestCheckBlocks(
+            'if(A)\n' * (depth + 1) + 'endif()\n' * (depth + 1),
+            'Blocks nested more than %d deep' % depth)
+        length = cmakelint.main._MAX_FUNCTION_LINES
+        self.doTestCheckBlocks(
+            'macro(m)\n' + 'set(X)\n' * (length - 1) + 'endmacro()', '')
+        self.doTestCheckBlocks(
+            'macro(m)\n' + 'set(X)\n' * length + 'endmacro()',
+            'macro() is %d lines long; keep it under %d' % (length + 1, length))
+
+    def testGetCommandArguments(self):
+        clean_lines = cmakelint.main.CleansedLines([
+            'file(GLOB SRCS', '  "*.c" # comment', '  CONFIGURE_DEPENDS)'])
+        self.assertEqual(['GLOB', 'SRCS', '""', 'CONFIGURE_DEPENDS'],
+                         cmakelint.main.GetCommandArguments(0, clean_lines))
+        clean_lines = cmakelint.main.CleansedLines(['foo(', 'bar'])
+        self.assertEqual(['bar'],
+                         cmakelint.main.GetCommandArguments(0, clean_lines))
+
+    def testPerformanceGlob(self):
+        self.doTestCheckPerformance(
+            'file(GLOB SRCS *.c CONFIGURE_DEPENDS)', '')
+        self.doTestCheckPerformance(
+            'file(READ foo.txt CONTENTS)', '')
+        self.doTestCheckPerformance(
+            'file(GLOB SRCS *.c)',
+            'Add CONFIGURE_DEPENDS to file(GLOB) or list the files explicitly')
+        self.doTestCheckPerformance(
+            'file(GLOB_RECURSE SRCS CONFIGURE_DEPENDS\n'
+            '     "${PROJECT_SOURCE_DIR}/*.c")',
+            'file(GLOB_RECURSE) from the top of the source tree walks every '
+            'directory; glob a subdirectory instead')
+
+    def testPerformanceFindPackage(self):
+        self.doTestCheckPerformance(
+            'find_package(Foo)\nfind_package(Bar)\nfind_package(${X})\n'
+            'find_package(${X})', '')
+        self.doTestCheckPerformance(
+            'find_package(Foo)\nif(A)\n  find_package(Foo REQUIRED)\nendif()',
+            'find_package(Foo) was already called on line 0')
+        self.doTestCheckPerformance(
+            'if(A)\n  find_package(Foo)\nelse()\n  if(B)\n'
+            '    find_package(Foo)\n  endif()\nendif()\n', '')
+        self.doTestCheckPerformance(
+            'if(A)\n  find_package(Foo)\nendif()\nfind_package(Foo)', '')
+
+    def testPerformanceLoop(self):
+        self.doTestCheckPerformance('include(Foo)\nexecute_process(a)', '')
+        self.doTestCheckPerformance(
+            'foreach(x a b)\n  if(x)\n    include(${x})\n  endif()\n'
+            'endforeach()\n'
+            'while(A)\n  execute_process(COMMAND foo)\nendwhile()', [
+                'include() inside a loop runs on every iteration',
+                'execute_process() inside a loop runs on every iteration'])
+        self.doTestCheckPerformance(
+            'foreach(x a b)\n  function(f)\n    include(Foo)\n'
+            '  endfunction()\nendforeach()', '')
+
+    def testPerformanceVariables(self):
+        self.doTestCheckPerformance(
+            'get_cmake_property(vars CACHE_VARIABLES)', '')
+        self.doTestCheckPerformance(
+            'get_cmake_property(vars VARIABLES)',
+            'get_cmake_property(VARIABLES) copies every variable in scope; '
+            'avoid iterating over all of them')
+
+    def testCleanCommentsKeepQuoted(self):
+        self.assertEqual(('set(x "a # b")', False), cmakelint.main.CleanComments(
+            'set(x "a # b") # c', keep_quoted=True))
+        self.assertEqual(('a "b', True), cmakelint.main.CleanComments(
+            'a "b', keep_quoted=True))
+        self.assertEqual(('still quoted', True), cmakelint.main.CleanComments(
+            'still quoted', True, keep_quoted=True))
+
+    def testSymbolTable(self):
+        clean_lines = cmakelint.main.CleansedLines((
+            'set(A 1)\n'
+            'option(B "b" ON)\n'
+            'function(f x)\n'
+            '  list(APPEND L "${A}")\n'
+            '  list(LENGTH L N)\n'
+            '  set(P 1 PARENT_SCOPE)\n'
+            'endfunction()').split('\n'))
+        symbols = cmakelint.main.SymbolTable(clean_lines)
+        top = symbols.scopes[None]
+        self.assertEqual({'A': 0, 'B': 1}, top.sets)
+        self.assertEqual(set(['A']), top.local)
+        function = symbols.scopes[clean_lines.BlockIndex().blocks[0]]
+        self.assertEqual(set(['x']), function.parameters)
+        self.assertEqual({'L': 3, 'N': 4, 'P': 5}, function.sets)
+        self.assertEqual(set(['L', 'N']), function.local)
+        self.assertEqual(['A'], list(function.references))
+
+    def testUseBeforeSet(self):
+        code = 'message("${A}")\nset(A 1)'
+        self.doTestCheckVariables(code, '')
+        cmakelint.main._lint_state.SetFilters('+readability/usebeforeset')
+        self.doTestCheckVariables(code, 'A is used before it is set on line 1')
+        self.doTestCheckVariables('set(A 1)\nmessage(${A})', '')
+        self.doTestCheckVariables('message(${A})', '')
+        self.doTestCheckVariables('set(A ${A} b)', '')
+        self.doTestCheckVariables(
+            'if(NOT A)\n  string(TOUPPER x A)\nendif()\n'
+            'message(${A})\nset(A 1)', '')
+        self.doTestCheckVariables(
+            'foreach(x a b)\n  message(${prev})\n  set(prev ${x})\n'
+            'endforeach()', '')
+        self.doTestCheckVariables(
+            'function(f x)\n  message(${x} ${ARGN})\n  set(x 1)\n'
+            'endfunction()', '')
+        self.doTestCheckVariables(
+            'function(f)\n  message(${ARGV0} ${ARGC})\n  set(ARGV0 1)\n'
+            '  set(ARGC 1)\nendfunction()', '')
+        self.doTestCheckVariables(
+            'function(f)\n  message(${ARGS})\n  set(ARGS 1)\nendfunction()',
+            'ARGS is used before it is set on line 2')
+        self.doTestCheckVariables(
+            'function(f)\n  message(${B})\n  set(B 1)\nendfunction()',
+            'B is used before it is set on line 2')
+        self.doTestCheckVariables(
+            'function(f)\n  message(${C})\nendfunction()\nset(C 1)', '')
+
+    def testUnusedVariable(self):
+        code = 'function(f)\n  set(A 1)\nendfunction()'
+        self.doTestCheckVariables(code, '')
+        cmakelint.main._lint_state.SetFilters('+readability/unusedvar')
+        self.doTestCheckVariables(code, 'A is set but never used')
+        self.doTestCheckVariables('set(A 1)', '')
+        self.doTestCheckVariables(
+            'macro(m)\n  set(A 1)\nendmacro()', '')
+        self.doTestCheckVariables((
+            'function(f)\n'
+            '  set(A 1)\n'
+            '  set(B "x")\n'
+            '  list(APPEND C x)\n'
+            '  set(D 1 PARENT_SCOPE)\n'
+            '  set(E 1)\n'
+            '  set(E 2)\n'
+            '  if(B)\n'
+            '    message("${A}")\n'
+            '  endif()\n'
+            '  target_sources(t PRIVATE ${C})\n'
+            'endfunction()'), 'E is set but never used')
+
+    def testNearMiss(self):
+        words = frozenset(['PUBLIC', 'PRIVATE', 'ALL'])
+        deletions = cmakelint.main._DeletionIndex(words)
+        for word, expected in [('PUBLC', 'PUBLIC'), ('PUBLICC', 'PUBLIC'),
+                               ('PUBLIK', 'PUBLIC'), ('PUBILC', 'PUBLIC'),
+                               ('PRIVAT', 'PRIVATE'), ('PUBLIC_X', None),
+                               ('AL', None), ('ALLL', None), ('OTHER', None)]:
+            self.assertEqual(expected, cmakelint.main._NearMiss(
+                word, words, deletions), word)
+
+    def testSignatures(self):
+        signatures = cmakelint.main.GetSignatures()
+        self.assertIs(signatures, cmakelint.main.GetSignatures())
+        self.assertIn('PUBLIC', signatures.commands['target_link_libraries'])
+        self.assertIn('REQUIRED', signatures.commands['find_package'])
+        self.assertEqual('add_library', signatures.SuggestCommand('add_libary'))
+        # modes listed in the text, but not words of examples or placeholders
+        self.assertIn('FATAL_ERROR', signatures.commands['message'])
+        self.assertIn('WARNING', signatures.commands['message'])
+        self.assertNotIn('APPEND', signatures.commands['message'])
+        self.assertNotIn('CMP', signatures.commands['cmake_policy'])
+        self.assertNotIn('NNNN', signatures.commands['cmake_policy'])
+        self.assertNotIn('PROJECT', signatures.commands['project'])
+
+    def testUnknownCommand(self):
+        code = 'add_libary(foo foo.c)'
+        self.doTestCheckCommands(code, '')
+        cmakelint.main._lint_state.SetFilters('+syntax/unknowncommand')
+        self.doTestCheckCommands(
+            code, 'Unknown command add_libary(); did you mean add_library()?')
+        self.doTestCheckCommands('frobnicate()', 'Unknown command frobnicate()')
+        self.doTestCheckCommands(
+            'ADD_LIBRARY(foo foo.c)\nmy_helper()\nfunction(My_Helper)\n'
+            'endfunction()', '')
+
+    def testMisspelledKeyword(self):
+        code = 'target_link_libraries(foo PUBLC bar)'
+        self.doTestCheckCommands(code, '')
+        cmakelint.main._lint_state.SetFilters('+syntax/keyword')
+        self.doTestCheckCommands(
+            code, 'Unknown keyword PUBLC for target_link_libraries(); '
+            'did you mean PUBLIC?')
+        self.doTestCheckCommands(
+            'find_package(Foo\n  REQUIRD)',
+            'Unknown keyword REQUIRD for find_package(); did you mean REQUIRED?')
+        self.doTestCheckCommands(
+            'set(CACHED 1 CACHE BOOL "")\n'
+            'target_link_libraries(foo PUBLIC ${PUBLC} "PUBLC" Public)\n'
+            'if(WIN32 AND PUBLC)\nendif()', '')
+
     def testParseArgs(self):
         old_usage = cmakelint.main._USAGE
         old_version = cmakelint.__version__.VERSION
@@ -359,6 +631,8 @@ class CMakeLintTest(CMakeLintTestBase):
                                   '--spaces=c', 'foo.cmake'])
                 self.assertRaises(
                     SystemExit, cmakelint.main.ParseArgs, ['--version'])
+                self.assertRaises(SystemExit, cmakelint.main.ParseArgs, [
+                                  '--prefetch=-1', 'foo.cmake'])
             cmakelint.main._lint_state.filters = []
             self.assertEqual(['foo.cmake'], cmakelint.main.ParseArgs(
                 ['--filter=-whitespace', 'foo.cmake']))
@@ -405,6 +679,33 @@ class CMakeLintTest(CMakeLintTestBase):
             cmakelint.main._lint_state.filters = []
             cmakelint.main._lint_state.spaces = old_spaces
 
+    def testReadAhead(self):
+        started = []
+        lookahead_started = threading.Event()
+
+        def Read(item):
+            started.append(item)
+            if item == 3:
+                lookahead_started.set()
+            if item == 0:
+                # only finishes once the reads queued behind it have started
+                self.assertTrue(lookahead_started.wait(5))
+            return item * 10
+
+        results = list(cmakelint.main.ReadAhead(range(6), Read, 3))
+        self.assertEqual([(i, i * 10) for i in range(6)], results)
+        self.assertEqual([(i, i * 10) for i in range(3)],
+                         list(cmakelint.main.ReadAhead(range(3), Read, 0)))
+
+    def testReadAheadError(self):
+        def Read(item):
+            if item == 1:
+                raise IOError('no such file')
+            return item
+        reader = cmakelint.main.ReadAhead(range(3), Read, 2)
+        self.assertEqual((0, 0), next(reader))
+        self.assertRaises(IOError, next, reader)
+
     def testParseOptionsFile(self):
         old_usage = cmakelint.main._USAGE
         old_cats = cmakelint.main._ERROR_CATEGORIES
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import os
+import shutil
+import stat
+import unittest
+
+import cmakelint.fix
+import cmakelint.main
+from test import cli_test
+
+BEFORE = (
+    'set(X 1) \n'
+    'if (X)\n'
+    '\tset(Y "a\tb" )  \n'
+    'Message(STATUS "x\n'
+    '  y  \n'
+    '")\n'
+    'ENDIF( ${X} )\n'
+    'set(Z [[\n'
+    '\tliteral  \n'
+    ']])\n'
+)
+AFTER = (
+    'set(X 1)\n'
+    'if(X)\n'
+    '  set(Y "a\tb" )\n'
+    'message(STATUS "x\n'
+    '  y  \n'
+    '")\n'
+    'endif()\n'
+    'set(Z [[\n'
+    '\tliteral  \n'
+    ']])\n'
+)
+
+
+class FixTest(cli_test.TempDirTest, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.filename = os.path.join(self.root, 'CMakeLists.txt')
+
+    def Read(self):
+        with open(self.filename, newline='') as f:
+            return f.read()
+
+    def Lint(self, *args):
+        return super().Lint(*args, self.filename)
+
+    def testFix(self):
+        self.Write('CMakeLists.txt', BEFORE)
+        os.chmod(self.filename, 0o640)
+        status, stdout, stderr = self.Lint('--fix')
+        self.assertEqual(AFTER, self.Read())
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(self.filename).st_mode))
+        self.assertEqual(['CMakeLists.txt'], os.listdir(self.root))
+        # what is inside quoted and bracket arguments is left alone
+        self.assertEqual(1, status)
+        self.assertEqual(
+            '%s:3: Mismatching spaces inside () after command [whitespace/mismatch]\n'
+            '%s:3: Tab found; please use spaces [whitespace/tabs]\n'
+            '%s:5: Line ends in whitespace [whitespace/eol]\n'
+            '%s:9: Tab found; please use spaces [whitespace/tabs]\n'
+            '%s:9: Line ends in whitespace [whitespace/eol]\n'
+            % ((self.filename,) * 5), stdout)
+        self.assertIn('Total Errors: 5\nFixed Errors: 6\n', stderr)
+        # nothing more to fix
+        self.assertEqual((status, stdout), self.Lint('--fix')[:2])
+        self.assertEqual(AFTER, self.Read())
+
+    def testUpperCase(self):
+        self.Write('CMakeLists.txt', 'SET(X 1)\nif(X)\nEndIf()\n')
+        self.assertEqual(0, self.Lint('--fix')[0])
+        self.assertEqual('SET(X 1)\nIF(X)\nENDIF()\n', self.Read())
+
+    def testFilters(self):
+        # only what would be reported is fixed
+        self.Write('CMakeLists.txt', BEFORE)
+        self.Lint('--fix', '--filter=-whitespace,-readability/logic')
+        self.assertEqual(BEFORE.replace('Message', 'message')
+                         .replace('ENDIF', 'endif'), self.Read())
+
+    def testLineEndings(self):
+        self.Write('CMakeLists.txt', 'set(X 1) \nset(Y 2)\n', newline='\r\n')
+        self.Lint('--fix', '--filter=-whitespace/newline')
+        self.assertEqual('set(X 1)\r\nset(Y 2)\r\n', self.Read())
+
+    def testEncodings(self):
+        for data, fixed in [
+                (u'set(X "caf\xe9") \n'.encode('latin-1'),
+                 u'set(X "caf\xe9")\n'.encode('latin-1')),
+                (b'\xef\xbb\xbfset(X 1) \n', b'\xef\xbb\xbfset(X 1)\n')]:
+            self.Write('CMakeLists.txt', data)
+            self.Lint('--fix')
+            with open(self.filename, 'rb') as f:
+                self.assertEqual(fixed, f.read())
+
+    def testMixedLineEndings(self):
+        # each line keeps its own ending, also inside a quoted argument
+        self.Write('CMakeLists.txt',
+                   b'set(X "a\r\nb") \nset(Y 1)\rset(Z 1) \r\n')
+        self.Lint('--fix', '--filter=-whitespace/newline')
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(b'set(X "a\r\nb")\nset(Y 1)\rset(Z 1)\r\n',
+                             f.read())
+
+    def testByteOrder(self):
+        for encoding, bom in [('utf-16-be', b'\xfe\xff'),
+                              ('utf-16-le', b'\xff\xfe'),
+                              ('utf-32-be', b'\x00\x00\xfe\xff')]:
+            self.Write('CMakeLists.txt', bom + u'set(X 1) \n'.encode(encoding))
+            self.Lint('--fix')
+            with open(self.filename, 'rb') as f:
+                self.assertEqual(bom + u'set(X 1)\n'.encode(encoding),
+                                 f.read(), encoding)
+
+    def testSymlink(self):
+        real = self.Write('real.cmake', 'set(X 1) \n')
+        link = os.path.join(self.root, 'link.cmake')
+        os.symlink('real.cmake', link)
+        self.Lint('--fix', link)
+        self.assertTrue(os.path.islink(link))
+        with open(real) as f:
+            self.assertEqual('set(X 1)\n', f.read())
+
+    def testCopies(self):
+        copy = os.path.join(self.root, 'a', 'CMakeLists.txt')
+        os.mkdir(os.path.dirname(copy))
+        self.Write('CMakeLists.txt', BEFORE)
+        shutil.copy(self.filename, copy)
+        _, _, stderr = self.Lint('--fix', copy)
+        with open(copy) as f:
+            self.assertEqual(AFTER, f.read())
+        self.assertEqual(AFTER, self.Read())
+        self.assertIn('Fixed Errors: 12\n', stderr)
+
+    def testJobs(self):
+        self.Write('CMakeLists.txt', BEFORE)
+        status, stdout, stderr = self.Lint('--fix', '--jobs=2')
+        self.assertEqual(AFTER, self.Read())
+        self.assertEqual(1, status)
+        self.assertIn('Total Errors: 5\nFixed Errors: 6\n', stderr)
+
+    def testOptions(self):
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(['--fix', '--staged'],
+                                                 io.StringIO(), stderr))
+        self.assertIn('--fix only fixes files in the working tree',
+                      stderr.getvalue())
+
+    def testFixLines(self):
+        lines = ['foo (a)\n', '  bar( b)\n', 'baz("(" )\n']
+        diagnostics = [(1, 'whitespace/extra', ''), (2, 'whitespace/mismatch', ''),
+                       (3, 'whitespace/mismatch', ''), (4, 'whitespace/eol', '')]
+        self.assertEqual(['foo(a)\n', '  bar( b )\n', 'baz("(" )\n'],
+                         cmakelint.fix.FixLines(lines, diagnostics))
+
+
+if __name__ == '__main__':
+    unittest.main()
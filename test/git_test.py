@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import os
+import shutil
+import subprocess
+import unittest
+from unittest import mock
+
+import cmakelint.git
+from test import cli_test
+
+
+def Git(*args):
+    subprocess.check_call(('git', '-c', 'user.name=cmakelint',
+                           '-c', 'user.email=cmakelint@example.com') + args,
+                          stdout=subprocess.DEVNULL)
+
+
+@unittest.skipIf(shutil.which('git') is None, 'git is not installed')
+class GitTest(cli_test.TempDirTest, unittest.TestCase):
+    chdir = True
+
+    def setUp(self):
+        super().setUp()
+        Git('init', '-q')
+        os.mkdir('cmake')
+        self.Write('CMakeLists.txt', 'project(p)\n')
+        self.Write('cmake/FindFOO.cmake',
+                   'include(FindPackageHandleStandardArgs)\n'
+                   'find_package_handle_standard_args(FOO DEFAULT_MSG FOO)\n')
+        self.Write('README', 'not cmake\n')
+        Git('add', '.')
+        Git('commit', '-q', '-m', 'first')
+        # staged with trailing whitespace, but clean again in the work tree
+        self.Write('CMakeLists.txt', 'project(p) \n')
+        Git('add', 'CMakeLists.txt')
+        self.Write('CMakeLists.txt', 'project(p)\n')
+
+    def testStaged(self):
+        status, stdout, stderr = self.Lint('--staged')
+        self.assertEqual(1, status)
+        self.assertEqual('CMakeLists.txt:1: Line ends in whitespace '
+                         '[whitespace/eol]\n', stdout)
+        self.assertEqual('Total Errors: 1\n', stderr)
+
+    def testRev(self):
+        status, stdout, stderr = self.Lint('--rev=HEAD')
+        self.assertEqual(0, status)
+        self.assertEqual('', stdout)
+        self.assertEqual('Total Errors: 0\n', stderr)
+        self.assertEqual(['CMakeLists.txt', 'cmake/FindFOO.cmake'],
+                         cmakelint.git.BlobReader('HEAD').Files([]))
+
+    def testOriginalPathIsKept(self):
+        # a staged rename is linted under its new name
+        Git('mv', 'cmake/FindFOO.cmake', 'cmake/FindFoo.cmake')
+        status, stdout, _ = self.Lint('--staged', '--filter=-whitespace/eol')
+        self.assertEqual(1, status)
+        self.assertEqual('cmake/FindFoo.cmake:0: Find modules should use '
+                         'uppercase names; consider using FindFOO.cmake '
+                         '[convention/filename]\n', stdout)
+
+    def testSubdirectory(self):
+        os.chdir('cmake')
+        self.assertEqual(['FindFOO.cmake'],
+                         cmakelint.git.BlobReader('HEAD').Files([]))
+        reader = cmakelint.git.BlobReader()
+        try:
+            self.assertEqual(b'project(p) \n',
+                             reader.ReadBlob('../CMakeLists.txt'))
+        finally:
+            reader.Close()
+
+    def testOneProcess(self):
+        with mock.patch('subprocess.Popen', wraps=subprocess.Popen) as popen:
+            self.Lint('--rev=HEAD', 'CMakeLists.txt', 'cmake/FindFOO.cmake',
+                      'CMakeLists.txt')
+        commands = [call[0][0][1] for call in popen.call_args_list]
+        self.assertEqual(['rev-parse', 'cat-file'], commands)
+
+    def testMissing(self):
+        reader = cmakelint.git.BlobReader('HEAD')
+        try:
+            self.assertIsNone(reader.ReadBlob('nothere.cmake'))
+            self.assertIsNone(reader.ReadBlob('cmake'))
+            self.assertEqual(b'project(p)\n', reader.ReadBlob('CMakeLists.txt'))
+        finally:
+            reader.Close()
+        status, _, stderr = self.Lint('--rev=HEAD', 'nothere.cmake')
+        self.assertEqual(0, status)
+        self.assertIn('Skipped Files: 1 (1 not found in git)', stderr)
+
+    def testErrors(self):
+        status, _, stderr = self.Lint('--rev=nosuchbranch')
+        self.assertEqual(32, status)
+        self.assertIn('FATAL ERROR', stderr)
+        status, _, stderr = self.Lint('--staged', '--rev=HEAD')
+        self.assertEqual(32, status)
+        self.assertIn('can not be used together', stderr)
+        status, _, stderr = self.Lint('--staged', '--project=.')
+        self.assertEqual(32, status)
+        shutil.rmtree('.git')
+        for args in [('--staged',), ('--staged', 'CMakeLists.txt'),
+                     ('--rev=HEAD',)]:
+            status, _, stderr = self.Lint(*args)
+            self.assertEqual(32, status)
+            # one line, not the usage git prints outside a repository
+            self.assertEqual(1, stderr.count('\n'), stderr)
+            self.assertIn('not a git repository: ', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
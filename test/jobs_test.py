@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import os
+import threading
+import unittest
+
+import cmakelint.jobs
+import cmakelint.main
+from test import cli_test
+
+
+class JobsTest(cli_test.TempDirTest, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.files = []
+        for i in range(40):
+            self.Write('small%d.cmake' % i, 'set(X%d 1) \n' * (i % 3 + 1))
+        # a large file given last, which should be started first
+        self.Write('large.cmake', 'set(X 1) \n' * 10000)
+        self.Write('README', 'not cmake\n')
+
+    def Write(self, name, contents):
+        self.files.append(super().Write(name, contents))
+
+    def Lint(self, *args):
+        return super().Lint(*args, *self.files)
+
+    def testSchedule(self):
+        chunks = cmakelint.jobs.Schedule(
+            ['a', 'b', 'c', 'd', 'e'], [10, 100000, 20, 70000, 20])
+        self.assertEqual([[(1, 'b')], [(3, 'd')], [(2, 'c'), (4, 'e'), (0, 'a')]],
+                         chunks)
+        chunks = cmakelint.jobs.Schedule(['x'] * 70, [1] * 70)
+        self.assertEqual([32, 32, 6], [len(chunk) for chunk in chunks])
+
+    def testSameOutput(self):
+        for options in ([], ['--max-file-errors=2'], ['--max-errors=25']):
+            status, stdout, stderr = self.Lint(*options)
+            jobs_status, jobs_stdout, jobs_stderr = self.Lint('--jobs=3',
+                                                              *options)
+            self.assertEqual(status, jobs_status)
+            self.assertEqual(stdout, jobs_stdout)
+            lines = jobs_stderr.splitlines()
+            self.assertEqual(stderr.splitlines(), lines[:-1])
+            self.assertRegex(lines[-1], r'^Jobs: 3 workers, 3 chunks, \d+% busy$')
+
+    def testStop(self):
+        # a worker skips the rest of its chunk once --max-errors is reached
+        state = cmakelint.main._lint_state
+        stop = threading.Event()
+        chunk = [(0, self.files[0]), (1, self.files[1])]
+        try:
+            cmakelint.jobs._Initialize({}, False, stop)
+            results, _, _ = cmakelint.jobs._LintChunk(chunk)
+            self.assertEqual([0, 1], [result[0] for result in results])
+            stop.set()
+            results, _, _ = cmakelint.jobs._LintChunk(chunk)
+            self.assertEqual([], results)
+        finally:
+            cmakelint.main._lint_state = state
+            cmakelint.jobs._stop = None
+
+    def testArchive(self):
+        import tarfile
+        filename = os.path.join(self.root, 'a.tar')
+        with tarfile.open(filename, 'w') as archive:
+            archive.add(self.files[0], 'src/CMakeLists.txt')
+        self.files = [filename] + self.files[:2]
+        status, stdout, _ = self.Lint()
+        self.assertIn('a.tar/src/CMakeLists.txt:1:', stdout)
+        self.assertEqual((status, stdout), self.Lint('--jobs=2')[:2])
+
+    def testOptions(self):
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(
+            ['--jobs=2', '--staged'], io.StringIO(), stderr))
+        self.assertIn('--jobs can not be used with', stderr.getvalue())
+        self.assertEqual(32, cmakelint.main.main(
+            ['--jobs=-1', 'CMakeLists.txt'], io.StringIO(), io.StringIO()))
+
+
+if __name__ == '__main__':
+    unittest.main()
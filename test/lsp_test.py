@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import json
+import random
+import unittest
+from unittest import mock
+
+import cmakelint.lsp
+import cmakelint.main
+
+SAMPLE = 'samples/llvm/CMakeLists.txt'
+
+
+def FullLint(filename, text):
+    found = []
+
+    def Collect(unused_filename, linenumber, category, message):
+        if cmakelint.main.ShouldPrintError(category):
+            found.append((linenumber, category, message))
+    original_filters = list(cmakelint.main._lint_state.filters)
+    try:
+        cmakelint.main.ProcessFileData(filename, text.split('\n'), Collect)
+    finally:
+        cmakelint.main._lint_state.filters = original_filters
+    return sorted(found)
+
+
+def Change(first, first_char, last, last_char, text):
+    return {'range': {'start': {'line': first, 'character': first_char},
+                      'end': {'line': last, 'character': last_char}},
+            'text': text}
+
+
+class DocumentTest(unittest.TestCase):
+
+    def setUp(self):
+        cmakelint.main._lint_state.filters = []
+
+    def assertParity(self, document):
+        text = '\n'.join(document.text_lines)
+        self.assertEqual(FullLint(document.filename, text),
+                         sorted(document.Diagnostics()))
+
+    def testOpenMatchesFullLint(self):
+        with open(SAMPLE) as f:
+            text = f.read()
+        document = cmakelint.lsp.Document('file:///x', 'CMakeLists.txt', text, [])
+        self.assertParity(document)
+
+    def testIncrementalEditsMatchFullLint(self):
+        with open(SAMPLE) as f:
+            text = ''.join(f.readlines()[:400])
+        document = cmakelint.lsp.Document('file:///x', 'CMakeLists.txt', text, [])
+        rng = random.Random(1234)
+        snippets = ['', ' ', '\t', ')', '(', '"', '#', '\n', 'else(foo)\n',
+                    'Set(x )', 'add_library(foo\n  bar\n', '"\n"', 'ENDIF()']
+        for _ in range(200):
+            lines = document.text_lines
+            first = rng.randrange(len(lines))
+            last = min(len(lines) - 1, first + rng.randrange(3))
+            first_char = rng.randrange(len(lines[first]) + 1)
+            if last == first:
+                last_char = rng.randrange(first_char, len(lines[last]) + 1)
+            else:
+                last_char = rng.randrange(len(lines[last]) + 1)
+            document.ApplyChange(Change(first, first_char, last, last_char,
+                                        rng.choice(snippets)))
+            self.assertParity(document)
+
+    def testEditOnlyRelintsTouchedCommand(self):
+        text = '\n'.join(['project(foo)'] +
+                         ['set(VAR%d\n    value)' % i for i in range(500)])
+        document = cmakelint.lsp.Document('file:///x', 'CMakeLists.txt', text, [])
+        with mock.patch('cmakelint.main.ProcessLine',
+                        wraps=cmakelint.main.ProcessLine) as process_line:
+            # edit the argument line of the 100th set()
+            document.ApplyChange(Change(200, 4, 200, 9, 'other '))
+            self.assertLess(process_line.call_count, 5)
+        self.assertEqual(
+            [(200, 'whitespace/mismatch',
+              'Mismatching spaces inside () after command')],
+            document.Diagnostics())
+        self.assertParity(document)
+
+    def testPragmaEdit(self):
+        document = cmakelint.lsp.Document(
+            'file:///x', 'CMakeLists.txt', 'foo() \nbar()\n', [])
+        document.ApplyChange(Change(0, 0, 0, 0, '# lint_cmake: -whitespace/eol\n'))
+        self.assertEqual([], document.Diagnostics())
+        self.assertParity(document)
+
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        cmakelint.main._lint_state.filters = []
+
+    def Encode(self, messages):
+        data = b''
+        for message in messages:
+            body = json.dumps(message).encode('utf-8')
+            data += b'Content-Length: %d\r\n\r\n' % len(body) + body
+        return data
+
+    def Decode(self, data):
+        stream = io.BytesIO(data)
+        server = cmakelint.lsp.Server(stream, io.BytesIO())
+        messages = []
+        while True:
+            message = server.ReadMessage()
+            if message is None:
+                return messages
+            messages.append(message)
+
+    def testSession(self):
+        uri = 'file:///tmp/CMakeLists.txt'
+        requests = self.Encode([
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'initialized', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen', 'params': {
+                'textDocument': {'uri': uri, 'version': 1,
+                                 'languageId': 'cmake', 'text': 'foo()\n'}}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange', 'params': {
+                'textDocument': {'uri': uri, 'version': 2},
+                'contentChanges': [Change(0, 5, 0, 5, ' ')]}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ])
+        output = io.BytesIO()
+        status = cmakelint.lsp.Serve(io.BytesIO(requests), output, debounce=0)
+        self.assertEqual(0, status)
+        messages = self.Decode(output.getvalue())
+        self.assertEqual(2, messages[0]['result']['capabilities']
+                         ['textDocumentSync']['change'])
+        published = [m['params'] for m in messages
+                     if m.get('method') == 'textDocument/publishDiagnostics']
+        self.assertEqual([], published[0]['diagnostics'])
+        self.assertEqual(2, published[1]['version'])
+        self.assertEqual(['whitespace/eol'],
+                         [d['code'] for d in published[1]['diagnostics']])
+        self.assertEqual(0, published[1]['diagnostics'][0]['range']['start']['line'])
+        self.assertEqual({'jsonrpc': '2.0', 'id': 2, 'result': None}, messages[-1])
+
+    def testDebounce(self):
+        uri = 'file:///tmp/CMakeLists.txt'
+        server = cmakelint.lsp.Server(io.BytesIO(), io.BytesIO(), debounce=60)
+        server.DidOpen({'textDocument': {'uri': uri, 'text': 'foo()\n'}})
+        for version in range(10):
+            server.DidChange({'textDocument': {'uri': uri, 'version': version},
+                              'contentChanges': [Change(0, 0, 0, 0, ' ')]})
+        self.assertEqual(1, len(server.timers))
+        self.assertEqual(b'', server.outstream.getvalue())
+        server.timers[uri].cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
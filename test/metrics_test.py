@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import os
+import unittest
+import urllib.request
+
+import cmakelint.main
+import cmakelint.metrics
+from test import cli_test
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, 'samples', 'llvm', 'CMakeLists.txt')
+
+
+def Samples(text):
+    """
+    The samples of an OpenMetrics exposition as a dict from the name and
+    labels to the value
+    """
+    samples = {}
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+class MetricsTest(cli_test.TempDirTest, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.metrics_file = os.path.join(self.root, 'metrics.txt')
+
+    def Lint(self, *args):
+        status, _, stderr = super().Lint(
+            '--metrics-file=%s' % self.metrics_file, *args)
+        with open(self.metrics_file) as f:
+            return status, stderr, f.read()
+
+    def testRender(self):
+        metrics = cmakelint.metrics.Metrics()
+        metrics.Add('cmakelint_diagnostics', label='a"b')
+        metrics.Observe('read', 0.002)
+        metrics.Observe('read', 2.0)
+        text = metrics.Render()
+        self.assertTrue(text.endswith('\n# EOF\n'))
+        self.assertIn('# TYPE cmakelint_files_linted counter\n'
+                      '# HELP cmakelint_files_linted Files linted.\n'
+                      'cmakelint_files_linted_total 0\n', text)
+        samples = Samples(text)
+        self.assertEqual(1, samples['cmakelint_diagnostics_total{category="a\\"b"}'])
+        self.assertEqual(0, samples['cmakelint_phase_seconds_bucket{phase="read",le="0.001"}'])
+        self.assertEqual(1, samples['cmakelint_phase_seconds_bucket{phase="read",le="0.005"}'])
+        self.assertEqual(2, samples['cmakelint_phase_seconds_bucket{phase="read",le="+Inf"}'])
+        self.assertEqual(2, samples['cmakelint_phase_seconds_count{phase="read"}'])
+        self.assertAlmostEqual(2.002, samples['cmakelint_phase_seconds_sum{phase="read"}'])
+        self.assertEqual(0, samples['cmakelint_phase_seconds_count{phase="check"}'])
+
+    def testMetricsFile(self):
+        status, stderr, text = self.Lint(SAMPLE, SAMPLE)
+        self.assertEqual(1, status)
+        total = int(stderr.split()[2])
+        samples = Samples(text)
+        with open(SAMPLE) as f:
+            lines = len(f.readlines())
+        self.assertEqual(2, samples['cmakelint_files_linted_total'])
+        # the second copy is answered from the content cache and not parsed
+        self.assertEqual(lines, samples['cmakelint_lines_total'])
+        self.assertEqual(2 * os.path.getsize(SAMPLE),
+                         samples['cmakelint_read_bytes_total'])
+        self.assertEqual(1, samples['cmakelint_cache_hits_total{cache="content"}'])
+        self.assertEqual(1, samples['cmakelint_cache_misses_total{cache="content"}'])
+        self.assertEqual(total, sum(value for name, value in samples.items()
+                                    if name.startswith('cmakelint_diagnostics')))
+        for phase, count in (('discovery', 1), ('read', 2), ('clean', 1),
+                             ('check', 1)):
+            self.assertEqual(count, samples[
+                'cmakelint_phase_seconds_count{phase="%s"}' % phase])
+
+    def testJobs(self):
+        files = [self.Write('%d.cmake' % i, 'set(X%d 1) \n' % i * (i + 1))
+                 for i in range(4)]
+        sequential = Samples(self.Lint(*files)[2])
+        parallel = Samples(self.Lint('--jobs=2', *files)[2])
+        for name in ('cmakelint_files_linted_total', 'cmakelint_lines_total',
+                     'cmakelint_read_bytes_total',
+                     'cmakelint_diagnostics_total{category="whitespace/eol"}',
+                     'cmakelint_phase_seconds_count{phase="check"}'):
+            self.assertEqual(sequential[name], parallel[name], name)
+        self.assertEqual(10, parallel['cmakelint_diagnostics_total{category="whitespace/eol"}'])
+
+    def testLsp(self):
+        import cmakelint.lsp
+        state = cmakelint.main._lint_state
+        state.metrics = cmakelint.metrics.Metrics()
+        try:
+            document = cmakelint.lsp.Document(
+                'file:///CMakeLists.txt', '/CMakeLists.txt', 'set(X 1) \n', [])
+            document.ApplyChange({
+                'range': {'start': {'line': 0, 'character': 0},
+                          'end': {'line': 0, 'character': 0}},
+                'text': 'set(Y 1)\n'})
+            samples = Samples(state.metrics.Render())
+        finally:
+            state.metrics = None
+        self.assertEqual(1, samples['cmakelint_files_linted_total'])
+        # the text after the last newline is an empty line of the document
+        self.assertEqual(2, samples['cmakelint_lines_total'])
+        self.assertEqual(1, samples['cmakelint_phase_seconds_count{phase="clean"}'])
+        self.assertEqual(2, samples['cmakelint_phase_seconds_count{phase="check"}'])
+
+    def testServer(self):
+        metrics = cmakelint.metrics.Metrics()
+        metrics.Add('cmakelint_files_linted', 3)
+        server = cmakelint.metrics.StartServer(metrics, 0)
+        try:
+            url = 'http://127.0.0.1:%d/metrics' % server.server_address[1]
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(cmakelint.metrics.CONTENT_TYPE,
+                                 response.headers['Content-Type'])
+                samples = Samples(response.read().decode('utf-8'))
+            self.assertEqual(3, samples['cmakelint_files_linted_total'])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def testPortNeedsLsp(self):
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(
+            ['--metrics-port=0', SAMPLE], io.StringIO(), stderr))
+        self.assertIn('metrics-port can only be used with --lsp',
+                      stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
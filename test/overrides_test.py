@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import os
+import unittest
+
+import cmakelint.main
+import cmakelint.overrides
+from test import cli_test
+
+
+def Matcher(*patterns):
+    return cmakelint.overrides.PathMatcher(
+        [cmakelint.overrides.Override(pattern) for pattern in patterns])
+
+
+def Patterns(matcher, filename):
+    return [override.pattern for override in matcher.Resolve(filename)]
+
+
+class PathMatcherTest(unittest.TestCase):
+
+    def testPatterns(self):
+        matcher = Matcher('third_party/**', 'cmake/modules/*.cmake',
+                          '*.cmake', 'generated/', 'src/CMakeLists.txt',
+                          'src/**/test/*.txt', 'cmake/Find[!X]*.cmake')
+        self.assertEqual(['third_party/**', '*.cmake'],
+                         Patterns(matcher, 'third_party/a/b/x.cmake'))
+        self.assertEqual(['third_party/**'],
+                         Patterns(matcher, './third_party/CMakeLists.txt'))
+        self.assertEqual(['cmake/modules/*.cmake', '*.cmake'],
+                         Patterns(matcher, 'cmake/modules/Foo.cmake'))
+        # * does not match a slash
+        self.assertEqual(['*.cmake'],
+                         Patterns(matcher, 'cmake/modules/sub/Foo.cmake'))
+        self.assertEqual(['generated/'],
+                         Patterns(matcher, 'generated/x/CMakeLists.txt'))
+        self.assertEqual(['src/CMakeLists.txt'],
+                         Patterns(matcher, 'src/CMakeLists.txt'))
+        self.assertEqual([], Patterns(matcher, 'src/a/CMakeLists.txt'))
+        self.assertEqual(['src/**/test/*.txt'],
+                         Patterns(matcher, 'src/test/CMakeLists.txt'))
+        self.assertEqual(['src/**/test/*.txt'],
+                         Patterns(matcher, 'src/a/b/test/CMakeLists.txt'))
+        self.assertEqual(['*.cmake', 'cmake/Find[!X]*.cmake'],
+                         Patterns(matcher, 'cmake/FindFoo.cmake'))
+        self.assertEqual(['*.cmake'], Patterns(matcher, 'cmake/FindX.cmake'))
+        self.assertEqual([], Patterns(matcher, 'third_party_2/CMakeLists.txt'))
+        self.assertEqual(['third_party/**', '*.cmake'], Patterns(
+            matcher, os.path.join(os.getcwd(), 'third_party', 'x.cmake')))
+
+    def testEmptyPattern(self):
+        self.assertRaises(ValueError, Matcher, ' ')
+
+
+class OverridesTest(cli_test.TempDirTest, unittest.TestCase):
+    chdir = True
+
+    def setUp(self):
+        super().setUp()
+        for name in ('CMakeLists.txt', 'third_party/CMakeLists.txt',
+                     'cmake/modules/Long.cmake'):
+            self.Write(name, 'set(X 1) \nset(%s)\nif(X)\n   set(Y)\nendif()\n'
+                       % ('Y' * 90))
+        self.Config("""
+            linelength=80
+
+            [third_party/**]
+            filter=-whitespace/eol
+            spaces=3
+
+            [cmake/modules/*.cmake]
+            linelength=120
+            """)
+
+    def Config(self, text):
+        self.Write('lintrc', text)
+
+    def Lint(self, *args):
+        return super().Lint('--config=lintrc', *args, 'CMakeLists.txt',
+                            'third_party/CMakeLists.txt',
+                            'cmake/modules/Long.cmake')
+
+    def testOverrides(self):
+        status, stdout, _ = self.Lint()
+        self.assertEqual(1, status)
+        self.assertEqual(
+            'CMakeLists.txt:1: Line ends in whitespace [whitespace/eol]\n'
+            'CMakeLists.txt:2: Lines should be <= 80 characters long [linelength]\n'
+            'CMakeLists.txt:4: Weird indentation; use 2 spaces [whitespace/indent]\n'
+            'third_party/CMakeLists.txt:2: Lines should be <= 80 characters long [linelength]\n'
+            'cmake/modules/Long.cmake:1: Line ends in whitespace [whitespace/eol]\n'
+            'cmake/modules/Long.cmake:4: Weird indentation; use 2 spaces [whitespace/indent]\n',
+            stdout)
+        self.assertEqual((status, stdout), self.Lint('--jobs=2')[:2])
+
+    def testErrors(self):
+        self.Config('[x/]\nquiet\n')
+        status, _, stderr = self.Lint()
+        self.assertEqual(32, status)
+        self.assertIn('quiet can not be used in the [x/] section', stderr)
+        self.Config('[x/]\nfilter=-bogus\n')
+        status, _, stderr = self.Lint()
+        self.assertEqual(32, status)
+        self.assertIn('Filter not allowed: -bogus', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
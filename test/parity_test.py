@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Differential tests between --engine=legacy and --engine=fast: both have to
+report the same (line, category, message) for the samples, the test fixtures
+and a generated corpus of snippets full of quotes, escapes, comments,
+multi-line commands and lint_cmake pragmas. Any change that makes the fast
+engine faster has to keep these passing.
+"""
+import glob
+import io
+import os
+import random
+import unittest
+
+import cmakelint.main
+from test import project_test
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUZZ_COUNT = int(os.environ.get('CMAKELINT_FUZZ_COUNT', 2000))
+
+_ATOMS = ['foo', 'BAR', '${X}', '"a b"', '"a\\"b"', '"#x"', '"', '\\"', '#',
+          '# c', '(', ')', ' ', '  ', '\t', 'AND', 'NOT', 'x(y)', '"\n"',
+          '[[', ']]', 'é']
+_COMMANDS = ['set', 'if', 'else', 'elseif', 'endif', 'foreach', 'endforeach',
+             'function', 'endfunction', 'message', 'SET', 'Set', 'include',
+             'find_package', 'file', 'list', 'add_subdirectory', 'while',
+             'endwhile', 'macro', 'endmacro']
+_PRAGMAS = ['# lint_cmake: -whitespace/eol', '# lint_cmake: +readability/logic',
+            '# lint_cmake: -syntax', '# lint_cmake: bogus']
+
+
+def Snippet(rng):
+    lines = []
+    for _ in range(rng.randrange(1, 12)):
+        roll = rng.random()
+        if roll < 0.1:
+            lines.append(rng.choice(_PRAGMAS))
+            continue
+        indent = ' ' * rng.choice([0, 0, 1, 2, 4])
+        words = ''.join(rng.choice(_ATOMS) for _ in range(rng.randrange(6)))
+        command = '%s%s%s(%s%s' % (indent, rng.choice(_COMMANDS),
+                                   rng.choice(['', ' ']),
+                                   rng.choice(['', ' ']), words)
+        if roll < 0.3:
+            # a command continued on the following lines
+            command += '\n' + indent + ''.join(
+                rng.choice(_ATOMS) for _ in range(rng.randrange(4)))
+        if rng.random() < 0.8:
+            command += rng.choice(['', ' ']) + ')'
+        if rng.random() < 0.2:
+            command += rng.choice([' # trailing', '  ', ' "#"'])
+        lines.append(command)
+    return '\n'.join(lines) + '\n'
+
+
+def Diagnostics(filename, text, engine):
+    state = cmakelint.main._lint_state
+    state.filters = ['+' + category for category in
+                     cmakelint.main._DEFAULT_OFF_CATEGORIES]
+    state.engine = engine
+    found = []
+
+    def Collect(filename, linenumber, category, message):
+        if cmakelint.main.ShouldPrintError(category):
+            found.append((linenumber, category, message))
+    try:
+        lines = text.splitlines(True)
+        cmakelint.main.ProcessFileData(filename, lines, Collect)
+    finally:
+        state.filters = []
+        state.engine = 'fast'
+    return found
+
+
+class ParityTest(unittest.TestCase):
+
+    def assertParity(self, filename, text):
+        self.assertEqual(Diagnostics(filename, text, 'legacy'),
+                         Diagnostics(filename, text, 'fast'),
+                         '%s:\n%s' % (filename, text))
+
+    def testSamples(self):
+        filenames = glob.glob(os.path.join(ROOT, 'samples', '**', '*.cmake'),
+                              recursive=True)
+        filenames += glob.glob(os.path.join(ROOT, 'samples', '**',
+                                            'CMakeLists.txt'), recursive=True)
+        self.assertTrue(filenames)
+        for filename in filenames:
+            with open(filename) as f:
+                self.assertParity(filename, f.read())
+
+    def testFixtures(self):
+        for filename, text in project_test.FILES.items():
+            self.assertParity(filename, text)
+
+    def testFuzz(self):
+        rng = random.Random(42)
+        for i in range(FUZZ_COUNT):
+            self.assertParity('fuzz%d.cmake' % i, Snippet(rng))
+
+    def testEngineOption(self):
+        # the legacy engine finds the same errors from the command line
+        sample = os.path.join(ROOT, 'samples', 'llvm', 'CMakeLists.txt')
+        outputs = []
+        for engine in cmakelint.main._ENGINES:
+            stdout = io.StringIO()
+            cmakelint.main.main(['--engine=%s' % engine, sample], stdout,
+                                io.StringIO())
+            outputs.append(stdout.getvalue())
+        self.assertTrue(outputs[0])
+        self.assertEqual(outputs[0], outputs[1])
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(['--engine=turbo', sample],
+                                                 io.StringIO(), stderr))
+        self.assertIn('engine should be one of fast, legacy', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
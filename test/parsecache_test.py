@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import os
+import unittest
+
+import cmakelint.main
+import cmakelint.parsecache
+from test import cli_test
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, 'samples', 'llvm', 'CMakeLists.txt')
+
+
+class ParseCacheTest(cli_test.TempDirTest, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.root, 'cache')
+        cmakelint.main._lint_state = cmakelint.main._CMakeLintState()
+
+    def DiskCounts(self, *args):
+        metrics_file = os.path.join(self.root, 'metrics.txt')
+        self.Lint('--metrics-file=%s' % metrics_file, *args)
+        counts = {'hits': 0, 'misses': 0}
+        with open(metrics_file) as f:
+            for line in f:
+                for kind in ('hits', 'misses'):
+                    if line.startswith('cmakelint_cache_%s_total{cache="disk"}'
+                                       % kind):
+                        counts[kind] = int(float(line.split()[1]))
+        return counts
+
+    def testRoundTrip(self):
+        data = (b'# lint_cmake: -whitespace/eol\r\n'
+                b'if(A) # a\r\n  set(X "1\r\n2")\r\nendif()')
+        lines = cmakelint.main.DecodeLines(data)
+        clean_lines = cmakelint.main.ParseLines(lines)
+        entry = cmakelint.parsecache.EntryPath(self.cache_dir, data)
+        self.assertEqual((None, None), cmakelint.parsecache.Get(entry))
+        cmakelint.parsecache.Put(entry, lines, clean_lines)
+        cached_lines, cached = cmakelint.parsecache.Get(entry)
+        self.assertEqual(lines, cached_lines)
+        self.assertEqual(clean_lines.raw_lines, cached.raw_lines)
+        self.assertEqual(clean_lines.lines, cached.lines)
+        self.assertEqual(clean_lines.have_cr, cached.have_cr)
+        self.assertEqual([1], cached.Pragmas())
+        self.assertEqual(clean_lines.BlockIndex().depths,
+                         cached.BlockIndex().depths)
+        self.assertEqual(clean_lines.BlockIndex().commands,
+                         cached.BlockIndex().commands)
+
+    def testKey(self):
+        entry = cmakelint.parsecache.EntryPath(self.cache_dir, b'set(X 1)\n')
+        self.assertNotEqual(entry, cmakelint.parsecache.EntryPath(
+            self.cache_dir, b'set(X 2)\n'))
+        cmakelint.main._lint_state.SetFilters('-whitespace')
+        cmakelint.main._lint_state.SetLineLength('120')
+        self.assertEqual(entry, cmakelint.parsecache.EntryPath(
+            self.cache_dir, b'set(X 1)\n'))
+        cmakelint.main._lint_state.SetFallbackEncoding('cp1252')
+        self.assertNotEqual(entry, cmakelint.parsecache.EntryPath(
+            self.cache_dir, b'set(X 1)\n'))
+
+    def testOptionsChange(self):
+        cache = '--cache-dir=%s' % self.cache_dir
+        for args in ([], ['--linelength=40'], ['--filter=-whitespace'],
+                     ['--spaces=4']):
+            expected = self.Lint(*(args + [SAMPLE]))
+            self.assertEqual(expected, self.Lint(*([cache] + args + [SAMPLE])))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+        self.assertEqual({'hits': 1, 'misses': 0},
+                         self.DiskCounts(cache, '--linelength=100', SAMPLE))
+
+    def testDamagedEntry(self):
+        cache = '--cache-dir=%s' % self.cache_dir
+        expected = self.Lint(SAMPLE)
+        self.Lint(cache, SAMPLE)
+        entry = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        with open(entry, 'r+b') as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b'damaged!')
+        self.assertEqual({'hits': 0, 'misses': 1},
+                         self.DiskCounts(cache, SAMPLE))
+        self.assertEqual(expected, self.Lint(cache, SAMPLE))
+
+    def testJobs(self):
+        files = [self.Write('%d.cmake' % i, 'SET(X%d 1) \n' % i * (i + 1))
+                 for i in range(4)]
+        cache = '--cache-dir=%s' % self.cache_dir
+        expected = self.Lint(*files)
+        self.assertEqual(expected[:2], self.Lint(cache, '--jobs=2', *files)[:2])
+        self.assertEqual(4, len(os.listdir(self.cache_dir)))
+        self.assertEqual(expected, self.Lint(cache, *files))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import cmakelint.main
+import cmakelint.project
+
+FILES = {
+    'CMakeLists.txt': (
+        'project(p)\n'
+        'list(APPEND CMAKE_MODULE_PATH "${CMAKE_CURRENT_SOURCE_DIR}/cmake")\n'
+        'include(Common)\n'
+        'add_subdirectory(a)\n'
+        'add_subdirectory("b")\n'
+        'add_subdirectory(gone)\n'
+        'find_package(USED)\n'
+        'include(CheckCSourceCompiles)\n'),
+    'a/CMakeLists.txt': (
+        'include(Common)\n'
+        'include(${CMAKE_CURRENT_SOURCE_DIR}/local.cmake)\n'
+        'include(missing.cmake OPTIONAL)\n'),
+    'a/local.cmake': 'include(${CMAKE_CURRENT_LIST_DIR}/local.cmake)\n',
+    'b/CMakeLists.txt': 'include(Common)\ninclude(missing.cmake)\n',
+    'cmake/Common.cmake': 'set(X 1)\n',
+    'cmake/FindUSED.cmake': (
+        'include(FindPackageHandleStandardArgs)\n'
+        'find_package_handle_standard_args(USED DEFAULT_MSG X)\n'),
+    'cmake/FindUNUSED.cmake': 'set(Y 1)\n',
+    'orphan/CMakeLists.txt': 'set(Z 1)\n',
+    'build/CMakeCache.txt': '',
+    'build/CMakeLists.txt': 'set(Z 1)\n',
+    '.hidden/CMakeLists.txt': 'set(Z 1)\n',
+}
+
+
+class ProjectTest(unittest.TestCase):
+
+    def setUp(self):
+        cmakelint.main._lint_state.filters = []
+        self.root = tempfile.mkdtemp()
+        for name, contents in FILES.items():
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(contents)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def Relative(self, filename):
+        return os.path.relpath(filename, self.root)
+
+    def testGraph(self):
+        project = cmakelint.project.Project(self.root).Build()
+        self.assertEqual(
+            ['CMakeLists.txt', 'cmake/Common.cmake', 'a/CMakeLists.txt',
+             'a/local.cmake', 'b/CMakeLists.txt', 'cmake/FindUSED.cmake'],
+            [self.Relative(parsed.filename) for parsed in project.files])
+        self.assertEqual(
+            [('CMakeLists.txt', 6, 'add_subdirectory', 'gone'),
+             ('b/CMakeLists.txt', 2, 'include', 'missing.cmake')],
+            sorted((self.Relative(f), line, c, t)
+                   for f, line, c, t in project.missing))
+        self.assertEqual(
+            {'cmake/FindUSED.cmake': True, 'cmake/FindUNUSED.cmake': False},
+            dict((self.Relative(f), used)
+                 for f, used in project.find_modules.items()))
+        self.assertEqual(['orphan/CMakeLists.txt'],
+                         [self.Relative(f) for f in project.Unreached()])
+
+    def testEachFileParsedOnce(self):
+        with mock.patch('cmakelint.main.ParseLines',
+                        wraps=cmakelint.main.ParseLines) as parse_lines:
+            project = cmakelint.project.LintProject(self.root)
+        # Common.cmake is included three times but read and parsed once,
+        # and linting reuses the parse from building the graph
+        self.assertEqual(6, project.cache.reads)
+        self.assertEqual(6, parse_lines.call_count)
+
+    def testCheckProject(self):
+        found = []
+
+        def Collect(filename, linenumber, category, message):
+            found.append((self.Relative(filename), linenumber, category))
+        cmakelint.project.CheckProject(
+            cmakelint.project.Project(self.root).Build(), Collect)
+        self.assertEqual([
+            ('b/CMakeLists.txt', 2, 'project/missing'),
+            ('CMakeLists.txt', 6, 'project/missing'),
+            ('orphan/CMakeLists.txt', 0, 'project/unreached'),
+            ('cmake/FindUNUSED.cmake', 0, 'project/unusedmodule'),
+        ], found)
+
+    def testCommandLine(self):
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            status = cmakelint.main.main(['--project=.'], stdout, stderr)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(1, status)
+        self.assertEqual([
+            'b/CMakeLists.txt:2: include(missing.cmake) names a file that '
+            'does not exist [project/missing]',
+            'CMakeLists.txt:6: add_subdirectory(gone) names a directory '
+            'without a CMakeLists.txt [project/missing]',
+            'orphan/CMakeLists.txt:0: Not added by add_subdirectory() from '
+            'CMakeLists.txt [project/unreached]',
+            'cmake/FindUNUSED.cmake:0: Find module is never used; '
+            'no find_package(UNUSED) [project/unusedmodule]',
+        ], stdout.getvalue().splitlines())
+        self.assertEqual('Total Errors: 4\n', stderr.getvalue())
+
+    def testInsertModulePath(self):
+        with open(os.path.join(self.root, 'CMakeLists.txt'), 'a') as f:
+            f.write('list(INSERT CMAKE_MODULE_PATH 0 '
+                    '"${CMAKE_CURRENT_SOURCE_DIR}/override")\n'
+                    'find_package(USED)\n')
+        os.makedirs(os.path.join(self.root, 'override'))
+        with open(os.path.join(self.root, 'override', 'FindUSED.cmake'),
+                  'w') as f:
+            f.write('set(X 1)\n')
+        project = cmakelint.project.Project(self.root).Build()
+        # the index is not a directory, and the directory goes in front
+        self.assertEqual(['override', 'cmake'],
+                         [self.Relative(d) for d in project.module_path])
+        self.assertEqual(
+            {'cmake/FindUSED.cmake': True, 'cmake/FindUNUSED.cmake': False,
+             'override/FindUSED.cmake': True},
+            dict((self.Relative(f), used)
+                 for f, used in project.find_modules.items()))
+
+    def testQuotedModulePath(self):
+        with open(os.path.join(self.root, 'CMakeLists.txt')) as f:
+            text = f.read()
+        with open(os.path.join(self.root, 'CMakeLists.txt'), 'w') as f:
+            f.write(text.replace(
+                'list(APPEND CMAKE_MODULE_PATH "${CMAKE_CURRENT_SOURCE_DIR}/cmake")',
+                'set(CMAKE_MODULE_PATH "${CMAKE_MODULE_PATH};'
+                '${CMAKE_CURRENT_SOURCE_DIR}/cmake")'))
+        project = cmakelint.project.Project(self.root).Build()
+        self.assertEqual(['cmake'],
+                         [self.Relative(d) for d in project.module_path])
+        self.assertEqual(
+            {'cmake/FindUSED.cmake': True, 'cmake/FindUNUSED.cmake': False},
+            dict((self.Relative(f), used)
+                 for f, used in project.find_modules.items()))
+
+    def testMaxFileErrors(self):
+        files = {
+            'b/CMakeLists.txt': 'include(missing.cmake)\ninclude(other.cmake)\n',
+            'cmake/FindUSED.cmake': 'set(X 1) \nset(Y 1) \n',
+            'orphan2/CMakeLists.txt': 'set(Z 1)\n',
+        }
+        for name, contents in files.items():
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(contents)
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            status = cmakelint.main.main(
+                ['--project=.', '--max-file-errors=1'], stdout, stderr)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(1, status)
+        # the limit reached by the file linted last does not stop the project
+        # errors, and reaching it for b/ only stops those for b/
+        self.assertEqual([
+            'cmake/FindUSED.cmake:1: Line ends in whitespace [whitespace/eol]',
+            'b/CMakeLists.txt:1: include(missing.cmake) names a file that '
+            'does not exist [project/missing]',
+            'CMakeLists.txt:6: add_subdirectory(gone) names a directory '
+            'without a CMakeLists.txt [project/missing]',
+            'orphan/CMakeLists.txt:0: Not added by add_subdirectory() from '
+            'CMakeLists.txt [project/unreached]',
+            'orphan2/CMakeLists.txt:0: Not added by add_subdirectory() from '
+            'CMakeLists.txt [project/unreached]',
+            'cmake/FindUNUSED.cmake:0: Find module is never used; '
+            'no find_package(UNUSED) [project/unusedmodule]',
+        ], stdout.getvalue().splitlines())
+        self.assertEqual('Total Errors: 6 (output truncated for 2 files after '
+                         '1 errors each)\n', stderr.getvalue())
+
+    def testMaxFileErrorsReachedWhenLinting(self):
+        with open(os.path.join(self.root, 'CMakeLists.txt'), 'a') as f:
+            f.write('set(X 1) \n')
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            cmakelint.main.main(['--project=.', '--max-file-errors=1'],
+                                stdout, stderr)
+        finally:
+            os.chdir(cwd)
+        # CMakeLists.txt used up its errors when it was linted, so its
+        # project/missing error is left out
+        self.assertEqual([
+            'CMakeLists.txt:9: Line ends in whitespace [whitespace/eol]',
+            'b/CMakeLists.txt:2: include(missing.cmake) names a file that '
+            'does not exist [project/missing]',
+            'orphan/CMakeLists.txt:0: Not added by add_subdirectory() from '
+            'CMakeLists.txt [project/unreached]',
+            'cmake/FindUNUSED.cmake:0: Find module is never used; '
+            'no find_package(UNUSED) [project/unusedmodule]',
+        ], stdout.getvalue().splitlines())
+        self.assertEqual('Total Errors: 4 (output truncated for 1 files after '
+                         '1 errors each)\n', stderr.getvalue())
+
+    def testCommandLineErrors(self):
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(
+            ['--project=%s' % self.root, 'CMakeLists.txt'], io.StringIO(),
+            stderr))
+        self.assertIn('Files can not be given with --project', stderr.getvalue())
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(
+            ['--project=%s' % os.path.join(self.root, 'cmake')],
+            io.StringIO(), stderr))
+        self.assertIn('project expects a directory', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Startup benchmarks. pre-commit runs cmakelint once per commit, so the cost of
+importing cmakelint.main and of trivial invocations such as --version is paid
+over and over again. The budgets are deliberately generous so that they only
+catch real regressions, such as eager imports or work at module level, and
+can be raised through the environment on very slow machines.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import unittest
+from unittest import mock
+
+import cmakelint.main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIN = os.path.join(ROOT, 'bin', 'cmakelint')
+
+IMPORT_BUDGET_MS = float(os.environ.get('CMAKELINT_IMPORT_BUDGET_MS', 25))
+VERSION_BUDGET_MS = float(os.environ.get('CMAKELINT_VERSION_BUDGET_MS', 100))
+RUNS = 5
+# -X importtime and the budgets are CPython's; PyPy reports no import times
+# and its JIT makes start up times vary too much to hold to a budget
+CPYTHON = platform.python_implementation() == 'CPython'
+
+# modules that only some code paths need, so must not be imported eagerly
+LAZY_MODULES = ['re', 'getopt', 'json', 'threading', 'concurrent.futures',
+                'cmakelint.signatures', 'cmakelint.git',
+                'cmakelint.archive', 'cmakelint.jobs', 'cmakelint.legacy',
+                'cmakelint.metrics', 'cmakelint.overrides', 'cmakelint.fix',
+                'cmakelint.tree', 'cmakelint.parsecache']
+
+
+def Environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [p for p in env.get('PYTHONPATH', '').split(os.pathsep) if p])
+    # measure what an installed copy costs, with its bytecode cached
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def Run(args):
+    return subprocess.run([sys.executable] + args, env=Environment(),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          check=True)
+
+
+def ImportTimeMs():
+    """
+    Cumulative import time of cmakelint.main as reported by -X importtime
+    """
+    err = Run(['-X', 'importtime', '-c', 'import cmakelint.main']).stderr
+    for line in err.decode('utf-8').splitlines():
+        fields = [f.strip() for f in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'cmakelint.main':
+            return int(fields[1]) / 1000.0
+    raise AssertionError('cmakelint.main not found in:\n%s' % err)
+
+
+def Median(values):
+    return sorted(values)[len(values) // 2]
+
+
+class StartupTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # write the bytecode cache before timing anything
+        Run(['-c', 'import cmakelint.main'])
+
+    def testNoEagerImports(self):
+        out = Run(['-c', 'import sys; before = set(sys.modules); '
+                   'import cmakelint.main as m; '
+                   'imported = sorted(set(sys.modules) - before); '
+                   'import json; '
+                   'print(json.dumps([imported, m._RE_COMMAND.IsCompiled()]))']
+                  ).stdout
+        imported, compiled = json.loads(out.decode('utf-8'))
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, imported)
+        self.assertFalse(compiled)
+
+    def testSignaturesOnlyLoadedWhenNeeded(self):
+        sample = os.path.join(ROOT, 'samples', 'llvm', 'CMakeLists.txt')
+        code = ('import sys, io, cmakelint.main as m; '
+                'm.main(%r + [%r], io.StringIO(), io.StringIO()); '
+                'print("cmakelint.signatures" in sys.modules)')
+        out = Run(['-c', code % ([], sample)]).stdout
+        self.assertEqual(b'False', out.strip())
+        out = Run(['-c', code % (['--filter=+syntax/keyword'], sample)]).stdout
+        self.assertEqual(b'True', out.strip())
+
+    @unittest.skipUnless(CPYTHON, 'import times are only measured on CPython')
+    def testImportBudget(self):
+        elapsed = Median([ImportTimeMs() for _ in range(RUNS)])
+        self.assertLess(elapsed, IMPORT_BUDGET_MS,
+                        'import cmakelint.main took %.1fms' % elapsed)
+
+    @unittest.skipUnless(CPYTHON, 'start up budgets are set for CPython')
+    def testVersionBudget(self):
+        def Elapsed(args):
+            start = time.perf_counter()
+            Run(args)
+            return (time.perf_counter() - start) * 1000.0
+        baseline = Median([Elapsed(['-c', 'pass']) for _ in range(RUNS)])
+        version = Median([Elapsed([BIN, '--version']) for _ in range(RUNS)])
+        self.assertLess(version - baseline, VERSION_BUDGET_MS,
+                        'cmakelint --version took %.1fms more than python'
+                        % (version - baseline))
+
+    def testVersionSkipsConfigDiscovery(self):
+        with mock.patch('cmakelint.main.DefaultRC') as default_rc:
+            with mock.patch('sys.stderr'):
+                self.assertRaises(SystemExit, cmakelint.main.ParseArgs,
+                                  ['--version'])
+            default_rc.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import cmakelint.api
+import cmakelint.main
+import cmakelint.tree
+
+
+def Arguments(command):
+    return [(a['text'], a['kind']) for a in command['arguments']]
+
+
+class TreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.dump_file = os.path.join(self.root, 'tree.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def Write(self, name, text):
+        filename = os.path.join(self.root, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def Dump(self, *args):
+        stderr = io.StringIO()
+        status = cmakelint.main.main(
+            ['--dump-ast=%s' % self.dump_file] + list(args),
+            io.StringIO(), stderr)
+        with open(self.dump_file) as f:
+            return status, stderr.getvalue(), [json.loads(line) for line in f]
+
+    def testCommands(self):
+        tree = cmakelint.api.Parse('CMakeLists.txt', (
+            '# lint_cmake: -whitespace/eol, -readability/wonkycase\n'
+            'if(NOT (A AND B)) # both\n'
+            '  set(X "a b\n'
+            'c" ${Y} [[raw )]] \\) x)\n'
+            'endif()\n'))
+        self.assertEqual(cmakelint.tree.VERSION, tree['version'])
+        self.assertEqual('CMakeLists.txt', tree['file'])
+        commands = tree['commands']
+        self.assertEqual(['if', 'set', 'endif'], [c['name'] for c in commands])
+        self.assertEqual([(2, 2, 0), (3, 4, 1), (5, 5, 0)],
+                         [(c['line'], c['end_line'], c['depth'])
+                          for c in commands])
+        self.assertEqual([('NOT', 'unquoted'), ('(', 'unquoted'),
+                          ('A', 'unquoted'), ('AND', 'unquoted'),
+                          ('B', 'unquoted'), (')', 'unquoted')],
+                         Arguments(commands[0]))
+        self.assertEqual([('X', 'unquoted'), ('a b\nc', 'quoted'),
+                          ('${Y}', 'unquoted'), ('raw )', 'bracket'),
+                          ('\\)', 'unquoted'), ('x', 'unquoted')],
+                         Arguments(commands[1]))
+        self.assertEqual([3, 3, 4, 4, 4, 4],
+                         [a['line'] for a in commands[1]['arguments']])
+        self.assertEqual([], commands[2]['arguments'])
+        self.assertEqual([{'line': 1, 'text': '# lint_cmake: -whitespace/eol, '
+                                                '-readability/wonkycase'},
+                          {'line': 2, 'text': '# both'}], tree['comments'])
+        self.assertEqual([{'line': 1, 'filters': ['-whitespace/eol',
+                                                  '-readability/wonkycase']}],
+                         tree['pragmas'])
+
+    def testArgumentsOnLaterLines(self):
+        # a line of arguments that looks like a command is not one
+        tree = cmakelint.api.Parse('CMakeLists.txt',
+                                   'if(\n  NOT(A)\n)\nmessage(x\n')
+        self.assertEqual([('if', 3), ('message', None)],
+                         [(c['name'], c['end_line']) for c in tree['commands']])
+        self.assertEqual(['NOT', '(', 'A', ')'],
+                         [a['text'] for a in tree['commands'][0]['arguments']])
+
+    def testDumpAst(self):
+        first = self.Write('CMakeLists.txt', 'project(p)\nadd_subdirectory(a)\n')
+        second = self.Write('b.cmake', 'set(X 1) \n')
+        ignored = self.Write('notes.txt', 'set(X 1)\n')
+        status, stderr, trees = self.Dump(first, ignored, second)
+        self.assertEqual(1, status)
+        self.assertIn('Total Errors: 1', stderr)
+        self.assertEqual([first, second], [tree['file'] for tree in trees])
+        self.assertEqual(['project', 'add_subdirectory'],
+                         [c['name'] for c in trees[0]['commands']])
+        self.assertEqual(cmakelint.api.Parse(second), trees[1])
+
+    def testDumpAstCachedAndCheap(self):
+        text = '# Generated by hand\nset(X 1)\n'
+        files = [self.Write('%d.cmake' % i, text) for i in range(2)]
+        for generated in ('lint', 'cheap'):
+            _, _, trees = self.Dump('--generated=%s' % generated, *files)
+            # the second file has the same contents and is not linted again
+            self.assertEqual(files, [tree['file'] for tree in trees])
+            self.assertEqual([['set'], ['set']],
+                             [[c['name'] for c in tree['commands']]
+                              for tree in trees])
+
+    def testDumpAstJobs(self):
+        files = [self.Write('%d.cmake' % i, 'set(X%d 1)\n' % i * (i + 1))
+                 for i in range(4)]
+        trees = self.Dump(*files)[2]
+        self.assertEqual(trees, self.Dump('--jobs=2', *files)[2])
+        self.assertEqual(4, len(trees))
+
+    def testSchema(self):
+        schema = cmakelint.tree.SCHEMA
+        tree = cmakelint.api.Parse('CMakeLists.txt', 'set(X "1") # one\n')
+        self.assertEqual(sorted(schema['required']), sorted(tree))
+        command = schema['properties']['commands']['items']
+        self.assertEqual(sorted(command['required']),
+                         sorted(tree['commands'][0]))
+        argument = command['properties']['arguments']['items']
+        self.assertEqual(sorted(argument['required']),
+                         sorted(tree['commands'][0]['arguments'][0]))
+        self.assertEqual(schema, json.loads(json.dumps(schema)))
+
+    def testDumpAstErrors(self):
+        stderr = io.StringIO()
+        self.assertEqual(32, cmakelint.main.main(
+            ['--lsp', '--dump-ast=%s' % self.dump_file], io.StringIO(), stderr))
+        self.assertIn('--dump-ast can not be used with --lsp', stderr.getvalue())
+        stderr = io.StringIO()
+        sample = self.Write('CMakeLists.txt', 'set(X 1)\n')
+        self.assertEqual(32, cmakelint.main.main(
+            ['--dump-ast=%s' % os.path.join(self.root, 'missing', 'tree'),
+             sample], io.StringIO(), stderr))
+        self.assertIn('FATAL ERROR: Can not write', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
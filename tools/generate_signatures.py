@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+Regenerate cmakelint/signatures.py from the documentation of the cmake on the
+PATH:
+
+    python tools/generate_signatures.py > cmakelint/signatures.py
+
+The keywords of a command are the upper case words in the signatures of its
+documentation, the indented command(...) calls that are not examples, leaving
+out <placeholders> and what is glued to them, variable names and -D flags.
+The values a placeholder can take, such as the <mode> of message(), are listed
+in the text instead, as a definition list after a sentence naming the
+placeholder, and are keywords too.
+"""
+import re
+import subprocess
+import sys
+
+_RE_KEYWORD = re.compile(r'(?<![\w${/-])([A-Z][A-Z0-9_]+)(?![\w}\0])')
+# <placeholders>, <PLACEHOLDERS> and ${variables}, but not alternatives such as
+# <PUBLIC|PRIVATE>; they become \0 so that CMP<NNNN> does not leave CMP behind
+_RE_PLACEHOLDER = re.compile(r'<[^>|]*>|\$\{[^}]*\}')
+# a term of a definition list, such as ``FATAL_ERROR`` or (none) or ``NOTICE``
+_RE_TERM = re.compile(r'^( *)(?:\(none\) or )?``([A-Z][A-Z0-9_]+)``$')
+
+_HEADER = '''"""
+Copyright 2009 Richard Quirk
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not
+use this file except in compliance with the License. You may obtain a copy of
+the License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations under
+the License.
+
+The built-in commands of CMake %s and their keywords, made by
+tools/generate_signatures.py. Each line of _DATA is a command followed by its
+keywords. It is only imported when a check that needs it is enabled.
+"""
+'''
+
+
+def Cmake(*args):
+    return subprocess.check_output(('cmake',) + args).decode('utf-8')
+
+
+def _Calls(command, text):
+    """
+    The command(...) calls in the indented paragraphs of text that start with
+    one, each up to the ) that closes it
+    """
+    block = None
+    call = []
+    depth = 0
+    for line in text.splitlines():
+        if not line.strip() or not line.startswith(' '):
+            block = None
+            continue
+        start = line.strip().lower().startswith(command + '(')
+        if block is None:
+            block = start
+        if block and (call or start):
+            call.append(line)
+            depth = max(depth + line.count('(') - line.count(')'), 0)
+            if depth == 0:
+                yield ' '.join(call)
+                call = []
+
+
+def _Signatures(command, text):
+    """
+    The calls of text that are signatures rather than examples: examples use
+    real names where signatures have <placeholders>, [optional] parts and ...
+    The first call always is one, however it is written.
+    """
+    for index, call in enumerate(_Calls(command, text)):
+        arguments = call.split('(', 1)[1]
+        if index == 0 or '<' in arguments or '[' in arguments or \
+                '...' in arguments or arguments == arguments.upper():
+            yield call
+
+
+def _Modes(text):
+    """
+    The terms of the definition lists that follow a sentence naming a
+    <placeholder>
+    """
+    paragraph = []
+    listing = None
+    for line in text.splitlines():
+        indent = len(line) - len(line.lstrip())
+        match = _RE_TERM.match(line)
+        if match:
+            if listing is None:
+                sentence = ' '.join(paragraph).rsplit('. ', 1)[-1]
+                listing = (indent, '``<' in sentence)
+            if indent == listing[0] and listing[1]:
+                yield match.group(2)
+        elif not line.strip() or (listing and indent > listing[0]):
+            # between paragraphs or the definition of a term
+            continue
+        else:
+            if listing is not None:
+                paragraph = []
+                listing = None
+            paragraph.append(line)
+
+def Keywords(command, text):
+    keywords = set(_Modes(text))
+    for call in _Signatures(command, text):
+        call = _RE_PLACEHOLDER.sub('\0', call)
+        keywords.update(_RE_KEYWORD.findall(call))
+    return sorted(k for k in keywords if not k.startswith('CMAKE_'))
+
+
+def main():
+    version = Cmake('--version').split()[2]
+    commands = Cmake('--help-command-list').split()
+    sys.stdout.write(_HEADER % version)
+    sys.stdout.write('VERSION = %r\n\n_DATA = """\n' % version)
+    for command in commands:
+        keywords = Keywords(command, Cmake('--help-command', command))
+        words = [command] + keywords
+        line = words[0]
+        for word in words[1:]:
+            if len(line) + 1 + len(word) > 78:
+                sys.stdout.write(line + ' \\\n')
+                line = '   '
+            line += ' ' + word
+        sys.stdout.write(line + '\n')
+    sys.stdout.write('"""\n\n')
+    sys.stdout.write(
+        'COMMANDS = dict((line.split()[0], frozenset(line.split()[1:]))\n'
+        '                for line in _DATA.replace(\'\\\\\\n\', \'\').splitlines() if line)\n')
+
+
+if __name__ == '__main__':
+    main()